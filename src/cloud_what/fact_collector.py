@@ -24,6 +24,8 @@ import shutil
 import subprocess
 import logging
 
+from cloud_what.smbios import read_smbios_table
+
 log = logging.getLogger(__name__)
 
 
@@ -87,31 +89,64 @@ class MiniHostCollector(object):
 
         return res.rstrip()
 
+    # DMI strings required, and that can provide hits for detection:
+    # {fact: (dmidecode string keyword, DMI type, key of SMBIOS table section)}
+    DMI_TAGS = {
+        "dmi.baseboard.manufacturer": ("baseboard-manufacturer", 2, "Manufacturer"),
+        "dmi.bios.vendor": ("bios-vendor", 0, "Vendor"),
+        "dmi.bios.version": ("bios-version", 0, "Version"),
+        "dmi.chassis.asset_tag": ("chassis-asset-tag", 3, "Asset Tag"),
+        "dmi.chassis.manufacturer": ("chassis-manufacturer", 3, "Manufacturer"),
+        "dmi.chassis.serial_number": ("chassis-serial-number", 3, "Serial Number"),
+        "dmi.chassis.version": ("chassis-version", 3, "Version"),
+        "dmi.system.manufacturer": ("system-manufacturer", 1, "Manufacturer"),
+        "dmi.system.serial_number": ("system-serial-number", 1, "Serial Number"),
+        "dmi.system.uuid": ("system-uuid", 1, "UUID"),
+    }
+
+    def _get_smbios_strings(self, smbios_table) -> dict:
+        """
+        Get DMI strings from SMBIOS table. Values are the same as values printed
+        by `dmidecode -s`. The system UUID cannot be decoded without the SMBIOS
+        version, and it is read using dmidecode in this case.
+        :return: Dictionary with facts
+        """
+        dmi_info = {}
+        for tag, (string_keyword, dmi_type, key) in self.DMI_TAGS.items():
+            try:
+                sections = smbios_table.get_sections(dmi_type)
+            except KeyError:
+                # dmidecode does not print anything, when there is no such structure
+                dmi_info[tag] = ""
+                continue
+            if key == "UUID" and key not in sections[0] and smbios_table.version == 0:
+                if shutil.which(self.DMIDECODE_PATH) is None:
+                    log.debug("The dmidecode executable is not installed. Unable to get system UUID.")
+                    continue
+                value = self._get_dmidecode_string(string_keyword)
+                if value is not None:
+                    dmi_info[tag] = value
+                continue
+            dmi_info[tag] = sections[0].get(key, "Not Specified")
+        return dmi_info
+
     def get_dmidecode(self) -> dict:
         """
-        Try to get output from dmidecode. It requires the dmidecode tool
+        Try to get DMI strings from SMBIOS table exported by the kernel. When
+        the table is not available, then try to get output from dmidecode. It
+        requires the dmidecode tool
         :return: Dictionary with facts
         """
+        smbios_table = read_smbios_table()
+        if smbios_table is not None:
+            return self._get_smbios_strings(smbios_table)
+
         if shutil.which(self.DMIDECODE_PATH) is None:
             log.error("The dmidecode executable is not installed. Unable to detect public cloud providers.")
             return {}
 
-        # DMI strings required, and that can provide hits for detection
-        dmi_tags = {
-            "dmi.baseboard.manufacturer": "baseboard-manufacturer",
-            "dmi.bios.vendor": "bios-vendor",
-            "dmi.bios.version": "bios-version",
-            "dmi.chassis.asset_tag": "chassis-asset-tag",
-            "dmi.chassis.manufacturer": "chassis-manufacturer",
-            "dmi.chassis.serial_number": "chassis-serial-number",
-            "dmi.chassis.version": "chassis-version",
-            "dmi.system.manufacturer": "system-manufacturer",
-            "dmi.system.serial_number": "system-serial-number",
-            "dmi.system.uuid": "system-uuid",
-        }
-
         dmi_info = {}
-        for tag, string_keyword in dmi_tags.items():
+        for tag, (string_keyword, _dmi_type, _key) in self.DMI_TAGS.items():
             value = self._get_dmidecode_string(string_keyword)
             if value is not None:
                 dmi_info[tag] = value
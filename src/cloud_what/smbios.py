@@ -0,0 +1,228 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+"""
+This module contains minimalistic reader of SMBIOS tables exported by
+the kernel in /sys/firmware/dmi/tables. It does not require running
+dmidecode, but it decodes only DMI strings and the system UUID. The UUID
+is not decoded, when the SMBIOS version is not known.
+"""
+
+import collections
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+
+class SmbiosTable(object):
+    """
+    Reader of SMBIOS structure table. Decoded values use the same keys as
+    the output of dmidecode and they can be queried using get_sections() and
+    get_key() like in the case of rhsmlib.facts.dmidecodeparser.DmidecodeParser.
+    """
+
+    DMI_TABLE_PATH = "/sys/firmware/dmi/tables/DMI"
+    ENTRY_POINT_PATH = "/sys/firmware/dmi/tables/smbios_entry_point"
+
+    END_OF_TABLE = 127
+
+    # Offsets of DMI strings in formatted area of structures: {DMI type: {offset: key}}
+    STRING_FIELDS = {
+        # BIOS Information
+        0: {0x04: "Vendor", 0x05: "Version", 0x08: "Release Date"},
+        # System Information
+        1: {
+            0x04: "Manufacturer",
+            0x05: "Product Name",
+            0x06: "Version",
+            0x07: "Serial Number",
+            0x19: "SKU Number",
+            0x1A: "Family",
+        },
+        # Base Board Information
+        2: {
+            0x04: "Manufacturer",
+            0x05: "Product Name",
+            0x06: "Version",
+            0x07: "Serial Number",
+            0x08: "Asset Tag",
+            0x0A: "Location In Chassis",
+        },
+        # Chassis Information
+        3: {0x04: "Manufacturer", 0x06: "Version", 0x07: "Serial Number", 0x08: "Asset Tag"},
+        # Processor Information
+        4: {
+            0x04: "Socket Designation",
+            0x07: "Manufacturer",
+            0x10: "Version",
+            0x20: "Serial Number",
+            0x21: "Asset Tag",
+            0x22: "Part Number",
+        },
+        # Memory Device
+        17: {
+            0x10: "Locator",
+            0x11: "Bank Locator",
+            0x17: "Manufacturer",
+            0x18: "Serial Number",
+            0x19: "Asset Tag",
+            0x1A: "Part Number",
+        },
+    }
+
+    SYSTEM_INFORMATION = 1
+    UUID_OFFSET = 0x08
+
+    def __init__(self, table: bytes, version: int = 0):
+        """
+        :param table: content of SMBIOS structure table
+        :param version: SMBIOS version encoded as (major << 8) | minor
+        """
+        self.table = table
+        self.version = version
+        self._data: Dict[int, Dict[str, str]] = {}
+        self._dmi_types: Dict[int, List[int]] = collections.defaultdict(list)
+        self._parse()
+
+    @classmethod
+    def from_sysfs(cls) -> "SmbiosTable":
+        """
+        Read SMBIOS table exported by kernel. It is usually readable only by root.
+        :raise OSError: when the table cannot be read
+        """
+        with open(cls.DMI_TABLE_PATH, "rb") as table_file:
+            table = table_file.read()
+        try:
+            with open(cls.ENTRY_POINT_PATH, "rb") as entry_point_file:
+                version = cls.parse_version(entry_point_file.read())
+        except OSError as err:
+            log.debug(f"Unable to read SMBIOS entry point: {err}")
+            version = 0
+        return cls(table, version)
+
+    @staticmethod
+    def parse_version(entry_point: bytes) -> int:
+        """
+        Get SMBIOS version from the entry point structure
+        :return: version encoded as (major << 8) | minor or 0, when it is not known
+        """
+        if entry_point.startswith(b"_SM3_") and len(entry_point) >= 9:
+            return (entry_point[7] << 8) | entry_point[8]
+        if entry_point.startswith(b"_SM_") and len(entry_point) >= 8:
+            return (entry_point[6] << 8) | entry_point[7]
+        if entry_point.startswith(b"_DMI_") and len(entry_point) >= 15:
+            # Legacy entry point has BCD encoded revision
+            return ((entry_point[14] >> 4) << 8) | (entry_point[14] & 0x0F)
+        return 0
+
+    @property
+    def digest(self) -> str:
+        """
+        Checksum of the table, which can be used for detection of changes
+        """
+        return hashlib.sha256(self.version.to_bytes(2, "big") + self.table).hexdigest()
+
+    @staticmethod
+    def _decode_string(raw: bytes) -> str:
+        # dmidecode replaces unprintable characters with dots
+        # (including all non-ASCII bytes)
+        printable = bytes(b if 32 <= b < 127 else ord(".") for b in raw)
+        return printable.decode("ascii").rstrip()
+
+    def _decode_uuid(self, raw: bytes) -> Optional[str]:
+        if all(b == 0xFF for b in raw):
+            return "Not Settable"
+        if all(b == 0x00 for b in raw):
+            return "Not Present"
+        if self.version == 0:
+            # Byte order of the UUID depends on the SMBIOS version
+            return None
+        if self.version >= 0x0206:
+            # Since SMBIOS 2.6 the first three fields are little-endian
+            raw = raw[3::-1] + raw[5:3:-1] + raw[7:5:-1] + raw[8:]
+        hex_uuid = raw.hex().upper()
+        return "-".join([hex_uuid[0:8], hex_uuid[8:12], hex_uuid[12:16], hex_uuid[16:20], hex_uuid[20:32]])
+
+    def _parse(self):
+        offset = 0
+        while offset + 4 <= len(self.table):
+            dmi_type = self.table[offset]
+            length = self.table[offset + 1]
+            handle = int.from_bytes(self.table[offset + 2 : offset + 4], "little")
+            if length < 4:
+                log.debug(f"Invalid length of SMBIOS structure {handle:#06x}: {length}")
+                break
+            # Strings follow the formatted area and the set is terminated by two NULs
+            strings_end = self.table.find(b"\0\0", offset + length)
+            if strings_end == -1:
+                log.debug(f"SMBIOS structure {handle:#06x} is truncated")
+                break
+            formatted = self.table[offset : offset + length]
+            strings_area = self.table[offset + length : strings_end]
+            strings = strings_area.split(b"\0") if strings_area else []
+            self._add_structure(dmi_type, handle, formatted, strings)
+            offset = strings_end + 2
+            if dmi_type == self.END_OF_TABLE:
+                break
+
+    def _add_structure(self, dmi_type: int, handle: int, formatted: bytes, strings: List[bytes]):
+        section = {}
+        for field_offset, key in self.STRING_FIELDS.get(dmi_type, {}).items():
+            if field_offset >= len(formatted):
+                continue
+            index = formatted[field_offset]
+            # String number 0 means that the string is not specified
+            if 0 < index <= len(strings):
+                section[key] = self._decode_string(strings[index - 1])
+        if dmi_type == self.SYSTEM_INFORMATION and len(formatted) >= self.UUID_OFFSET + 16:
+            uuid = self._decode_uuid(formatted[self.UUID_OFFSET : self.UUID_OFFSET + 16])
+            if uuid is not None:
+                section["UUID"] = uuid
+        self._data[handle] = section
+        self._dmi_types[dmi_type].append(handle)
+
+    def get_sections(self, dmi_type) -> List[Dict[str, str]]:
+        """
+        Get a list of sections for the specified DMI type. The type can be
+        integer or enum with the integer value.
+
+        KeyError is raised if there is no section of the specified DMI type.
+        """
+        dmi_type = getattr(dmi_type, "value", dmi_type)
+        if dmi_type not in self._dmi_types:
+            raise KeyError(dmi_type)
+        return [self._data[handle] for handle in self._dmi_types[dmi_type]]
+
+    def get_key(self, dmi_type, key: str) -> str:
+        """
+        Get the value of a specific key of the first section of the specified DMI type.
+
+        KeyError is raised if there is no section of the specified DMI type,
+        or that section does not have the specified key.
+        """
+        return self.get_sections(dmi_type)[0][key]
+
+
+def read_smbios_table() -> Optional[SmbiosTable]:
+    """
+    Try to read SMBIOS table exported by the kernel
+    :return: instance of SmbiosTable or None, when the table is not available
+    """
+    try:
+        return SmbiosTable.from_sysfs()
+    except OSError as err:
+        log.debug(f"Unable to read SMBIOS table: {err}")
+        return None
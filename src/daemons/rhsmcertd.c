@@ -49,6 +49,7 @@
 #define DEFAULT_HEAL_INTERVAL_SECONDS 86400    /* 24 hours */
 #define DEFAULT_SPLAY_ENABLED true
 #define DEFAULT_AUTO_REGISTRATION false
+#define DEFAULT_PERSISTENT_WORKER false
 #define BUF_MAX 256
 #define RHSM_CONFIG_FILE "/etc/rhsm/rhsm.conf"
 
@@ -127,6 +128,7 @@ typedef struct _Config {
     int cert_interval_seconds;
     bool splay;
     bool auto_registration;
+    bool persistent_worker;
 } Config;
 
 const char *
@@ -390,6 +392,47 @@ initial_cert_check (gpointer data)
     return false;
 }
 
+/*
+ * Replace this process with persistent worker, which schedules all checks
+ * itself and runs them in-process. The lock file descriptor is inherited,
+ * so the lock is held by the worker. The function returns only on failure.
+ */
+static void
+exec_persistent_worker (int cert_interval_seconds, int heal_interval_seconds,
+                        int auto_reg_interval_seconds, bool splay_enabled,
+                        bool auto_reg_enabled)
+{
+    char cert_interval_arg[BUF_MAX];
+    char heal_interval_arg[BUF_MAX];
+    char auto_reg_interval_arg[BUF_MAX];
+    const char *worker_argv[10];
+    int i = 0;
+
+    snprintf (cert_interval_arg, BUF_MAX, "--cert-check-interval=%d", cert_interval_seconds);
+    snprintf (heal_interval_arg, BUF_MAX, "--auto-attach-interval=%d", heal_interval_seconds);
+    snprintf (auto_reg_interval_arg, BUF_MAX, "--auto-register-interval=%d", auto_reg_interval_seconds);
+
+    worker_argv[i++] = WORKER_NAME;
+    worker_argv[i++] = "--persistent";
+    worker_argv[i++] = cert_interval_arg;
+    worker_argv[i++] = heal_interval_arg;
+    worker_argv[i++] = auto_reg_interval_arg;
+    if (auto_reg_enabled) {
+        worker_argv[i++] = "--auto-register";
+    }
+    if (!splay_enabled) {
+        worker_argv[i++] = "--no-splay";
+    }
+    if (run_now) {
+        worker_argv[i++] = "--now";
+    }
+    worker_argv[i] = NULL;
+
+    info ("Starting persistent worker: %s", WORKER);
+    execv (WORKER, (char * const *) worker_argv);
+    warn ("Unable to execute persistent worker %s: %s", WORKER, strerror (errno));
+}
+
 // FIXME Remove when glib is updated to >= 2.31.0 (see comment below).
 // NOTE: 0 is used for error, so this can't return 0. For our cases, that
 //       ok
@@ -504,6 +547,9 @@ key_file_init_config (Config * config, GKeyFile * key_file)
             DEFAULT_AUTO_REGISTRATION
             );
     config->auto_registration = auto_registration_enabled;
+
+    config->persistent_worker = get_bool_from_config_file (key_file, "rhsmcertd",
+                            "persistent_worker", DEFAULT_PERSISTENT_WORKER);
 }
 
 void
@@ -563,6 +609,7 @@ get_config (int argc, char *argv[])
     config->cert_interval_seconds = DEFAULT_CERT_INTERVAL_SECONDS;
     config->heal_interval_seconds = DEFAULT_HEAL_INTERVAL_SECONDS;
     config->splay = DEFAULT_SPLAY_ENABLED;
+    config->persistent_worker = DEFAULT_PERSISTENT_WORKER;
     config->auto_registration = DEFAULT_AUTO_REGISTRATION;
 
     // Load configuration values from the configuration file
@@ -649,6 +696,7 @@ main (int argc, char *argv[])
     int heal_interval_seconds = config->heal_interval_seconds;
     bool splay_enabled = config->splay;
     bool auto_reg_enabled = config->auto_registration;
+    bool persistent_worker = config->persistent_worker;
     free (config);
 
     if (daemon (0, 0) == -1)
@@ -671,6 +719,13 @@ main (int argc, char *argv[])
     info ("Cert check interval: %.1f minutes [%d seconds]",
           cert_interval_seconds / 60.0, cert_interval_seconds);
 
+    if (persistent_worker) {
+        exec_persistent_worker (cert_interval_seconds, heal_interval_seconds,
+                                auto_reg_interval_seconds, splay_enabled,
+                                auto_reg_enabled);
+        warn ("Falling back to running worker for every check");
+    }
+
     // note that we call the function directly first, before assigning a timer
     // to it. Otherwise, it would only get executed when the timer went off, and
     // not at startup.
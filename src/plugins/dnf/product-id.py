@@ -26,8 +26,11 @@ import dnf.base
 import dnf.sack
 import dnf.exceptions
 import errno
+import hashlib
 import librepo
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from rhsm import ourjson as json, logutil
 
 log = logging.getLogger("rhsm-app." + __name__)
@@ -83,12 +86,26 @@ class DnfProductManager(ProductManager):
     # value is content of productid certificate of corresponding repository
     PRODUCTID_CACHE_FILE = "/var/lib/rhsm/cache/productid_repo_mapping.json"
 
+    # Maximal number of repositories, whose productid metadata are fetched at once
+    MAX_WORKERS = 4
+
+    # Parsed product certificates shared by all instances. Key is sha256 of
+    # PEM and value is certificate, so unchanged productid metadata and
+    # repositories providing the same productid are parsed only once
+    _parsed_certs = {}
+    _parsed_certs_lock = threading.Lock()
+
     def __init__(self, base):
         self.base = base
         ProductManager.__init__(self)
 
     def update_all(self, enabled_repos):
-        return self.update(self.get_certs_for_enabled_repos(enabled_repos), self.get_active(), True)
+        return self.update(
+            self.get_certs_for_enabled_repos(enabled_repos),
+            self.get_active(),
+            True,
+            self.get_changed_repos(),
+        )
 
     def _download_productid(self, repo, tmpdir):
         if hasattr(repo, "get_metadata_content"):
@@ -111,59 +128,86 @@ class DnfProductManager(ProductManager):
             filename = res.yum_repo.get(self.PRODUCTID, None)
         return filename
 
+    def _cert_from_pem(self, pem):
+        """
+        Return certificate created from PEM; the certificate is parsed only,
+        when PEM with the same content has not been parsed before
+        """
+        digest = hashlib.sha256(pem.encode("utf-8")).hexdigest()
+        with self._parsed_certs_lock:
+            cert = self._parsed_certs.get(digest)
+        if cert is None:
+            cert = create_from_pem(pem)
+            cert.pem = pem
+            with self._parsed_certs_lock:
+                self._parsed_certs[digest] = cert
+        return cert
+
+    def _get_repo_cert(self, repo, cache):
+        """
+        Get productid cert of one repository. This method is called from worker
+        threads. It returns tuple (cert, pem, error), where pem is not None only,
+        when new productid was downloaded and error is True, when productid
+        metadata could not be loaded.
+        """
+        try:
+            with dnf.util.tmpdir() as tmpdir:
+                filename = self._download_productid(repo, tmpdir)
+                if filename:
+                    pem = self._read_pem(filename)
+                    cert = self._cert_from_pem(pem)
+                    return cert, pem, False
+            if cache.get(repo.id) is not None:
+                return self._cert_from_pem(cache[repo.id]), None, False
+            # We have to look in all repos for productids, not just
+            # the ones we create, or anaconda doesn't install it.
+            return None, None, True
+        except Exception as e:
+            log.warning("Error loading productid metadata for %s." % repo)
+            log.exception(e)
+            return None, None, True
+
     def get_certs_for_enabled_repos(self, enabled_repos):
         """
-        Find enabled repos that are providing product certificates
+        Find enabled repos that are providing product certificates. The productid
+        metadata of repos are fetched concurrently, but the returned list and
+        meta_data_errors keep the order of enabled_repos.
         """
         lst = []
         cache = self.read_productid_cache()
         if cache is None:
             cache = {}
 
+        results = []
+        if enabled_repos:
+            max_workers = min(self.MAX_WORKERS, len(enabled_repos))
+            with ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="Thread-ProductId"
+            ) as executor:
+                results = list(executor.map(lambda repo: self._get_repo_cert(repo, cache), enabled_repos))
+
         # skip repo's that we don't have productid info for...
-        for repo in enabled_repos:
-            try:
-                with dnf.util.tmpdir() as tmpdir:
-                    filename = self._download_productid(repo, tmpdir)
-                    if filename:
-                        cert = self._get_cert(filename)
-                        if cert is None:
-                            log.debug("Repository %s does not provide cert" % repo.id)
-                            continue
-                        lst.append((cert, repo.id))
-                        cache[repo.id] = cert.pem
-                    elif repo.id in cache and cache[repo.id] is not None:
-                        cert = create_from_pem(cache[repo.id])
-                        lst.append((cert, repo.id))
-                    else:
-                        # We have to look in all repos for productids, not just
-                        # the ones we create, or anaconda doesn't install it.
-                        self.meta_data_errors.append(repo.id)
-            except Exception as e:
-                log.warning("Error loading productid metadata for %s." % repo)
-                log.exception(e)
+        updated_cache = dict(cache)
+        for repo, (cert, pem, error) in zip(enabled_repos, results):
+            if error:
                 self.meta_data_errors.append(repo.id)
+                continue
+            if cert is None:
+                log.debug("Repository %s does not provide cert" % repo.id)
+                continue
+            lst.append((cert, repo.id))
+            if pem is not None:
+                updated_cache[repo.id] = pem
 
         if self.meta_data_errors:
             log.debug("Unable to load productid metadata for repos: %s", self.meta_data_errors)
 
-        if len(cache) > 0:
-            self.write_productid_cache(cache)
+        # Write all changes at once and only when something was changed
+        if updated_cache != cache:
+            self.write_productid_cache(updated_cache)
 
         return lst
 
-    @staticmethod
-    def _get_available():
-        """Try to get list of available packages"""
-        # FIXME: It is not safe to use two base objects in transaction hook.
-        # Try to remove it, when dnf support getting list of available
-        # packages during "dnf remove".
-        with dnf.base.Base() as base:
-            base.read_all_repos()
-            base.fill_sack(load_system_repo=True, load_available_repos=True)
-            available = base.sack.query().available()
-        return available
-
     @staticmethod
     def __write_cache_file(data, file_name):
         try:
@@ -202,10 +246,61 @@ class DnfProductManager(ProductManager):
     def read_productid_cache(self):
         return self.__read_cache_file(self.PRODUCTID_CACHE_FILE)
 
+    @staticmethod
+    def _active_repo(pkg):
+        # FIXME: this protected attribute should be replaced with something
+        #  from public DNF API in the future.
+        # The public API doesn't provide anything ATM.
+        repo_name = pkg._from_repo
+        # The repository name includes '@' at the beginning of the string
+        return repo_name[1:]
+
+    def _get_active_from_transaction(self, transaction):
+        """
+        Find repos of installed packages using the sack of the current transaction.
+        The sack was loaded before the transaction, so packages removed by the
+        transaction are skipped and packages installed by it are added.
+        """
+        removed = set(transaction.remove_set)
+        active = set()
+        for pkg in self.base.sack.query().installed():
+            if pkg not in removed:
+                active.add(self._active_repo(pkg))
+        for pkg in transaction.install_set:
+            active.add(pkg.reponame)
+        return active
+
+    def get_changed_repos(self):
+        """
+        Find repos of packages removed by the current transaction. Product
+        certs backed by other repos cannot become inactive by this transaction,
+        but they are still checked periodically (see ProductManager.update_removed).
+        None is returned, when the transaction does not provide this information
+        and all product certs have to be checked.
+        """
+        transaction = self.base.transaction
+        if not hasattr(transaction, "remove_set"):
+            return None
+        try:
+            return set(self._active_repo(pkg) for pkg in transaction.remove_set)
+        except Exception as e:
+            log.debug("Unable to get removed packages from transaction: %s" % e)
+            return None
+
     def get_active(self):
         """
         Find the list of repos that provide packages that are actually installed.
         """
+        transaction = self.base.transaction
+        if (
+            self.base.sack is not None
+            and hasattr(transaction, "install_set")
+            and hasattr(transaction, "remove_set")
+        ):
+            try:
+                return self._get_active_from_transaction(transaction)
+            except Exception as e:
+                log.debug("Unable to get installed packages from transaction: %s" % e)
 
         # Create new sack to get fresh list of installed packages
         rpmdb_sack = dnf.sack._rpmdb_sack(self.base)
@@ -213,11 +308,6 @@ class DnfProductManager(ProductManager):
 
         active = set()
         for pkg in q_installed:
-            # FIXME: this protected attribute should be replaced with something
-            #  from public DNF API in the future.
-            # The public API doesn't provide anything ATM.
-            repo_name = pkg._from_repo
-            # The repository name includes '@' at the beginning of the string
-            active.add(repo_name[1:])
+            active.add(self._active_repo(pkg))
 
         return active
@@ -57,6 +57,11 @@ SERVER_DEFAULTS = {
     "proxy_port": "",
     "proxy_password": "",
     "no_proxy": "",
+    "max_retries": "2",
+    "retry_backoff_base": "1",
+    "retry_backoff_max": "30",
+    "circuit_breaker_threshold": "5",
+    "circuit_breaker_timeout": "60",
 }
 RHSM_DEFAULTS = {
     "baseurl": "https://" + DEFAULT_CDN_HOSTNAME,
@@ -74,7 +79,12 @@ RHSM_DEFAULTS = {
     "auto_enable_yum_plugins": "1",
     "package_profile_on_trans": "0",
     "inotify": "1",
+    "watcher_quiet_period": "500",
     "progress_messages": "1",
+    "cache_backend": "json",
+    "status_cache_max_age": "14400",
+    "network_interfaces_exclude": "",
+    "compliance_cache_max_age": "300",
 }
 
 RHSMCERTD_DEFAULTS = {
@@ -84,6 +94,8 @@ RHSMCERTD_DEFAULTS = {
     "disable": "0",
     "auto_registration": "0",
     "auto_registration_interval": "60",
+    "persistent_worker": "0",
+    "worker_memory_limit": "256",
 }
 
 LOGGING_DEFAULTS = {
@@ -16,13 +16,17 @@
 
 import base64
 from rhsm import certificate
+import contextlib
+import copy
 import datetime
 import dateutil.parser
 import locale
 import logging
 import os
+import random
 import socket
 import sys
+import threading
 import time
 import traceback
 from typing import Optional
@@ -30,7 +34,7 @@ from pathlib import Path
 import re
 import enum
 
-from email.utils import format_datetime
+from email.utils import format_datetime, parsedate_to_datetime
 
 from rhsm.https import httplib, ssl
 
@@ -314,8 +318,6 @@ class BaseConnection(object):
         else:
             auth_description = "auth=none"
 
-        self.resources = None
-        self.capabilities = None
         connection_description = ""
         if proxy_description:
             connection_description += proxy_description
@@ -419,10 +421,11 @@ class RemoteServerException(ConnectionException):
     one of these http status codes: [404, 410, 500, 502, 503, 504]
     """
 
-    def __init__(self, code, request_type=None, handler=None):
+    def __init__(self, code, request_type=None, handler=None, headers=None):
         self.code = code
         self.request_type = request_type
         self.handler = handler
+        self.headers = headers or {}
 
     def __str__(self):
         if self.request_type and self.handler:
@@ -461,6 +464,26 @@ class RateLimitExceededException(RestlibException):
             self.msg += ", retry access after: %s seconds." % self.retry_after
 
 
+class CircuitOpenException(ConnectionException):
+    """
+    Thrown, when a request was not sent to the server, because previous
+    requests failed due to overloaded or unreachable server. The retry_after
+    attribute is a number of seconds, when no request will be sent.
+    """
+
+    def __init__(self, host, port, retry_after):
+        self.host = host
+        self.port = port
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return "Server %s:%s is not available, requests suspended for %d seconds" % (
+            normalized_host(self.host),
+            self.port,
+            self.retry_after,
+        )
+
+
 class UnauthorizedException(AuthenticationException):
     """
     Thrown in response to http status code 401 with no valid json content
@@ -495,10 +518,28 @@ class ContentConnection(BaseConnection):
         if "client_version" in kwargs:
             user_agent += kwargs["client_version"]
         cert_dir = cert_dir or "/etc/pki/entitlement"
+        self._connection_kwargs = dict(kwargs, cert_dir=cert_dir)
         super(ContentConnection, self).__init__(
             handler="/", cert_dir=cert_dir, user_agent=user_agent, **kwargs
         )
 
+    def copy(self):
+        """
+        Create new connection with the same settings. One connection cannot be
+        used by more threads at the same time, so every thread needs its own copy.
+        """
+        return ContentConnection(**self._connection_kwargs)
+
+    def close(self):
+        self.conn.close_connection()
+
+    @property
+    def last_cert_key_pair(self):
+        """
+        Cert-key pair used by the last successful request
+        """
+        return self.conn.last_cert_key_pair
+
     def get_versions(self, path, cert_key_pairs=None):
         """
         Get list of available release versions from the given path
@@ -534,6 +575,388 @@ def _get_locale():
     return None
 
 
+def parse_retry_after(headers) -> Optional[float]:
+    """
+    Parse value of 'Retry-After' HTTP header (RFC 7231). The value can be
+    number of seconds or HTTP-date.
+    :param headers: dictionary with HTTP headers of response
+    :return: number of seconds to wait or None, when header is missing or invalid
+    """
+    if not headers:
+        return None
+    value = None
+    for key, header_value in headers.items():
+        if key.lower() == "retry-after":
+            value = str(header_value).strip()
+            break
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        log.debug("Unable to parse value of Retry-After HTTP header: %s" % value)
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (retry_date - now).total_seconds())
+
+
+class RetryPolicy(object):
+    """
+    Policy deciding, when failed request should be retried and how long to
+    wait before next attempt. Requests rejected due to rate limiting (429)
+    are always retried, because they were not processed by server. Idempotent
+    requests are retried, when the server is temporarily unavailable (503).
+    Connection errors and gateway errors (502, 504) are retried only, when
+    retry_connection_errors is enabled, because an unreachable server would
+    delay failures of interactive commands. Delays use "decorrelated jitter"
+    backoff to spread retries of many clients over time, and Retry-After HTTP
+    header is honored.
+    """
+
+    IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+    RATE_LIMIT_STATUSES = (429,)
+
+    UNAVAILABLE_STATUSES = (503,)
+
+    OVERLOAD_STATUSES = (429, 502, 503, 504)
+
+    # Daemons (rhsmcertd-worker), which do not block any user, enable it
+    retry_connection_errors = False
+
+    def __init__(self, max_retries=2, base_delay=1, max_delay=30, retry_connection_errors=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        if retry_connection_errors is not None:
+            self.retry_connection_errors = retry_connection_errors
+
+    @classmethod
+    def from_config(cls, conf):
+        """
+        Create retry policy from [server] section of configuration file
+        """
+        return cls(
+            max_retries=safe_int(conf.get("server", "max_retries"), 2),
+            base_delay=safe_int(conf.get("server", "retry_backoff_base"), 1),
+            max_delay=safe_int(conf.get("server", "retry_backoff_max"), 30),
+        )
+
+    @staticmethod
+    def _status(exc) -> Optional[int]:
+        return safe_int(getattr(exc, "code", None))
+
+    def is_overload(self, exc) -> bool:
+        """
+        Is the exception caused by overloaded or unreachable server?
+        """
+        if isinstance(exc, (ConnectionError, socket.timeout)):
+            return True
+        return self._status(exc) in self.OVERLOAD_STATUSES
+
+    def is_retryable(self, request_type, exc) -> bool:
+        status = self._status(exc)
+        if status in self.RATE_LIMIT_STATUSES:
+            return True
+        if request_type not in self.IDEMPOTENT_METHODS:
+            return False
+        if status in self.UNAVAILABLE_STATUSES:
+            return True
+        return self.retry_connection_errors and self.is_overload(exc)
+
+    def retry_after(self, exc) -> Optional[float]:
+        """
+        Return number of seconds requested by server in Retry-After HTTP header
+        """
+        if self._status(exc) not in (429, 503):
+            return None
+        return parse_retry_after(getattr(exc, "headers", None))
+
+    def next_delay(self, request_type, exc, attempt, previous_delay=None, response_time=None):
+        """
+        Compute delay before next attempt of failed request
+        :param request_type: string representing request type (GET, POST, ...)
+        :param exc: exception raised by previous attempt
+        :param attempt: number of previous retries
+        :param previous_delay: previous delay in seconds, when request was already retried
+        :param response_time: smoothed response time of the server
+        :return: delay in seconds or None, when request should not be retried
+        """
+        if attempt >= self.max_retries or not self.is_retryable(request_type, exc):
+            return None
+        base_delay = max(self.base_delay, response_time or 0)
+        retry_after = self.retry_after(exc)
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                log.debug("Server requested retry after %s seconds, giving up" % retry_after)
+                return None
+            return retry_after + random.uniform(0, base_delay)
+        previous_delay = previous_delay or base_delay
+        return min(self.max_delay, random.uniform(base_delay, previous_delay * 3))
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker of one server. When number of consecutive failures reaches
+    threshold, then no requests are sent to the server for timeout seconds.
+    Then one request is allowed to check, if server recovered. Other requests
+    are rejected until it finishes or another timeout expires.
+    """
+
+    def __init__(self, threshold=5, timeout=60):
+        self.threshold = threshold
+        self.timeout = timeout
+        self.failures = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    def _is_open(self) -> bool:
+        return self.threshold > 0 and self.failures >= self.threshold
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if not self._is_open():
+                return True
+            now = time.time()
+            if now < self.open_until:
+                return False
+            # Let one request go through and keep rejecting others
+            self.open_until = now + self.timeout
+            return True
+
+    def remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self.open_until - time.time())
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._is_open():
+                log.info("Server responded, closing circuit breaker")
+            self.failures = 0
+            self.open_until = 0.0
+
+    def record_failure(self, retry_after=None) -> None:
+        with self._lock:
+            self.failures += 1
+            if not self._is_open():
+                return
+            # Add jitter to not send requests from many clients at the same time
+            timeout = max(self.timeout, retry_after or 0)
+            self.open_until = time.time() + random.uniform(timeout, timeout * 1.5)
+            log.warning(
+                "Server failed %d times, suspending requests for %d seconds"
+                % (self.failures, self.open_until - time.time())
+            )
+
+
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(host, port, threshold=5, timeout=60) -> CircuitBreaker:
+    """
+    Return circuit breaker shared by all connections to given server
+    """
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get((host, port))
+        if breaker is None:
+            breaker = _circuit_breakers[(host, port)] = CircuitBreaker(threshold, timeout)
+        else:
+            breaker.threshold = threshold
+            breaker.timeout = timeout
+        return breaker
+
+
+# Supported resources and capabilities of servers shared by all processes
+SERVER_FEATURES_CACHE_FILE = "/var/lib/rhsm/cache/server_features.json"
+
+
+class ServerFeatures(object):
+    """
+    Supported resources and manager capabilities of one server. Both are
+    loaded using extra requests, thus they are shared by all connections
+    to the server and stored in a cache file shared by all processes.
+    Values are valid for TTL seconds or until the server reports another
+    version in the response of /status.
+    """
+
+    # We will try to get new values at least once a day
+    TTL = 60 * 60 * 24
+
+    def __init__(self, url, cache_file=None, ttl=None):
+        self.url = url
+        self.cache_file = cache_file
+        self.ttl = self.TTL if ttl is None else ttl
+        self.version = None
+        self._values = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _read_cache_file(self):
+        try:
+            with open(self.cache_file) as cache_file:
+                data = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _load(self):
+        if self._loaded or self.cache_file is None:
+            return
+        self._loaded = True
+        entry = self._read_cache_file().get(self.url)
+        if not isinstance(entry, dict):
+            return
+        self.version = entry.get("version")
+        for name, value in entry.get("values", {}).items():
+            self._values[name] = tuple(value)
+        log.debug("Loaded features of server %s from %s" % (self.url, self.cache_file))
+
+    def _save(self):
+        if self.cache_file is None:
+            return
+        # Other processes could write features of other servers
+        data = self._read_cache_file()
+        data[self.url] = {
+            "version": self.version,
+            "values": {name: list(value) for name, value in self._values.items()},
+        }
+        temp_file = "%s.%d.tmp" % (self.cache_file, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(temp_file, "w") as cache_file:
+                json.dump(data, cache_file)
+            os.rename(temp_file, self.cache_file)
+        except (IOError, OSError) as err:
+            log.debug("Unable to write cache file %s: %s" % (self.cache_file, err))
+
+    def get(self, name):
+        """
+        Return value loaded less than TTL seconds ago or None
+        """
+        with self._lock:
+            self._load()
+            value, loaded = self._values.get(name, (None, None))
+            if loaded is not None and not 0 <= time.time() - loaded <= self.ttl:
+                del self._values[name]
+                return None
+            return value
+
+    def set(self, name, value):
+        with self._lock:
+            self._load()
+            if value is None:
+                self._values.pop(name, None)
+            else:
+                self._values[name] = (value, time.time())
+            self._save()
+
+    def set_version(self, version):
+        """
+        Set version of the server. When the version is changed, then all
+        values are dropped, because the new version can support other
+        resources and capabilities.
+        """
+        if not version:
+            return
+        with self._lock:
+            self._load()
+            if version == self.version:
+                return
+            if self.version is not None:
+                log.debug(
+                    "Version of server %s changed from %s to %s, dropping its supported resources and "
+                    "capabilities" % (self.url, self.version, version)
+                )
+                self._values.clear()
+            self.version = version
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._loaded = True
+            self._save()
+
+
+_server_features = {}
+_server_features_lock = threading.Lock()
+
+
+def get_server_features(host, port, handler) -> ServerFeatures:
+    """
+    Return supported resources and capabilities shared by all connections to given server
+    """
+    with _server_features_lock:
+        features = _server_features.get((host, port, handler))
+        if features is None:
+            url = "https://%s:%s%s" % (normalized_host(host or ""), port, handler)
+            features = ServerFeatures(url, cache_file=SERVER_FEATURES_CACHE_FILE)
+            _server_features[(host, port, handler)] = features
+        return features
+
+
+class DocumentMemo(object):
+    """
+    Memo of consumer and owner documents fetched during one request scope
+    (e.g. one rhsmcertd cycle or one command). A document is fetched from
+    the server at most once per scope, unless a write request to the same
+    resource invalidates it.
+    """
+
+    def __init__(self):
+        self._documents = {}
+        # Copies of connection used by other threads can invalidate documents
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _resource(path):
+        """
+        Return resource, which the path belongs to, e.g. consumers/<uuid>
+        """
+        return "/".join(path.split("?")[0].strip("/").split("/")[:2])
+
+    def get(self, path, fetch):
+        """
+        Return memoized document for the path or fetch it using fetch()
+        """
+        with self._lock:
+            document = self._documents.get(path)
+        if document is not None:
+            self.hits += 1
+            log.debug("Using memoized document %s (hits: %d, misses: %d)", path, self.hits, self.misses)
+        else:
+            self.misses += 1
+            log.debug("Fetching document %s (hits: %d, misses: %d)", path, self.hits, self.misses)
+            document = fetch()
+            with self._lock:
+                self._documents[path] = document
+        return copy.deepcopy(document)
+
+    def invalidate(self, path):
+        """
+        Drop documents of the resource modified by a write request to the path
+        """
+        resource = self._resource(path)
+        with self._lock:
+            if resource.startswith("consumers/"):
+                stale = [key for key in self._documents if self._resource(key) == resource]
+            elif resource.split("/")[0] == "owners":
+                stale = [key for key in self._documents if key.endswith("/owner")]
+            else:
+                # We do not know what the request can modify
+                stale = list(self._documents)
+            for key in stale:
+                log.debug("Dropping memoized document %s modified by %s", key, path)
+                del self._documents[key]
+
+
 class BaseRestLib(object):
     """
     A low-level wrapper around httplib
@@ -571,6 +994,7 @@ class BaseRestLib(object):
         token=None,
         user_agent=None,
         auth_type=None,
+        retry_policy=None,
     ):
         log.debug("Creating new BaseRestLib instance")
         self.host = host
@@ -586,8 +1010,12 @@ class BaseRestLib(object):
             "x-subscription-manager-version": subman_version,
         }
 
-        if correlation_id:
-            self.headers["X-Correlation-ID"] = correlation_id
+        # Correlation ID is added to the headers of every request. It can be
+        # changed, when the connection is reused for another operation
+        self.correlation_id = correlation_id
+
+        # Memo of documents used by UEPConnection.request_scope()
+        self.document_memo = None
 
         self.cert_file = cert_file
         self.key_file = key_file
@@ -602,6 +1030,15 @@ class BaseRestLib(object):
         self.proxy_user = proxy_user
         self.proxy_password = proxy_password
         self.smoothed_rt = None
+        # Cert-key pair used by the last successful request
+        self.last_cert_key_pair = None
+        self.retry_policy = retry_policy or RetryPolicy.from_config(config)
+        self.circuit_breaker = get_circuit_breaker(
+            host,
+            ssl_port,
+            threshold=safe_int(config.get("server", "circuit_breaker_threshold"), 5),
+            timeout=safe_int(config.get("server", "circuit_breaker_timeout"), 60),
+        )
         self.token = token
         self.auth_type = auth_type
         # We set this to None, because we don't know the truth unless we get
@@ -682,6 +1119,28 @@ class BaseRestLib(object):
             log.warning("Unable to load any CA certificate from: %s" % self.ca_dir)
 
     def _create_connection(self, cert_file=None, key_file=None):
+        if self.__conn is not None:
+            # Check if it is still possible to use existing connection
+            now = time.time()
+            if now - self.__conn.last_request_time > self.__conn.keep_alive_timeout:
+                log.debug(f"Connection timeout {self.__conn.keep_alive_timeout}. Closing connection...")
+                self.close_connection()
+            elif self.__conn.cert_key_pair != (cert_file, key_file):
+                log.debug("Connection uses different client certificate. Closing connection...")
+                self.close_connection()
+            elif (
+                self.__conn.max_requests_num is not None
+                and self.__conn.requests_num > self.__conn.max_requests_num
+            ):
+                log.debug(
+                    f"Maximal number of requests ({self.__conn.max_requests_num}) reached. "
+                    "Closing connection..."
+                )
+                self.close_connection()
+            else:
+                log.debug("Reusing connection: %s", self.__conn.sock)
+                return self.__conn
+
         # See https://www.openssl.org/docs/ssl/SSL_CTX_new.html
         # This ends up invoking SSLv23_method, which is the catch all
         # "be compatible" protocol, even though it explicitly is not
@@ -704,25 +1163,6 @@ class BaseRestLib(object):
         if cert_file and os.path.exists(cert_file):
             context.load_cert_chain(cert_file, keyfile=key_file)
 
-        if self.__conn is not None:
-            # Check if it is still possible to use existing connection
-            now = time.time()
-            if now - self.__conn.last_request_time > self.__conn.keep_alive_timeout:
-                log.debug(f"Connection timeout {self.__conn.keep_alive_timeout}. Closing connection...")
-                self.close_connection()
-            elif (
-                self.__conn.max_requests_num is not None
-                and self.__conn.requests_num > self.__conn.max_requests_num
-            ):
-                log.debug(
-                    f"Maximal number of requests ({self.__conn.max_requests_num}) reached. "
-                    "Closing connection..."
-                )
-                self.close_connection()
-            else:
-                log.debug("Reusing connection: %s", self.__conn.sock)
-                return self.__conn
-
         log.debug("Creating new connection")
         if self.proxy_hostname and self.proxy_port:
             log.debug(
@@ -745,6 +1185,8 @@ class BaseRestLib(object):
         # Set default keep-alive connection timeout in case server does not
         # send HTTP header Keep-Alive with information about timeout
         conn.keep_alive_timeout = self.KEEP_ALIVE_TIMEOUT
+        # Client certificate and key used by the connection
+        conn.cert_key_pair = (cert_file, key_file)
         # Number of requests
         conn.requests_num = 0
         # Maximal number of requests. None means no limits, when server does not
@@ -952,6 +1394,7 @@ class BaseRestLib(object):
                     }
                     if response.status == 200:
                         self.is_consumer_cert_key_valid = True
+                        self.last_cert_key_pair = (cert_file, key_file)
                         break  # this client cert worked, no need to try more
                     elif self.cert_dir:
                         log.debug("Unable to get valid response: %s from CDN: %s" % (result, self.host))
@@ -1002,6 +1445,9 @@ class BaseRestLib(object):
     ):
         handler = self.apihandler + method
 
+        if self.document_memo is not None and request_type not in ("GET", "HEAD"):
+            self.document_memo.invalidate(method)
+
         # We try to import it here to get fresh value, because rhsm.service can receive
         # several D-BUS API calls with different locale argument (every request have to have
         # different locale)
@@ -1030,12 +1476,50 @@ class BaseRestLib(object):
         if self.user_agent:
             self.headers["User-Agent"] = self.user_agent
 
+        if self.correlation_id:
+            self.headers["X-Correlation-ID"] = self.correlation_id
+        else:
+            self.headers.pop("X-Correlation-ID", None)
+
         final_headers = self.headers.copy()
         if body is None:
             final_headers["Content-Length"] = "0"
         if headers:
             final_headers.update(headers)
 
+        delay = None
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                raise CircuitOpenException(self.host, self.ssl_port, self.circuit_breaker.remaining())
+            try:
+                result = self._send_request(
+                    request_type, handler, final_headers, body, cert_key_pairs, description
+                )
+            except Exception as exc:
+                if self.retry_policy.is_overload(exc):
+                    self.circuit_breaker.record_failure(self.retry_policy.retry_after(exc))
+                elif getattr(exc, "code", None) is not None:
+                    # Server is able to respond
+                    self.circuit_breaker.record_success()
+                delay = self.retry_policy.next_delay(request_type, exc, attempt, delay, self.smoothed_rt)
+                if delay is None:
+                    raise
+                log.warning(
+                    'Request "%s %s" failed: %s, retrying in %.1f seconds'
+                    % (request_type, handler, exc, delay)
+                )
+                time.sleep(delay)
+                attempt += 1
+            else:
+                self.circuit_breaker.record_success()
+                return result
+
+    def _send_request(self, request_type, handler, final_headers, body, cert_key_pairs, description=None):
+        """
+        Do one attempt of HTTP request and validate the response
+        :return: dictionary (content, status and header) of response
+        """
         # Try to do request, when it wasn't possible, because server closed connection,
         # then close existing connection and try it once again
         try:
@@ -1170,7 +1654,10 @@ class BaseRestLib(object):
                 # This really needs an exception mapper too...
                 if str(response["status"]) in ["404", "410", "500", "502", "503", "504"]:
                     raise RemoteServerException(
-                        response["status"], request_type=request_type, handler=handler
+                        response["status"],
+                        request_type=request_type,
+                        handler=handler,
+                        headers=response.get("headers"),
                     )
                 elif str(response["status"]) in ["401"]:
                     raise UnauthorizedException(
@@ -1282,12 +1769,81 @@ class UEPConnection(BaseConnection):
 
         Must specify only one method of authentication.
         """
-        user_agent = "RHSM/1.0 (cmd=%s)" % utils.cmd_name(sys.argv)
-        if "client_version" in kwargs:
-            user_agent += kwargs["client_version"]
-        if "dbus_sender" in kwargs:
-            user_agent += kwargs["dbus_sender"]
+        self._connection_kwargs = kwargs
+        self._document_memo = None
+        user_agent = self._user_agent(kwargs.get("client_version"), kwargs.get("dbus_sender"))
         super(UEPConnection, self).__init__(user_agent=user_agent, **kwargs)
+        self.server_features = get_server_features(self.host, self.ssl_port, self.handler)
+
+    def copy(self):
+        """
+        Create new connection with the same settings. One connection cannot be
+        used by more threads at the same time, so every thread needs its own copy.
+        """
+        uep = UEPConnection(**self._connection_kwargs)
+        uep.conn.correlation_id = self.conn.correlation_id
+        uep.conn.user_agent = self.conn.user_agent
+        # Write requests of the copy invalidate documents memoized by this connection
+        uep.conn.document_memo = self._document_memo
+        return uep
+
+    def close(self):
+        self.conn.close_connection()
+
+    @contextlib.contextmanager
+    def request_scope(self):
+        """
+        Consumer and owner documents fetched in the with block are fetched from
+        the server only once, unless they are modified by a write request. Nested
+        scopes share the memo of the outermost scope.
+        """
+        if self._document_memo is not None:
+            yield self._document_memo
+            return
+        memo = self._document_memo = self.conn.document_memo = DocumentMemo()
+        try:
+            yield memo
+        finally:
+            self._document_memo = self.conn.document_memo = None
+            log.debug("Memoized documents: %d hits, %d misses", memo.hits, memo.misses)
+
+    def _memoized_get(self, method, description):
+        if self._document_memo is None:
+            return self.conn.request_get(method, description=description)
+        return self._document_memo.get(method, lambda: self.conn.request_get(method, description=description))
+
+    @staticmethod
+    def _user_agent(client_version=None, dbus_sender=None):
+        user_agent = "RHSM/1.0 (cmd=%s)" % utils.cmd_name(sys.argv)
+        if client_version:
+            user_agent += client_version
+        if dbus_sender:
+            user_agent += dbus_sender
+        return user_agent
+
+    def set_request_context(self, correlation_id=None, client_version=None, dbus_sender=None):
+        """
+        Set correlation ID and user agent used by following requests. It is
+        used, when the connection is reused for another operation.
+        """
+        self.conn.correlation_id = correlation_id
+        self.conn.user_agent = self._user_agent(client_version, dbus_sender)
+
+    @property
+    def resources(self):
+        return self.server_features.get("resources")
+
+    @resources.setter
+    def resources(self, resources):
+        self.server_features.set("resources", resources)
+
+    @property
+    def capabilities(self):
+        return self.server_features.get("capabilities")
+
+    @capabilities.setter
+    def capabilities(self, capabilities):
+        self.server_features.set("capabilities", capabilities)
 
     def _load_supported_resources(self):
         """
@@ -1299,21 +1855,24 @@ class UEPConnection(BaseConnection):
         replaced later) If something goes wrong making this request, just
         leave the list of supported resources empty.
         """
-        self.resources = {}
+        resources = {}
         resources_list = self.conn.request_get("/", description=_("Fetching supported resources"))
         for r in resources_list:
-            self.resources[r["rel"]] = r["href"]
-        log.debug("Server supports the following resources: %s", self.resources)
+            resources[r["rel"]] = r["href"]
+        log.debug("Server supports the following resources: %s", resources)
+        self.resources = resources
+        return resources
 
     def get_supported_resources(self):
         """
         Get list of supported resources.
         :return: list of supported resources
         """
-        if self.resources is None:
-            self._load_supported_resources()
+        resources = self.resources
+        if resources is None:
+            resources = self._load_supported_resources()
 
-        return self.resources
+        return resources
 
     def supports_resource(self, resource_name):
         """
@@ -1321,10 +1880,7 @@ class UEPConnection(BaseConnection):
         resource. For our use cases this is generally the plural form
         of the resource.
         """
-        if self.resources is None:
-            self._load_supported_resources()
-
-        return resource_name in self.resources
+        return resource_name in self.get_supported_resources()
 
     def _load_manager_capabilities(self):
         """
@@ -1354,9 +1910,10 @@ class UEPConnection(BaseConnection):
         """
         Check if the server we're connected to has a particular capability.
         """
-        if self.capabilities is None:
-            self.capabilities = self._load_manager_capabilities()
-        return capability in self.capabilities
+        capabilities = self.capabilities
+        if capabilities is None:
+            capabilities = self.capabilities = self._load_manager_capabilities()
+        return capability in capabilities
 
     def ping(self, username=None, password=None):
         return self.conn.request_get("/status/", description=_("Checking connection status"))
@@ -1660,7 +2217,7 @@ class UEPConnection(BaseConnection):
         Returns a consumer object with pem/key for existing consumers
         """
         method = "/consumers/%s" % self.sanitize(uuid)
-        return self.conn.request_get(method, description=_("Fetching consumer keys"))
+        return self._memoized_get(method, description=_("Fetching consumer keys"))
 
     def getConsumers(self, owner=None):
         """
@@ -1709,7 +2266,7 @@ class UEPConnection(BaseConnection):
         Returns an owner object with pem/key for existing consumers
         """
         method = "/consumers/%s/owner" % self.sanitize(uuid)
-        return self.conn.request_get(method, description=_("Fetching organizations"))
+        return self._memoized_get(method, description=_("Fetching organizations"))
 
     def deleteOwner(self, key):
         """
@@ -2058,7 +2615,13 @@ class UEPConnection(BaseConnection):
 
     def getStatus(self):
         method = "/status"
-        return self.conn.request_get(method, description=_("Checking server status"))
+        status = self.conn.request_get(method, description=_("Checking server status"))
+        if isinstance(status, dict) and status.get("version"):
+            version = status["version"]
+            if status.get("release"):
+                version = "%s-%s" % (version, status["release"])
+            self.server_features.set_version(version)
+        return status
 
     def getContentOverrides(self, consumerId):
         """
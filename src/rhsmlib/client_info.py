@@ -18,6 +18,8 @@ attach, ...), dnf command, etc.
 """
 
 import logging
+import threading
+
 import dbus
 
 import rhsm.utils
@@ -30,22 +32,22 @@ log = logging.getLogger(__name__)
 @rhsm.utils.singleton
 class DBusSender:
     """
-    This class holds information about current sender of D-Bus method
+    This class holds information about current sender of D-Bus method.
+    D-Bus methods can be called in worker threads; each thread has its
+    own sender.
     """
 
     @rhsm.utils.call_once
     def __init__(self):
-        self._cmd_line = None
+        self._local = threading.local()
 
     @property
     def cmd_line(self):
-        with self:
-            return self._cmd_line
+        return getattr(self._local, "cmd_line", None)
 
     @cmd_line.setter
     def cmd_line(self, cmd_line):
-        with self:
-            self._cmd_line = cmd_line
+        self._local.cmd_line = cmd_line
 
     @staticmethod
     def get_cmd_line(sender, bus=None):
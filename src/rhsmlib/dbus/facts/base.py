@@ -33,11 +33,13 @@ class BaseFacts(base_object.BaseObject):
         # Default is an empty FactsCollector
         self.facts_collector = self.facts_collector_class()
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         dbus_interface=constants.FACTS_DBUS_INTERFACE,
         out_signature="a{ss}",
+        exclusive=False,
     )
     @util.dbus_handle_exceptions
+    @util.dbus_coalesce_calls
     def GetFacts(self, sender=None):
         collection = self.facts_collector.collect()
         cleaned = dict([(str(key), str(value)) for key, value in list(collection.data.items())])
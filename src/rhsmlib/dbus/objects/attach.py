@@ -42,13 +42,14 @@ class AttachDBusObject(base_object.BaseObject):
     def __init__(self, conn=None, object_path=None, bus_name=None):
         super(AttachDBusObject, self).__init__(conn=conn, object_path=object_path, bus_name=bus_name)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.ATTACH_INTERFACE,
         in_signature="sa{sv}s",
         out_signature="s",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def AutoAttach(self, service_level, proxy_options, locale, sender=None):
         self.ensure_registered()
         service_level = dbus_utils.dbus_to_python(service_level, expected_type=str) or None
@@ -80,13 +81,14 @@ class AttachDBusObject(base_object.BaseObject):
         entcertlib.EntCertActionInvoker().update()
         return json.dumps(resp)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.ATTACH_INTERFACE,
         in_signature="asia{sv}s",
         out_signature="as",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def PoolAttach(self, pools, quantity, proxy_options, locale, sender=None):
         self.ensure_registered()
         pools = dbus_utils.dbus_to_python(pools, expected_type=list)
@@ -58,6 +58,7 @@ class ConfigDBusObject(base_object.BaseObject):
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def Set(self, property_name, new_value, locale, sender=None):
         """
         Method used for setting only one value. When more than one value is going to be set, then it is
@@ -108,6 +109,7 @@ class ConfigDBusObject(base_object.BaseObject):
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def SetAll(self, configuration, locale, sender=None):
         """
         Method for setting multiple configuration options. Of course all of them could be set.
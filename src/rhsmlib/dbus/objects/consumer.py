@@ -71,7 +71,7 @@ class ConsumerDBusObject(base_object.BaseObject):
 
         return str(uuid)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.CONSUMER_INTERFACE,
         in_signature="s",
         out_signature="s",
@@ -39,13 +39,14 @@ class EntitlementDBusObject(base_object.BaseObject):
     def __init__(self, conn=None, object_path=None, bus_name=None):
         super(EntitlementDBusObject, self).__init__(conn=conn, object_path=object_path, bus_name=bus_name)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.ENTITLEMENT_INTERFACE,
         in_signature="ss",
         out_signature="s",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_coalesce_calls
     def GetStatus(self, on_date, locale, sender=None):
         """
         Get status of entitlements
@@ -86,13 +87,14 @@ class EntitlementDBusObject(base_object.BaseObject):
         log.debug("D-Bus signal %s emitted" % constants.ENTITLEMENT_INTERFACE)
         return None
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.ENTITLEMENT_INTERFACE,
         in_signature="a{sv}a{sv}s",
         out_signature="s",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_coalesce_calls
     def GetPools(self, options, proxy_options, locale, sender=None):
         """
         Try to get pools installed/available/consumed at this system
@@ -138,13 +140,14 @@ class EntitlementDBusObject(base_object.BaseObject):
             raise dbus.DBusException(err)
         return on_date
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.ENTITLEMENT_INTERFACE,
         in_signature="a{sv}s",
         out_signature="s",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def RemoveAllEntitlements(self, proxy_options, locale, sender=None):
         """
         Try to remove all entitlements (subscriptions) from the system
@@ -162,13 +165,14 @@ class EntitlementDBusObject(base_object.BaseObject):
         result = entitlement_service.remove_all_entitlements()
         return json.dumps(result)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.ENTITLEMENT_INTERFACE,
         in_signature="asa{sv}s",
         out_signature="s",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def RemoveEntitlementsByPoolIds(self, pool_ids, proxy_options, locale, sender=None):
         """
         Try to remove entitlements (subscriptions) by pool_ids
@@ -192,13 +196,14 @@ class EntitlementDBusObject(base_object.BaseObject):
 
         return json.dumps(removed_serials)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.ENTITLEMENT_INTERFACE,
         in_signature="asa{sv}s",
         out_signature="s",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def RemoveEntitlementsBySerials(self, serials, proxy_options, locale, sender=None):
         """
         Try to remove entitlements (subscriptions) by serials
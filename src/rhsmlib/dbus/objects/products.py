@@ -50,13 +50,14 @@ class ProductsDBusObject(base_object.BaseObject):
         log.debug("D-Bus signal %s emitted" % constants.PRODUCTS_INTERFACE)
         return None
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.PRODUCTS_INTERFACE,
         in_signature="sa{sv}s",
         out_signature="s",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_coalesce_calls
     def ListInstalledProducts(self, filter_string, proxy_options, locale, sender=None):
 
         # We reinitialize dependency injection here for following reason. When new product
@@ -131,10 +131,11 @@ class DomainSocketRegisterDBusObject(base_object.BaseObject):
         self.sender = sender
         self.cmd_line = cmd_line
 
-    @dbus.service.method(
+    @util.dbus_service_async_method(
         dbus_interface=constants.PRIVATE_REGISTER_INTERFACE,
         in_signature="ssa{sv}s",
         out_signature="s",
+        sender_keyword=None,
     )
     @util.dbus_handle_exceptions
     def GetOrgs(self, username, password, connection_options, locale):
@@ -255,12 +256,14 @@ class DomainSocketRegisterDBusObject(base_object.BaseObject):
             enable_content = False
         return enable_content
 
-    @dbus.service.method(
+    @util.dbus_service_async_method(
         dbus_interface=constants.PRIVATE_REGISTER_INTERFACE,
         in_signature="sssa{sv}a{sv}s",
         out_signature="s",
+        sender_keyword=None,
     )
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def Register(self, org, username, password, options, connection_options, locale):
         """
         This method registers the system using basic auth
@@ -317,12 +320,14 @@ class DomainSocketRegisterDBusObject(base_object.BaseObject):
 
         return json.dumps(consumer)
 
-    @dbus.service.method(
+    @util.dbus_service_async_method(
         dbus_interface=constants.PRIVATE_REGISTER_INTERFACE,
         in_signature="sasa{sv}a{sv}s",
         out_signature="s",
+        sender_keyword=None,
     )
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def RegisterWithActivationKeys(self, org, activation_keys, options, connection_options, locale):
         """
         Note this method is registration ONLY.  Auto-attach is a separate process.
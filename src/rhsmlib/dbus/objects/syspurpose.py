@@ -95,6 +95,7 @@ class SyspurposeDBusObject(base_object.BaseObject):
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_coalesce_calls
     def GetSyspurpose(self, locale, sender=None):
         """
         D-Bus method for getting current system purpose
@@ -116,12 +117,13 @@ class SyspurposeDBusObject(base_object.BaseObject):
 
         return json.dumps(contents)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.SYSPURPOSE_INTERFACE,
         in_signature="s",
         out_signature="s",
     )
     @util.dbus_handle_exceptions
+    @util.dbus_coalesce_calls
     def GetSyspurposeStatus(self, locale, sender=None):
         """
         D-Bus method for getting system purpose status
@@ -136,12 +138,13 @@ class SyspurposeDBusObject(base_object.BaseObject):
         syspurpose_status = system_purpose.get_syspurpose_status()["status"]
         return system_purpose.get_overall_status(syspurpose_status)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.SYSPURPOSE_INTERFACE,
         in_signature="s",
         out_signature="s",
     )
     @util.dbus_handle_exceptions
+    @util.dbus_coalesce_calls
     def GetValidFields(self, locale, sender=None):
         """
         Method for getting valid syspurpose attributes and values
@@ -167,13 +170,14 @@ class SyspurposeDBusObject(base_object.BaseObject):
         else:
             return json.dumps(valid_fields)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.SYSPURPOSE_INTERFACE,
         in_signature="a{sv}s",
         out_signature="s",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def SetSyspurpose(self, syspurpose_values, locale, sender):
         """
         Set syspurpose values
@@ -44,13 +44,14 @@ class UnregisterDBusObject(base_object.BaseObject):
     def __init__(self, conn=None, object_path=None, bus_name=None):
         super(UnregisterDBusObject, self).__init__(conn=conn, object_path=object_path, bus_name=bus_name)
 
-    @util.dbus_service_method(
+    @util.dbus_service_async_method(
         constants.UNREGISTER_INTERFACE,
         in_signature="a{sv}s",
         out_signature="",
     )
     @util.dbus_handle_sender
     @util.dbus_handle_exceptions
+    @util.dbus_invalidate_coalesced_calls
     def Unregister(self, proxy_options, locale, sender=None):
         """
         Definition and implementation of D-Bus method
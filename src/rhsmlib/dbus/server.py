@@ -17,7 +17,7 @@ import dbus.server
 import dbus.mainloop.glib
 import threading
 
-from rhsmlib.dbus import constants
+from rhsmlib.dbus import constants, util
 
 from gi.repository import GLib
 from functools import partial
@@ -104,11 +104,14 @@ class Server(object):
             self.objects.append(clazz_instance)
             self.object_map[str(clazz.__name__)] = clazz_instance
 
-        consumer_dir_list = []
-        entitlement_dir_list = []
-        config_dir_list = []
-        products_dir_list = []
-        syspurpose_dir_list = []
+        # Results of read-only D-Bus methods cannot be shared, when any watched
+        # file is changed. It has to be the first callback, because clients can
+        # call D-Bus methods, when they receive signal
+        consumer_dir_list = [util.invalidate_coalesced_calls]
+        entitlement_dir_list = [util.invalidate_coalesced_calls]
+        config_dir_list = [util.invalidate_coalesced_calls]
+        products_dir_list = [util.invalidate_coalesced_calls]
+        syspurpose_dir_list = [util.invalidate_coalesced_calls]
         if "EntitlementDBusObject" in self.object_map:
             entitlement_dir_list.append(self.object_map["EntitlementDBusObject"].reload)
             consumer_dir_list.append(self.object_map["EntitlementDBusObject"].reload)
@@ -163,6 +166,8 @@ class Server(object):
         finally:
             # Terminate loop of notifier
             self.filesystem_watcher.stop()
+            # Wait for D-Bus methods running in worker threads
+            util.method_executor.shutdown()
             if stopped_event:
                 stopped_event.set()
 
@@ -189,6 +194,8 @@ class Server(object):
         self.filesystem_watcher.stop()
         # Wait for notification thread to join
         self._thread.join(2)
+        # Wait for D-Bus methods running in worker threads
+        util.method_executor.shutdown()
 
         # Unregister/remove everything.  Note that if you used dbus.SessionBus or dbus.SystemBus,
         # python-dbus will keep a cache of your old BusName objects even though we are releasing the name
@@ -11,23 +11,37 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 
+import contextlib
+import functools
+import hashlib
+import inspect
 import logging
 import sys
+import threading
+import time
 import decorator
+import dbus
 import dbus.service
 import json
 import re
 
+from concurrent.futures import ThreadPoolExecutor
+from gi.repository import GLib
+
 from rhsmlib.dbus import exceptions
 from rhsmlib.client_info import DBusSender
 
 log = logging.getLogger(__name__)
 
 __all__ = [
+    "dbus_coalesce_calls",
     "dbus_handle_exceptions",
     "dbus_handle_sender",
+    "dbus_invalidate_coalesced_calls",
+    "dbus_service_async_method",
     "dbus_service_method",
     "dbus_service_signal",
+    "invalidate_coalesced_calls",
 ]
 
 
@@ -48,16 +62,18 @@ def dbus_handle_sender(func, *args, **kwargs):
     elif len(args) > 0:
         sender = args[-1]
 
-    with DBusSender() as dbus_sender:
-        if sender is not None:
-            dbus_sender.set_cmd_line(sender)
+    # Sender is stored per thread, because D-Bus methods can be called
+    # in worker threads of MethodExecutor
+    dbus_sender = DBusSender()
+    if sender is not None:
+        dbus_sender.set_cmd_line(sender)
 
-        try:
-            return func(*args, **kwargs)
-        finally:
-            if sender is not None:
-                # When sender was specified, then reset it
-                dbus_sender.reset_cmd_line()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if sender is not None:
+            # When sender was specified, then reset it
+            dbus_sender.reset_cmd_line()
 
 
 @decorator.decorator
@@ -99,6 +115,202 @@ def dbus_service_method(*args, **kwargs):
     return dbus.service.method(*args, **kwargs)
 
 
+class MethodStats(object):
+    """
+    Counters of one D-Bus method called using MethodExecutor. Queue depth is
+    the number of calls waiting for a worker thread (or for other exclusive
+    method to finish). Wait time is measured from the submission of the call
+    to its start and run time from its start to its end. Times are in seconds.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.total_run_time = 0.0
+        self.max_run_time = 0.0
+
+    def __repr__(self):
+        return (
+            "calls: %d, errors: %d, queue depth: %d (max: %d), "
+            "wait time: %.3f s (max: %.3f s), run time: %.3f s (max: %.3f s)"
+            % (
+                self.calls,
+                self.errors,
+                self.queue_depth,
+                self.max_queue_depth,
+                self.total_wait_time,
+                self.max_wait_time,
+                self.total_run_time,
+                self.max_run_time,
+            )
+        )
+
+
+class MethodExecutor(object):
+    """
+    Bounded pool of worker threads running long-running D-Bus methods, while
+    the GLib main loop keeps serving cheap methods and signals. Methods
+    communicating with the entitlement server or changing the system are
+    exclusive: only one of them can run at a time, because the code in
+    subscription_manager is not ready for concurrent changes of the system.
+    Replies are sent from the main loop.
+    """
+
+    MAX_WORKERS = 4
+
+    def __init__(self, max_workers=None, idle_add=None):
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self._idle_add = idle_add or GLib.idle_add
+        self._executor = None
+        self._lock = threading.Lock()
+        self._backend_lock = threading.Lock()
+        self.stats = {}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="Thread-DBusMethod",
+                )
+            return self._executor
+
+    def submit(self, method_name, func, reply_handler, error_handler, exclusive=True):
+        """
+        Call func in worker thread and pass its result to reply_handler or
+        its exception to error_handler in the main loop
+        :param method_name: name of D-Bus method used for counters
+        :param func: callable without arguments
+        :param reply_handler: callback called with result of func
+        :param error_handler: callback called with exception raised by func
+        :param exclusive: when True, then func does not run concurrently with other exclusive methods
+        :return: future of the call
+        """
+        submitted = time.monotonic()
+        with self._lock:
+            stats = self.stats.setdefault(method_name, MethodStats())
+            stats.calls += 1
+            stats.queue_depth += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, stats.queue_depth)
+        future = self._get_executor().submit(self._run, method_name, stats, submitted, func, exclusive)
+        future.add_done_callback(
+            lambda done: self._idle_add(self._reply, method_name, done, reply_handler, error_handler)
+        )
+        return future
+
+    def _run(self, method_name, stats, submitted, func, exclusive):
+        with self._backend_lock if exclusive else contextlib.nullcontext():
+            started = time.monotonic()
+            with self._lock:
+                stats.queue_depth -= 1
+                stats.total_wait_time += started - submitted
+                stats.max_wait_time = max(stats.max_wait_time, started - submitted)
+            failed = True
+            try:
+                result = func()
+                failed = False
+                return result
+            finally:
+                run_time = time.monotonic() - started
+                with self._lock:
+                    stats.errors += failed
+                    stats.total_run_time += run_time
+                    stats.max_run_time = max(stats.max_run_time, run_time)
+                log.debug(
+                    "D-Bus method %s waited %.3f s and ran %.3f s (%s)"
+                    % (method_name, started - submitted, run_time, stats)
+                )
+
+    @staticmethod
+    def _reply(method_name, future, reply_handler, error_handler):
+        try:
+            error = future.exception()
+            if error is None:
+                reply_handler(future.result())
+            else:
+                error_handler(error)
+        except Exception as err:
+            # The client could disconnect in the meantime
+            log.warning("Unable to send reply of D-Bus method %s: %s" % (method_name, err))
+        # Only run this callback once
+        return False
+
+    def shutdown(self, wait=True):
+        """
+        Wait for running methods to finish and stop worker threads
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+method_executor = MethodExecutor()
+
+
+def _reply_args(out_signature, result):
+    """
+    Convert return value of D-Bus method to the arguments of reply callback
+    the same way as dbus.service does it for synchronous methods
+    """
+    if out_signature is not None:
+        size = len(tuple(dbus.Signature(out_signature)))
+        if size == 0:
+            return ()
+        if size == 1:
+            return (result,)
+        return tuple(result)
+    if result is None:
+        return ()
+    if isinstance(result, tuple) and not isinstance(result, dbus.Struct):
+        return result
+    return (result,)
+
+
+def dbus_service_async_method(*args, exclusive=True, **kwargs):
+    """
+    Decorator of long-running D-Bus methods. The method is called in worker
+    thread of method_executor and the reply is sent asynchronously, when
+    the method finishes; the main loop is not blocked in the meantime.
+    Direct calls of the method from Python are synchronous.
+    :param exclusive: when False, then the method can run concurrently with
+        other methods. Use it only for methods not changing the system nor
+        communicating with the entitlement server.
+    """
+    kwargs.setdefault("sender_keyword", "sender")
+    kwargs["async_callbacks"] = ("_reply_handler", "_error_handler")
+    out_signature = kwargs.get("out_signature")
+    dbus_method = dbus.service.method(*args, **kwargs)
+
+    def wrap(func):
+        @functools.wraps(func)
+        def wrapper(self, *method_args, _reply_handler=None, _error_handler=None, **method_kwargs):
+            if _reply_handler is None:
+                return func(self, *method_args, **method_kwargs)
+            method_executor.submit(
+                func.__name__,
+                functools.partial(func, self, *method_args, **method_kwargs),
+                lambda result: _reply_handler(*_reply_args(out_signature, result)),
+                _error_handler,
+                exclusive=exclusive,
+            )
+
+        # dbus.service reads names of callback arguments from the signature
+        signature = inspect.signature(func)
+        callbacks = [
+            inspect.Parameter(name, inspect.Parameter.POSITIONAL_OR_KEYWORD, default=None)
+            for name in kwargs["async_callbacks"]
+        ]
+        wrapper.__signature__ = signature.replace(parameters=list(signature.parameters.values()) + callbacks)
+        return dbus_method(wrapper)
+
+    return wrap
+
+
 def dbus_service_signal(*args, **kwargs):
     """
     Decorator used for signal
@@ -107,3 +319,111 @@ def dbus_service_signal(*args, **kwargs):
     :return:
     """
     return dbus.service.signal(*args, **kwargs)
+
+
+# Generation of data provided by D-Bus methods. It is increased, when some
+# D-Bus method or other process changes system, and results of read-only
+# D-Bus methods computed before cannot be shared anymore.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def invalidate_coalesced_calls():
+    """
+    Do not share results of read-only D-Bus methods computed until now
+    """
+    global _generation
+    with _generation_lock:
+        _generation += 1
+
+
+class _Call(object):
+    def __init__(self, generation):
+        self.generation = generation
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.event = threading.Event()
+
+
+class CallCoalescer(object):
+    """
+    Share results of read-only D-Bus method between identical calls. When
+    the same call is already in progress, then the caller waits for its
+    result instead of computing it once again (single-flight). The result
+    is shared also with identical calls made within TTL seconds after it
+    was computed. Exceptions are not shared with later calls.
+    """
+
+    TTL = 2.0
+
+    def __init__(self, ttl=None):
+        self.ttl = self.TTL if ttl is None else ttl
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _is_valid(self, call, now):
+        if call.generation != _generation:
+            return False
+        return call.finished is None or now - call.finished <= self.ttl
+
+    def call(self, key, func, *args, **kwargs):
+        with self._lock:
+            now = time.monotonic()
+            for old_key, old_call in list(self._calls.items()):
+                if not self._is_valid(old_call, now):
+                    del self._calls[old_key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(_generation)
+
+        if not leader:
+            log.debug("Sharing result of D-Bus call: %s" % (key,))
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as err:
+            call.error = err
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            raise
+        finally:
+            call.finished = time.monotonic()
+            call.event.set()
+        return call.result
+
+
+@decorator.decorator
+def dbus_coalesce_calls(func, *args, **kwargs):
+    """
+    Decorator of read-only D-Bus methods. Identical concurrent calls and calls
+    made shortly after each other share one result. Calls are identical, when
+    all arguments (including locale) except sender are equal.
+    """
+    arguments = inspect.signature(func).bind(*args, **kwargs).arguments
+    obj = arguments.pop("self")
+    arguments.pop("sender", None)
+    # Arguments can contain secrets (e.g. proxy password in proxy_options),
+    # thus only their digest is kept in the key
+    digest = hashlib.sha256(json.dumps(arguments, sort_keys=True, default=repr).encode("utf-8"))
+    key = (func.__name__, digest.hexdigest())
+    coalescer = obj.__dict__.setdefault("_call_coalescer", CallCoalescer())
+    return coalescer.call(key, func, *args, **kwargs)
+
+
+@decorator.decorator
+def dbus_invalidate_coalesced_calls(func, *args, **kwargs):
+    """
+    Decorator of D-Bus methods changing the system. Results of read-only
+    D-Bus methods computed before the method finished are not shared.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        invalidate_coalesced_calls()
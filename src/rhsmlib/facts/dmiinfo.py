@@ -15,8 +15,11 @@
 
 """
 import contextlib
+import json
 import logging
+import os
 
+from cloud_what.smbios import read_smbios_table
 from rhsmlib.facts import collector
 from rhsmlib.facts.dmidecodeparser import DmidecodeParser
 
@@ -24,6 +27,9 @@ log = logging.getLogger(__name__)
 
 
 class DmidecodeFactCollector(collector.FactsCollector):
+    # Facts of the last parsed SMBIOS table; /run is cleared during boot
+    DMI_FACTS_CACHE = "/run/rhsm/dmi_facts.json"
+
     def __init__(self, prefix=None, testing=None, collected_hw_info=None):
         super(DmidecodeFactCollector, self).__init__(
             prefix=prefix, testing=testing, collected_hw_info=collected_hw_info
@@ -34,10 +40,58 @@ class DmidecodeFactCollector(collector.FactsCollector):
     def set_dmidecode_output(self, filename):
         self._dmidecode_output = filename
 
+    def _read_facts_cache(self, digest):
+        """
+        Return facts cached for SMBIOS table with given checksum or None
+        """
+        try:
+            with open(self.DMI_FACTS_CACHE, "r") as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError) as err:
+            log.debug("Unable to read %s: %s", self.DMI_FACTS_CACHE, err)
+            return None
+        if not isinstance(cache, dict) or cache.get("digest") != digest:
+            return None
+        return cache.get("facts")
+
+    def _write_facts_cache(self, digest, dmiinfo):
+        # Facts contain serial numbers readable only by root like the SMBIOS table
+        try:
+            fd = os.open(self.DMI_FACTS_CACHE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump({"digest": digest, "facts": dmiinfo}, cache_file)
+        except OSError as err:
+            log.debug("Unable to write %s: %s", self.DMI_FACTS_CACHE, err)
+
     def get_all(self):
         """
         Collect facts from the dmidecode output, if available.
 
+        The dmidecode is not run, when the SMBIOS table exported by the kernel
+        has not changed since the last run in this boot.
+        """
+        if self._dmidecode_output is not None:
+            return self._get_dmidecode_facts()
+
+        smbios_table = read_smbios_table()
+        if smbios_table is None:
+            return self._get_dmidecode_facts()
+
+        digest = smbios_table.digest
+        dmiinfo = self._read_facts_cache(digest)
+        if dmiinfo is not None:
+            log.debug("Using DMI facts cached for unchanged SMBIOS table")
+            return dmiinfo
+
+        dmiinfo = self._get_dmidecode_facts()
+        if dmiinfo:
+            self._write_facts_cache(digest, dmiinfo)
+        return dmiinfo
+
+    def _get_dmidecode_facts(self):
+        """
+        Parse the dmidecode output and return facts.
+
         There are different quirks done to make the facts returned closer
         to the way python-dmidecode used to return them.
         """
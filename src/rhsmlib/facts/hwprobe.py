@@ -15,6 +15,7 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import fnmatch
 import json
 import logging
 import os
@@ -23,9 +24,12 @@ import re
 import socket
 import subprocess
 import sys
+import threading
+import time
 
 from collections import defaultdict
 from datetime import datetime, timedelta
+from rhsm.config import get_config_parser
 from rhsmlib.facts import cpuinfo
 from rhsmlib.facts import collector
 
@@ -81,6 +85,16 @@ def gather_entries(entries_string):
     return entries
 
 
+# count the values represented by a cpu siblings list without enumerating
+# them, the list of a socket can have thousands of cpus on large hosts
+def count_entries(entries_string):
+    count = 0
+    for entry_part in entries_string.split(","):
+        range_list = entry_part.split("-")
+        count += int(range_list[-1]) - int(range_list[0]) + 1
+    return count
+
+
 class GenericPlatformSpecificInfoProvider(object):
     """Default provider for platform without a specific platform info provider.
     ie, all platforms except those with DMI (ie, intel platforms)"""
@@ -95,6 +109,10 @@ class GenericPlatformSpecificInfoProvider(object):
 
 class HardwareCollector(collector.FactsCollector):
     LSCPU_CMD = "/usr/bin/lscpu"
+    # Maximal time of all DNS lookups of network facts in seconds
+    DNS_LOOKUP_TIMEOUT = 5.0
+    # Last good results of DNS lookups; /run is cleared during boot
+    NETWORK_INFO_CACHE = "/run/rhsm/network_info.json"
 
     def __init__(self, arch=None, prefix=None, testing=None, collected_hw_info=None):
         super(HardwareCollector, self).__init__(
@@ -257,8 +275,7 @@ class HardwareCollector(collector.FactsCollector):
         # test data
 
         if len(entries):
-            cpumask_entries = gather_entries(entries)
-            return len(cpumask_entries)
+            return count_entries(entries)
         # that field was empty
         return None
 
@@ -588,21 +605,12 @@ class HardwareCollector(collector.FactsCollector):
         # # LANGUAGE trumps LC_ALL, LC_CTYPE, LANG. See rhbz#1225435, rhbz#1450210
         lscpu_env.update({"LANGUAGE": "en_US.UTF-8"})
 
-        if self._check_lscpu_json(lscpu_env):
-            return self._parse_lscpu_json_output(lscpu_env)
-
-        return self._parse_lscpu_human_readable_output(lscpu_env)
-
-    def _check_lscpu_json(self, lscpu_env):
-        lscpu_cmd = [self.LSCPU_CMD, "--help"]
-
-        try:
-            output = subprocess.check_output(lscpu_cmd, env=lscpu_env)
-        except subprocess.CalledProcessError as e:
-            log.warning("Failed to run 'lscpu --help': %s", e)
-            return False
-
-        return b"--json" in output
+        # Try JSON output first and parse human-readable output only when
+        # lscpu does not support --json, thus lscpu is run only once usually
+        lscpu_info = self._parse_lscpu_json_output(lscpu_env)
+        if lscpu_info is None:
+            lscpu_info = self._parse_lscpu_human_readable_output(lscpu_env)
+        return lscpu_info
 
     def _parse_lscpu_human_readable_output(self, lscpu_env):
         lscpu_info = {}
@@ -643,15 +651,20 @@ class HardwareCollector(collector.FactsCollector):
         return lscpu_info
 
     def _parse_lscpu_json_output(self, lscpu_env):
+        """
+        Return facts parsed from JSON output of lscpu or None, when lscpu
+        does not support JSON output
+        """
         lscpu_cmd = [self.LSCPU_CMD, "--json"]
         if self.testing:
             lscpu_cmd += ["-s", self.prefix]
 
         try:
-            output = subprocess.check_output(lscpu_cmd, env=lscpu_env)
+            # Old lscpu prints usage to stderr, when --json is not supported
+            output = subprocess.check_output(lscpu_cmd, env=lscpu_env, stderr=subprocess.DEVNULL)
         except subprocess.CalledProcessError as e:
-            log.warning("Failed to run 'lscpu --json': %s", e)
-            return {}
+            log.debug("Failed to run 'lscpu --json': %s", e)
+            return None
 
         log.debug("Parsing lscpu JSON: %s", output)
 
@@ -659,7 +672,7 @@ class HardwareCollector(collector.FactsCollector):
             output_json = json.loads(output)
         except json.JSONDecodeError as e:
             log.warning("Failed to load the lscpu JSON: %s", e)
-            return {}
+            return None
 
         try:
             main_object = output_json["lscpu"]
@@ -737,54 +750,145 @@ class HardwareCollector(collector.FactsCollector):
             addr_list = ["::1"]
         return addr_list
 
+    @staticmethod
+    def _run_with_deadline(lookups, timeout):
+        """
+        Run all lookups concurrently and wait for them at most timeout seconds.
+        Daemon threads are used, because blocking lookup in broken resolver
+        cannot be interrupted and it must not block exit of the process.
+        :param lookups: dictionary {name: callable}
+        :return: dictionary {name: result or raised exception} of finished lookups
+        """
+        results = {}
+
+        def _run(name, lookup):
+            try:
+                results[name] = lookup()
+            except Exception as err:
+                results[name] = err
+
+        threads = [
+            threading.Thread(target=_run, args=(name, lookup), name="Thread-DNS-%s" % name, daemon=True)
+            for name, lookup in lookups.items()
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        return dict(results)
+
+    def _read_network_info_cache(self, hostname):
+        """
+        Return last results of DNS lookups of given hostname. The value of
+        lookup, which finished with resolver error, is None.
+        """
+        try:
+            with open(self.NETWORK_INFO_CACHE, "r") as cache_file:
+                cached_info = json.load(cache_file)
+        except (OSError, ValueError) as err:
+            log.debug("Unable to read %s: %s", self.NETWORK_INFO_CACHE, err)
+            return {}
+        if not isinstance(cached_info, dict) or cached_info.get("network.hostname") != hostname:
+            return {}
+        return cached_info
+
+    def _write_network_info_cache(self, net_info):
+        try:
+            with open(self.NETWORK_INFO_CACHE, "w") as cache_file:
+                json.dump(net_info, cache_file)
+        except OSError as err:
+            log.debug("Unable to write %s: %s", self.NETWORK_INFO_CACHE, err)
+
     def get_network_info(self):
         """
         Try to get information about network: hostname, FQDN, IPv4, IPv6 addresses
+
+        All DNS lookups run concurrently and they have to finish in DNS_LOOKUP_TIMEOUT
+        seconds. When some lookup does not finish in time, then its last result
+        is used. When there is no such result or the lookup failed, then FQDN is
+        the hostname and addresses of network interfaces are used.
         """
         net_info = {}
         try:
             hostname = socket.gethostname()
             net_info["network.hostname"] = hostname
 
-            try:
+            lookups = {
                 # We do not use socket.getfqdn(), because we need
                 # to mimic behaviour of 'hostname -f' command and be
                 # compatible with puppet and katello
-                infolist = socket.getaddrinfo(
+                "network.fqdn": lambda: socket.getaddrinfo(
                     hostname,  # (host) hostname
                     None,  # (port) no need to specify port
                     socket.AF_UNSPEC,  # (family) IPv4/IPv6
                     socket.SOCK_DGRAM,  # (type) hostname uses SOCK_DGRAM
                     0,  # (proto) no need to specify transport protocol
                     socket.AI_CANONNAME,  # (flags) we DO NEED to get canonical name
-                )
-            except Exception:
-                net_info["network.fqdn"] = hostname
-            else:
+                ),
+                "network.ipv4_address": lambda: socket.getaddrinfo(
+                    hostname, None, socket.AF_INET, socket.SOCK_STREAM
+                ),
+                "network.ipv6_address": lambda: socket.getaddrinfo(
+                    hostname, None, socket.AF_INET6, socket.SOCK_STREAM
+                ),
+            }
+            results = self._run_with_deadline(lookups, self.DNS_LOOKUP_TIMEOUT)
+
+            resolved_info = {}
+            # Results of finished lookups, which are cached. Resolver errors
+            # (e.g. no AAAA record) are valid results too and they are cached
+            # as None.
+            finished_info = {}
+            for key, result in results.items():
+                if isinstance(result, Exception):
+                    log.debug("Error during resolving %s of hostname: %s, %s" % (key, hostname, result))
+                    if isinstance(result, socket.gaierror):
+                        finished_info[key] = None
+            if "network.fqdn" in results and not isinstance(results["network.fqdn"], Exception):
+                infolist = results["network.fqdn"]
                 # getaddrinfo has to return at least one item
                 # and canonical name can't be empty string.
                 # Note: when hostname is for some reason equal to
                 # one of CNAME in DNS record, then canonical name
                 # (FQDN) will be different from hostname
                 if len(infolist) > 0 and infolist[0][3] != "":
-                    net_info["network.fqdn"] = infolist[0][3]
+                    resolved_info["network.fqdn"] = infolist[0][3]
                 else:
-                    net_info["network.fqdn"] = hostname
+                    resolved_info["network.fqdn"] = hostname
+            for key in ("network.ipv4_address", "network.ipv6_address"):
+                if key in results and not isinstance(results[key], Exception):
+                    ip_list = set([x[4][0] for x in results[key]])
+                    resolved_info[key] = ", ".join(ip_list)
 
-            try:
-                info = socket.getaddrinfo(hostname, None, socket.AF_INET, socket.SOCK_STREAM)
-                ip_list = set([x[4][0] for x in info])
-                net_info["network.ipv4_address"] = ", ".join(ip_list)
-            except Exception as err:
-                log.debug("Error during resolving IPv4 address of hostname: %s, %s" % (hostname, err))
-                net_info["network.ipv4_address"] = ", ".join(self._get_ipv4_addr_list())
+            finished_info.update(resolved_info)
 
-            try:
-                info = socket.getaddrinfo(hostname, None, socket.AF_INET6, socket.SOCK_STREAM)
-                ip_list = set([x[4][0] for x in info])
-                net_info["network.ipv6_address"] = ", ".join(ip_list)
-            except Exception as err:
-                log.debug("Error during resolving IPv6 address of hostname: %s, %s" % (hostname, err))
+            if len(results) < len(lookups):
+                log.warning(
+                    "DNS lookups of hostname %s did not finish in %s seconds",
+                    hostname,
+                    self.DNS_LOOKUP_TIMEOUT,
+                )
+            cached_info = self._read_network_info_cache(hostname)
+            # Use (and keep in cache) last results of lookups, which
+            # did not finish in time or which failed unexpectedly
+            for key in lookups:
+                if key not in finished_info and key in cached_info:
+                    finished_info[key] = cached_info[key]
+                    if key not in results and cached_info[key] is not None:
+                        resolved_info[key] = cached_info[key]
+            if finished_info:
+                finished_info["network.hostname"] = hostname
+                # The cache is not rewritten, when nothing changed
+                if finished_info != cached_info:
+                    self._write_network_info_cache(finished_info)
+
+            net_info.update(resolved_info)
+            if "network.fqdn" not in net_info:
+                net_info["network.fqdn"] = hostname
+            if "network.ipv4_address" not in net_info:
+                net_info["network.ipv4_address"] = ", ".join(self._get_ipv4_addr_list())
+            if "network.ipv6_address" not in net_info:
                 net_info["network.ipv6_address"] = ", ".join(self._get_ipv6_addr_list())
 
         except Exception as err:
@@ -795,13 +899,46 @@ class HardwareCollector(collector.FactsCollector):
     def _should_get_mac_address(self, device):
         return not (device.startswith("sit") or device.startswith("lo"))
 
+    def _get_excluded_interface_patterns(self):
+        """
+        Return list of glob patterns of network interfaces, which are not reported in facts
+        """
+        try:
+            value = get_config_parser().get("rhsm", "network_interfaces_exclude")
+        except Exception as err:
+            log.debug("Unable to read network_interfaces_exclude: %s", err)
+            return []
+        return [pattern.strip() for pattern in (value or "").split(",") if pattern.strip()]
+
+    def _get_reported_devices(self):
+        """
+        Return list of network devices, which are not excluded from facts. Excluded
+        devices are not queried at all, thus hosts with thousands of virtual
+        interfaces do not have to collect and report them.
+        """
+        devices = ethtool.get_devices()
+        patterns = self._get_excluded_interface_patterns()
+        if not patterns:
+            return devices
+        reported = [
+            device
+            for device in devices
+            if not any(fnmatch.fnmatchcase(device, pattern) for pattern in patterns)
+        ]
+        log.debug(
+            "Excluded %d of %d network interfaces from facts", len(devices) - len(reported), len(devices)
+        )
+        return reported
+
     def get_network_interfaces(self):
         netinfdict = {}
         old_ipv4_metakeys = ["ipv4_address", "ipv4_netmask", "ipv4_broadcast"]
         ipv4_metakeys = ["address", "netmask", "broadcast"]
         ipv6_metakeys = ["address", "netmask"]
+        # Every bonding file is parsed only once for all its slaves
+        bonding_cache = {}
         try:
-            interfaces_info = ethtool.get_interfaces_info(ethtool.get_devices())
+            interfaces_info = ethtool.get_interfaces_info(self._get_reported_devices())
             for info in interfaces_info:
                 mac_address = info.mac_address
                 device = info.device
@@ -891,7 +1028,9 @@ class HardwareCollector(collector.FactsCollector):
                     bond_interface = None
 
                 if bond_interface:
-                    address: str = self._get_permanent_hardware_address(bond_interface, info.device)
+                    address: str = self._get_permanent_hardware_address(
+                        bond_interface, info.device, bonding_cache
+                    )
                     key: str = ".".join(["net.interface", info.device, "permanent_mac_address"])
                     netinfdict[key] = address
 
@@ -902,26 +1041,41 @@ class HardwareCollector(collector.FactsCollector):
 
     # from rhn-client-tools  hardware.py
     # see bz#785666
-    def _get_permanent_hardware_address(self, bond_interface: str, seeked_interface: str) -> str:
-        address: str = ""
+    def _get_permanent_hardware_address(
+        self, bond_interface: str, seeked_interface: str, bonding_cache: Optional[dict] = None
+    ) -> str:
+        """
+        Return permanent hardware address of the slave interface of the bond interface.
+        When bonding_cache dictionary is provided, then the bonding file is parsed
+        only once and addresses of all slaves are stored in the dictionary.
+        """
+        if bonding_cache is None:
+            bonding_cache = {}
+        if bond_interface not in bonding_cache:
+            bonding_cache[bond_interface] = self._read_permanent_hardware_addresses(bond_interface)
+        return bonding_cache[bond_interface].get(seeked_interface, "")
+
+    def _read_permanent_hardware_addresses(self, bond_interface: str) -> dict:
+        """
+        Parse /proc/net/bonding/<bond_interface> file
+        :return: dictionary {slave interface: permanent hardware address}
+        """
+        addresses: dict = {}
         try:
-            bond_interface_file: str = open("/proc/net/bonding/%s" % bond_interface, "r")
+            bond_interface_file = open("/proc/net/bonding/%s" % bond_interface, "r")
         except OSError:
-            return address
-
-        permanent_interface_found: bool = False
-        for line in bond_interface_file.readlines():
-            if permanent_interface_found and line.find("Permanent HW addr: ") != -1:
-                address = line.split()[3].upper()
-                break
-
-            if line.find("Slave Interface: ") != -1:
-                interface_name: str = line.split()[2]
-                if interface_name == seeked_interface:
-                    permanent_interface_found = True
-
-        bond_interface_file.close()
-        return address
+            return addresses
+
+        interface_name: Optional[str] = None
+        with bond_interface_file:
+            for line in bond_interface_file.readlines():
+                if line.find("Slave Interface: ") != -1:
+                    interface_name = line.split()[2]
+                elif interface_name is not None and line.find("Permanent HW addr: ") != -1:
+                    addresses.setdefault(interface_name, line.split()[3].upper())
+                    interface_name = None
+
+        return addresses
 
 
 if __name__ == "__main__":
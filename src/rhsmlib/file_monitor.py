@@ -12,7 +12,7 @@
 # in this software or its documentation.
 import threading
 
-from rhsm.config import get_config_parser
+from rhsm.config import get_config_parser, RHSM_DEFAULTS
 from rhsmlib.services import config
 import configparser
 import logging
@@ -34,6 +34,8 @@ except ImportError:
 log = logging.getLogger(__name__)
 conf = config.Config(get_config_parser())
 
+DEFAULT_QUIET_PERIOD = RHSM_DEFAULTS["watcher_quiet_period"]
+
 
 CONSUMER_WATCHER = "CONSUMER_WATCHER"
 ENTITLEMENT_WATCHER = "ENTITLEMENT_WATCHER"
@@ -41,6 +43,21 @@ CONFIG_WATCHER = "CONFIG_WATCHER"
 PRODUCT_WATCHER = "PRODUCT_WATCHER"
 SYSPURPOSE_WATCHER = "SYSPURPOSE_WATCHER"
 
+# inotify flags not included in pyinotify-independent DirectoryWatch
+IN_CREATE = 0x00000100
+
+
+def notify_callbacks(callbacks):
+    """
+    Call all callbacks, exceptions raised by callbacks are only logged
+    """
+    for cb in callbacks:
+        if cb is not None:
+            try:
+                cb()
+            except Exception as e:
+                log.exception(e)
+
 
 class FilesystemWatcher(object):
     """
@@ -55,12 +72,79 @@ class FilesystemWatcher(object):
     # Timeout of loop in milliseconds
     TIMEOUT = 2000
 
-    def __init__(self, dir_watches):
+    # Maximal delay of notification in milliseconds, when changes keep
+    # coming without any quiet period
+    MAX_NOTIFY_DELAY = 10000
+
+    def __init__(self, dir_watches, quiet_period=0):
         """
         :param dir_watches: dictionary of directories to watch (see DirectoryWatch class below)
+        :param quiet_period: time in milliseconds without any change of directory watch, which
+            has to pass before callbacks are called. All changes during this period are coalesced
+            into one notification. When it is 0, callbacks are called immediately.
         """
         self.dir_watches = dir_watches
         self.should_stop = False
+        self.quiet_period = quiet_period
+        # Directory watches waiting for notification: {dir_watch: (time of first change, deadline)}
+        self._pending = {}
+
+    def schedule_notify(self, dir_watch):
+        """
+        Notify dir watch about change, when quiet period passes. When there is
+        already pending notification of this dir watch, then it is postponed.
+        """
+        if not self.quiet_period:
+            dir_watch.notify()
+            return
+        now = time.monotonic()
+        first_change = self._pending.get(dir_watch, (now, None))[0]
+        deadline = min(now + self.quiet_period / 1000.0, first_change + self.MAX_NOTIFY_DELAY / 1000.0)
+        self._pending[dir_watch] = (first_change, deadline)
+
+    def notify_pending(self, now=None):
+        """
+        Notify all dir watches with pending notification, when their quiet period passed.
+        Every callback is called only once, even when it is associated with more dir watches.
+        :return: set of notified dir watches
+        """
+        if now is None:
+            now = time.monotonic()
+        due = [dir_watch for dir_watch, (_first, deadline) in self._pending.items() if deadline <= now]
+        callbacks = []
+        for dir_watch in due:
+            del self._pending[dir_watch]
+            if dir_watch.temporary_disabled is True:
+                log.debug("Directory watcher: %s temporary disabled. Dropping notification." % dir_watch.path)
+                continue
+            for cb in dir_watch.callbacks:
+                if cb not in callbacks:
+                    callbacks.append(cb)
+        if callbacks:
+            log.debug("Calling %d callbacks for %d changed directory watchers" % (len(callbacks), len(due)))
+            notify_callbacks(callbacks)
+        return set(due)
+
+    def time_to_notify(self, now=None):
+        """
+        :return: time in milliseconds till the nearest pending notification or None,
+            when no notification is pending
+        """
+        if not self._pending:
+            return None
+        if now is None:
+            now = time.monotonic()
+        deadline = min(deadline for _first, deadline in self._pending.values())
+        return max(0.0, (deadline - now) * 1000.0)
+
+    def _loop_timeout(self):
+        """
+        :return: timeout of one loop iteration in milliseconds
+        """
+        time_to_notify = self.time_to_notify()
+        if time_to_notify is None:
+            return self.TIMEOUT
+        return min(self.TIMEOUT, time_to_notify)
 
     def stop(self):
         """
@@ -75,7 +159,7 @@ class FilesystemWatcher(object):
         """
         changed_dir_watches = self.changed_dw_set()
         for dir_watch in changed_dir_watches:
-            dir_watch.notify()
+            self.schedule_notify(dir_watch)
         return changed_dir_watches  # returned a value for testing purposes (test_file_monitor.py)
 
     def get_mtime(self, dw):
@@ -117,11 +201,12 @@ class FilesystemWatcher(object):
         # Never ending loop of watcher
         while not end_loop_cb(self, user_callback=user_end_loop_cb):
             self.update()
+            self.notify_pending()
             # Try to update state of temporary disabled watchers
             for dir_watch in self.dir_watches.values():
                 if dir_watch.temporary_disabled is True:
                     dir_watch.update_temporary_disabled_watcher()
-            time.sleep(self.TIMEOUT / 1000.0)
+            time.sleep(self._loop_timeout() / 1000.0)
         self.stop()
 
 
@@ -138,15 +223,17 @@ class InotifyFilesystemWatcher(FilesystemWatcher):
     # Timeout of i-notify notifier in milliseconds
     TIMEOUT = 500
 
-    def __init__(self, dir_watches):
+    def __init__(self, dir_watches, quiet_period=0):
         """
         Filesystem watcher if pyinotify is configured and available
         loop function will override parent class loop function
         :param dir_watches: list of directories to watch (see DirectoryWatch class below)
+        :param quiet_period: see FilesystemWatcher
         """
-        super(InotifyFilesystemWatcher, self).__init__(dir_watches)
+        super(InotifyFilesystemWatcher, self).__init__(dir_watches, quiet_period=quiet_period)
         self.watch_manager = None
         self.notifier = None
+        self._watch_descriptors = {}
 
     def loop(self, callback=None):
         """
@@ -168,8 +255,9 @@ class InotifyFilesystemWatcher(FilesystemWatcher):
 
         while not inotify_callback():
             self.notifier.process_events()
+            self.notify_pending()
             # We use timeout to keep checks reasonably fast while still timing out
-            if self.notifier.check_events(self.TIMEOUT):
+            if self.notifier.check_events(self._loop_timeout()):
                 self.notifier.read_events()
 
             for dir_watch in self.dir_watches.values():
@@ -196,40 +284,60 @@ class InotifyFilesystemWatcher(FilesystemWatcher):
             # The event has to happen on file/directory we are interested in and the type of event
             # has to match the set of events we are interested in too
             if dir_watch.paths_match(event.path, event.pathname) and dir_watch.is_file_modified(event.mask):
+                if self.watch_manager is not None and dir_watch.watches_single_file():
+                    if event.mask & (IN_CREATE | dir_watch.IN_MOVED_TO):
+                        # The file was (re)created, watch the new file
+                        self._add_watch(dir_watch.path, dir_watch.IN_MODIFY)
                 # Call all callbacks associated with dir_watch
-                dir_watch.notify()
+                self.schedule_notify(dir_watch)
+
+    def _add_watch(self, path, mask, do_glob=False):
+        log.debug("Adding i-notifier watcher for: %s with mask: %s" % (path, mask))
+        wds = self.watch_manager.add_watch(path=path, mask=mask, proc_fun=self.handle_event, do_glob=do_glob)
+        for watched_path, wd in wds.items():
+            if wd >= 0:
+                self._watch_descriptors[watched_path] = wd
 
     def add_watches(self):
         """
-        Add watches to the watch manager
+        Add watches to the watch manager. Single files are watched directly for
+        modifications and their directories are watched only for creation, removal
+        and renaming of directory entries. Directories are watched for all changes.
         """
+        masks = {}
         for dir_watch in self.dir_watches.values():
-            log.debug("Adding i-notifier watcher for: %s with mask: %s" % (dir_watch.path, dir_watch.mask))
-            if dir_watch.is_file:
-                # watch for any changes in the directory, but only be notified of the specific path
-                dir_name = os.path.abspath(os.path.dirname(dir_watch.path))
-                self.watch_manager.add_watch(
-                    path=dir_name,
-                    mask=dir_watch.mask,
-                    proc_fun=self.handle_event,
-                    do_glob=dir_watch.is_glob,
+            if dir_watch.watches_single_file():
+                dir_name = os.path.dirname(dir_watch.path)
+                entry_mask = dir_watch.mask & ~dir_watch.IN_MODIFY
+                masks[(dir_name, False)] = masks.get((dir_name, False), 0) | entry_mask
+                if os.path.exists(dir_watch.path):
+                    masks[(dir_watch.path, False)] = (
+                        masks.get((dir_watch.path, False), 0) | dir_watch.IN_MODIFY
+                    )
+            elif dir_watch.is_file:
+                # watch for any changes in the directory, but only be notified of the specific paths
+                dir_name = os.path.dirname(dir_watch.path)
+                masks[(dir_name, dir_watch.is_glob)] = (
+                    masks.get((dir_name, dir_watch.is_glob), 0) | dir_watch.mask
                 )
             else:
                 # is already directory
-                self.watch_manager.add_watch(
-                    path=dir_watch.path,
-                    mask=dir_watch.mask,
-                    proc_fun=self.handle_event,
-                    do_glob=dir_watch.is_glob,
-                )
+                key = (dir_watch.path, dir_watch.is_glob)
+                masks[key] = masks.get(key, 0) | dir_watch.mask
+        # One path has to be watched only once, because new watch of the same
+        # path would replace mask of the previous one
+        for (path, do_glob), mask in masks.items():
+            self._add_watch(path, mask, do_glob=do_glob)
 
     def remove_watches(self):
         """
         Remove all watches from the watch manager
         """
-        for dir_watch in self.dir_watches.values():
-            log.debug(f"Removing i-notifier watcher for: {dir_watch.path}")
-            self.watch_manager.rm_watch(dir_watch.path, rec=True)
+        for path, wd in self._watch_descriptors.items():
+            log.debug(f"Removing i-notifier watcher for: {path}")
+            if self.watch_manager.get_path(wd) is not None:
+                self.watch_manager.rm_watch(wd, quiet=True)
+        self._watch_descriptors = {}
 
 
 class DirectoryWatch(object):
@@ -260,7 +368,7 @@ class DirectoryWatch(object):
         self.timestamp = None
         self.is_glob = is_glob
         self.callbacks = callbacks
-        self.mask = self.IN_DELETE | self.IN_MODIFY | self.IN_MOVED_TO
+        self.mask = self.IN_DELETE | self.IN_MODIFY | self.IN_MOVED_TO | IN_CREATE
         self.temporary_disabled = False
         self._time_tmp_dis = 0.0
 
@@ -268,12 +376,13 @@ class DirectoryWatch(object):
         """
         Calls all callbacks associated with dir watch
         """
-        for cb in self.callbacks:
-            if cb is not None:
-                try:
-                    cb()
-                except Exception as e:
-                    log.exception(e)
+        notify_callbacks(self.callbacks)
+
+    def watches_single_file(self):
+        """
+        :return: True, when dir watch watches one file and not a directory or a glob
+        """
+        return self.is_file and not self.is_glob
 
     def paths_match(self, event_path, event_pathname):
         """
@@ -346,13 +455,15 @@ def end_loop_cb(fsw, user_callback=None):
     return fsw.should_stop
 
 
-def create_filesystem_watcher(dir_watches):
+def create_filesystem_watcher(dir_watches, quiet_period=None):
     """
     determines if inotify is available and configured in rhsm.conf
     If yes, uses pyinotify. Else, uses polling methods.
     Uses inotify by default
     :param dir_watches: dictionary of directories to watch to create
     correct filesystem watcher object
+    :param quiet_period: quiet period of notifications in milliseconds; when
+    it is not set, then it is read from rhsm.conf
     :return: correct filesystem watcher object
 
     Example usage:
@@ -360,12 +471,14 @@ def create_filesystem_watcher(dir_watches):
         thread = threading.Thread(target=filesystem_watcher.loop)
         thread.start()
     """
+    if quiet_period is None:
+        quiet_period = get_quiet_period_config()
     available = is_inotify_available()
     configured = is_inotify_config()
     if not (available and configured):
-        return FilesystemWatcher(dir_watches)
+        return FilesystemWatcher(dir_watches, quiet_period=quiet_period)
     else:
-        return InotifyFilesystemWatcher(dir_watches)
+        return InotifyFilesystemWatcher(dir_watches, quiet_period=quiet_period)
 
 
 def is_inotify_available():
@@ -395,3 +508,18 @@ def is_inotify_config():
             return True
 
     return bool(use_inotify)
+
+
+def get_quiet_period_config():
+    """
+    Get quiet period of file monitor notifications from rhsm.conf.
+    :return: quiet period in milliseconds
+    """
+    try:
+        quiet_period = conf["rhsm"].get_int("watcher_quiet_period")
+    except (ValueError, configparser.Error) as e:
+        log.exception(e)
+        quiet_period = None
+    if quiet_period is None or quiet_period < 0:
+        quiet_period = int(DEFAULT_QUIET_PERIOD)
+    return quiet_period
@@ -14,11 +14,16 @@
 import collections
 import datetime
 import logging
+import queue
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+
 from subscription_manager import injection as inj
 from subscription_manager.i18n import ugettext as _
 from subscription_manager import managerlib, utils
+from subscription_manager.cert_sorter import ComplianceManager
 from subscription_manager.entcertlib import EntCertActionInvoker
 
 from rhsm import certificate
@@ -29,6 +34,9 @@ log = logging.getLogger(__name__)
 
 
 class EntitlementService(object):
+    # Maximal number of concurrent unbind requests
+    MAX_UNBIND_WORKERS = 4
+
     def __init__(self, cp=None):
         self.cp = cp
         self.identity = inj.require(inj.IDENTITY)
@@ -55,7 +63,12 @@ class EntitlementService(object):
             raise ValueError(_("Past dates are not allowed"))
         return on_date
 
-    def get_status(self, on_date=None, force=False):
+    def get_status(self, on_date=None, force=False, use_local_compliance=True):
+        """
+        Get entitlement status. When use_local_compliance is False, then the
+        status is always fetched from the server and it is not reused, even when
+        local evaluation of compliance did not change.
+        """
         sorter = inj.require(inj.CERT_SORTER, on_date)
         # When singleton CertSorter was created with different argument on_date, then
         # it is necessary to update corresponding attribute in object (dependency
@@ -72,8 +85,32 @@ class EntitlementService(object):
             status_cache.server_status = None
             status_cache.delete_cache()
 
-        sorter.load()
+        sorter.use_local_compliance = use_local_compliance
+        try:
+            sorter.load()
+        finally:
+            sorter.use_local_compliance = True
 
+        return self._get_sorter_status(sorter)
+
+    def get_cached_status(self, on_date=None, max_age=0):
+        """
+        Get status using only installed certificates and entitlement status cached
+        by previous status check. The cached status is used only, when it is not
+        older than max_age seconds. The server is not contacted at all.
+        """
+        status_cache = inj.require(inj.ENTITLEMENT_STATUS_CACHE)
+        status_cache.max_cache_age = max_age
+        try:
+            # ComplianceManager does not update installed products on the server
+            # like CertSorter does
+            sorter = ComplianceManager(on_date)
+            sorter.load()
+        finally:
+            status_cache.max_cache_age = None
+        return self._get_sorter_status(sorter)
+
+    def _get_sorter_status(self, sorter):
         if self.identity.is_valid():
             overall_status = sorter.get_system_status()
             overall_status_id = sorter.get_system_status_id()
@@ -510,25 +547,55 @@ class EntitlementService(object):
         elif not self.identity.is_valid() and "available" in options["pool_subsets"]:
             raise exceptions.ValidationError(_("Error: this system is not registered"))
 
-    def _unbind_ids(self, unbind_method, consumer_uuid, ids):
+    def _unbind_ids(self, unbind_method_name, consumer_uuid, ids):
         """
-        Method for unbinding entitlements
-        :param unbind_method: unbindByPoolId or unbindBySerial
+        Method for unbinding entitlements. Entitlements are unbound concurrently
+        and every thread uses its own copy of the connection. When the consumer
+        is gone (HTTP status 410), then the remaining entitlements are not
+        unbound and the exception is raised.
+        :param unbind_method_name: "unbindByPoolId" or "unbindBySerial"
         :param consumer_uuid: UUID of consumer
         :param ids: List of serials or pool_ids
         :return: Tuple of two lists containing unbinded and not-unbinded subscriptions
         """
-        success = []
-        failure = []
-        for id_ in ids:
+        if not ids:
+            return [], []
+        workers = min(len(ids), self.MAX_UNBIND_WORKERS)
+        connection_copies = [self.cp.copy() for _ in range(workers - 1)]
+        connections = queue.Queue()
+        for cp in [self.cp] + connection_copies:
+            connections.put(cp)
+        consumer_gone = threading.Event()
+
+        def unbind(id_):
+            if consumer_gone.is_set():
+                return None
+            cp = connections.get()
             try:
-                unbind_method(consumer_uuid, id_)
-                success.append(id_)
+                getattr(cp, unbind_method_name)(consumer_uuid, id_)
+                return True
             except connection.RestlibException as re:
                 if re.code == 410:
+                    consumer_gone.set()
                     raise
-                failure.append(id_)
                 log.error(re)
+                return False
+            finally:
+                connections.put(cp)
+
+        try:
+            if workers == 1:
+                results = [unbind(id_) for id_ in ids]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    # Results are in the order of ids and the first exception is raised
+                    results = list(executor.map(unbind, ids))
+        finally:
+            for cp in connection_copies:
+                cp.close()
+
+        success = [id_ for id_, result in zip(ids, results) if result]
+        failure = [id_ for id_, result in zip(ids, results) if not result]
         return success, failure
 
     def remove_all_entitlements(self):
@@ -555,9 +622,7 @@ class EntitlementService(object):
         # should not be necessary. I vote for i-notify to be used there somehow.
         self.entitlement_dir.refresh()
         pool_id_to_serials = self.entitlement_dir.list_serials_for_pool_ids(_pool_ids)
-        removed_pools, unremoved_pools = self._unbind_ids(
-            self.cp.unbindByPoolId, self.identity.uuid, _pool_ids
-        )
+        removed_pools, unremoved_pools = self._unbind_ids("unbindByPoolId", self.identity.uuid, _pool_ids)
         if removed_pools:
             for pool_id in removed_pools:
                 removed_serials.extend(pool_id_to_serials[pool_id])
@@ -573,9 +638,7 @@ class EntitlementService(object):
         """
 
         _serials = utils.unique_list_items(serials)  # Don't allow duplicates
-        removed_serials, unremoved_serials = self._unbind_ids(
-            self.cp.unbindBySerial, self.identity.uuid, _serials
-        )
+        removed_serials, unremoved_serials = self._unbind_ids("unbindBySerial", self.identity.uuid, _serials)
         self.entcertlib.update()
 
         return removed_serials, unremoved_serials
@@ -17,18 +17,24 @@ Classes here track various information last sent to the server, compare
 this with the current state, and perform an update on the server if
 necessary.
 """
+import contextlib
+import datetime
+import hashlib
+import io
 import logging
 import os
 import socket
 import threading
 import time
 from rhsm.https import ssl
+from rhsm.certificate import GMT
 
-from rhsm.config import get_config_parser
+from rhsm.config import get_config_parser, RHSMCERTD_DEFAULTS
 import rhsm.connection as connection
 from rhsm.profile import get_profile
 import subscription_manager.injection as inj
 from subscription_manager.jsonwrapper import PoolWrapper
+from subscription_manager.cache_store import get_cache_store, SQLITE_BACKEND
 from rhsm import ourjson as json
 from subscription_manager.isodate import parse_date
 from subscription_manager.utils import get_supported_resources
@@ -45,6 +51,16 @@ PACKAGES_RESOURCE = "packages"
 conf = config.Config(get_config_parser())
 
 
+def _cache_store():
+    """
+    Return the single-file cache store, when it is enabled in rhsm.conf,
+    otherwise None and the caches use one JSON file each.
+    """
+    if conf["rhsm"].get("cache_backend", "").strip().lower() == SQLITE_BACKEND:
+        return get_cache_store()
+    return None
+
+
 class CacheManager(object):
     """
     Parent class used for common logic in a number of collections
@@ -56,6 +72,57 @@ class CacheManager(object):
     # Fields the subclass must override:
     CACHE_FILE = None
 
+    # Validity of cached data in seconds, None means no timeout
+    TIMEOUT = None
+
+    # Entries of the single-file cache store read by cache_snapshot(). When
+    # it is set, then the cache is read from the snapshot instead of the store.
+    _snapshot = None
+
+    @staticmethod
+    @contextlib.contextmanager
+    def cache_snapshot(caches):
+        """
+        Read data of several related caches at once. When the single-file cache
+        store is used, then all data are read in one transaction and they are
+        consistent with each other. Other reads of these caches (e.g. by
+        read_cache_only()) use the same snapshot inside the with block, unless
+        the cache is written.
+        :param caches: list of CacheManager instances
+        :return: context manager providing dictionary {cache: data or None}
+        """
+        store = _cache_store()
+        if store is None:
+            yield {cache: cache.read_cache_only() for cache in caches}
+            return
+
+        try:
+            entries = store.snapshot([cache.CACHE_FILE for cache in caches])
+        except Exception as err:
+            log.error("Unable to read snapshot of caches from %s" % store.path)
+            log.exception(err)
+            yield {cache: None for cache in caches}
+            return
+        result = {}
+        for cache in caches:
+            cache._snapshot = entries
+            entry = entries.get(cache.CACHE_FILE)
+            result[cache] = None if entry is None else cache._load_entry(entry)
+        try:
+            yield result
+        finally:
+            for cache in caches:
+                cache._snapshot = None
+
+    def _get_entry(self, store):
+        """
+        Return entry of the single-file cache store from the snapshot, when
+        it was read, or from the store
+        """
+        if self._snapshot is not None:
+            return self._snapshot.get(self.CACHE_FILE)
+        return store.get(self.CACHE_FILE)
+
     def to_dict(self):
         """
         Returns the data for this collection as a dict to be serialized
@@ -86,13 +153,59 @@ class CacheManager(object):
     @classmethod
     def delete_cache(cls):
         """Delete the cache for this collection from disk."""
+        store = _cache_store()
+        if store is not None:
+            log.debug("Deleting cache: %s from %s" % (cls.CACHE_FILE, store.path))
+            store.delete(cls.CACHE_FILE)
+        # Remove also the JSON file, it could be left there by the other backend
         if os.path.exists(cls.CACHE_FILE):
             log.debug("Deleting cache: %s" % cls.CACHE_FILE)
             os.remove(cls.CACHE_FILE)
 
     def _cache_exists(self):
+        store = _cache_store()
+        if store is not None:
+            if self._snapshot is not None:
+                return self.CACHE_FILE in self._snapshot
+            return store.exists(self.CACHE_FILE)
         return os.path.exists(self.CACHE_FILE)
 
+    def _cache_mtime(self):
+        """
+        Return time of the last write of the cache or None, when the cache does not exist.
+        """
+        store = _cache_store()
+        if store is not None:
+            entry = self._get_entry(store)
+            return None if entry is None else entry.mtime
+        if os.path.exists(self.CACHE_FILE):
+            return os.path.getmtime(self.CACHE_FILE)
+        return None
+
+    def _cache_expired(self):
+        """
+        Return True, when the cache exists and it is older than its validity.
+        Entries of the single-file cache store remember the validity they
+        were written with, JSON files are checked against TIMEOUT.
+        """
+        store = _cache_store()
+        if store is not None:
+            entry = self._get_entry(store)
+            return entry is not None and entry.expired()
+        if self.TIMEOUT is None:
+            return False
+        mod_time = self._cache_mtime()
+        return mod_time is not None and time.time() - mod_time > self.TIMEOUT
+
+    def _load_entry(self, entry):
+        """
+        Load the data from an entry of the single-file cache store.
+        """
+        try:
+            return self._load_data(io.StringIO(entry.data))
+        except ValueError:
+            return None
+
     def exists(self):
         return self._cache_exists()
 
@@ -107,6 +220,18 @@ class CacheManager(object):
         manually write to disk.
         """
         # Logging in this method (when threaded) can cause a segfault, BZ 988861 and 988430
+        store = _cache_store()
+        if store is not None:
+            self._snapshot = None
+            try:
+                store.set(self.CACHE_FILE, json.dumps(self.to_dict(), default=json.encode), ttl=self.TIMEOUT)
+                if debug:
+                    log.debug("Wrote cache: %s to %s" % (self.CACHE_FILE, store.path))
+            except Exception as err:
+                log.error("Unable to write cache: %s to %s" % (self.CACHE_FILE, store.path))
+                log.exception(err)
+            return
+
         try:
             if not os.access(os.path.dirname(self.CACHE_FILE), os.R_OK):
                 os.makedirs(os.path.dirname(self.CACHE_FILE))
@@ -124,6 +249,17 @@ class CacheManager(object):
         Load the last data we sent to the server.
         Returns none if no cache file exists.
         """
+        store = _cache_store()
+        if store is not None:
+            try:
+                entry = self._get_entry(store)
+            except Exception as err:
+                log.error("Unable to read cache: %s from %s" % (self.CACHE_FILE, store.path))
+                log.exception(err)
+                return None
+            if entry is None:
+                return None
+            return self._load_entry(entry)
 
         try:
             f = open(self.CACHE_FILE)
@@ -201,6 +337,9 @@ class StatusCache(CacheManager):
     def __init__(self):
         self.server_status = None
         self.last_error = None
+        # When it is set, then status is loaded only from the cache, which is
+        # not older than this number of seconds, and server is not contacted
+        self.max_cache_age = None
 
     def load_status(self, uep, uuid, on_date=None):
         """
@@ -214,6 +353,8 @@ class StatusCache(CacheManager):
 
         Returns None if we cannot reach the server, or use the cache.
         """
+        if self.max_cache_age is not None:
+            return self._read_recent_cache()
         try:
             self._sync_with_server(uep, uuid, on_date)
             self.write_cache()
@@ -277,6 +418,19 @@ class StatusCache(CacheManager):
             log.debug("Reading status from in-memory cache of %s file" % self.CACHE_FILE)
         return self.server_status
 
+    def _read_recent_cache(self):
+        """
+        Return status from the cache, when the cache is not older than max_cache_age.
+        Otherwise return None.
+        """
+        mod_time = self._cache_mtime()
+        if mod_time is None or time.time() - mod_time > self.max_cache_age:
+            log.debug(
+                "Cache %s does not exist or it is older than %d s" % (self.CACHE_FILE, self.max_cache_age)
+            )
+            return None
+        return self._read_cache()
+
     def _cache_exists(self):
         """
         If a cache exists in memory, we have written it to the disk
@@ -339,6 +493,112 @@ class EntitlementStatusCache(StatusCache):
         self.server_status = uep.getCompliance(uuid, on_date)
 
 
+class LocalComplianceCache(CacheManager):
+    """
+    Manages the verdict of local compliance evaluation, which was made when
+    compliance status was fetched from the server for the last time. As long
+    as the verdict does not change, the status cached by EntitlementStatusCache
+    can be used instead of contacting the server, unless it is older than
+    compliance_cache_max_age seconds. Only valid status is reused.
+
+    The auto-heal check runs only once per autoAttachInterval, thus it uses
+    longer limit returned by get_autoheal_max_age().
+    """
+
+    CACHE_FILE = "/var/lib/rhsm/cache/local_compliance.json"
+
+    def __init__(self):
+        self.data = None
+        # When it is set, then it is used instead of compliance_cache_max_age
+        self.max_age = None
+
+    def to_dict(self):
+        return self.data
+
+    def _load_data(self, open_file):
+        json_str = open_file.read()
+        return json.loads(json_str)
+
+    @staticmethod
+    def _get_max_age():
+        try:
+            return get_config_parser().get_int("rhsm", "compliance_cache_max_age") or 0
+        except ValueError as err:
+            log.warning("Invalid value of compliance_cache_max_age: %s" % err)
+            return 0
+
+    @classmethod
+    def get_autoheal_max_age(cls):
+        """
+        Return maximal age of status reused by the auto-heal check. It is twice
+        autoAttachInterval, thus the auto-heal check contacts the server at least
+        every second run. The status is not reused, when compliance_cache_max_age
+        is 0.
+        """
+        max_age = cls._get_max_age()
+        if max_age <= 0:
+            return 0
+        try:
+            interval = get_config_parser().get_int("rhsmcertd", "autoAttachInterval")
+        except ValueError as err:
+            log.warning("Invalid value of autoAttachInterval: %s" % err)
+            interval = None
+        if interval is None or interval <= 0:
+            interval = int(RHSMCERTD_DEFAULTS["autoattachinterval"])
+        return max(max_age, 2 * interval * 60)
+
+    @staticmethod
+    def _get_status_digest(status):
+        return hashlib.sha256(
+            json.dumps(status, sort_keys=True, default=json.encode).encode("utf-8")
+        ).hexdigest()
+
+    def set_verdict(self, verdict, status):
+        """
+        Remember verdict of local evaluation made together with fetching the status from the server
+        """
+        self.data = {"verdict": verdict, "status_digest": self._get_status_digest(status)}
+        self.write_cache()
+
+    def get_confirmed_status(self, status_cache, verdict):
+        """
+        Return compliance status cached by status_cache, when it is still confirmed
+        by the verdict of local evaluation. Otherwise return None and the status
+        has to be fetched from the server.
+        """
+        max_age = self._get_max_age() if self.max_age is None else self.max_age
+        if verdict is None or max_age <= 0:
+            return None
+        mod_time = status_cache._cache_mtime()
+        if mod_time is None or time.time() - mod_time > max_age:
+            log.debug("Cache %s does not exist or it is older than %d s" % (status_cache.CACHE_FILE, max_age))
+            return None
+        if self.data is None:
+            self.data = self.read_cache_only()
+        if not self.data or self.data.get("verdict") != verdict:
+            log.debug("Local compliance verdict changed since the last status check")
+            return None
+        status = status_cache._read_cache()
+        if status is None or self._get_status_digest(status) != self.data.get("status_digest"):
+            log.debug("Cached compliance status does not correspond to local compliance verdict")
+            return None
+        # Invalid and partial status can be changed on the server at any time
+        # (e.g. by attaching subscriptions), thus it is not reused
+        if status.get("status") != "valid":
+            log.debug("Cached compliance status is not valid, it is not reused")
+            return None
+        compliant_until = status.get("compliantUntil")
+        if compliant_until is not None and parse_date(compliant_until) <= datetime.datetime.now(GMT()):
+            log.debug("Cached compliance status is valid only until %s" % compliant_until)
+            return None
+        log.debug("Local compliance verdict did not change, using cached compliance status")
+        return status
+
+    def delete_cache(self):
+        super(LocalComplianceCache, self).delete_cache()
+        self.data = None
+
+
 class SyspurposeComplianceStatusCache(StatusCache):
     """
     Manages the system cache of system purpose compliance status from the server.
@@ -357,10 +617,11 @@ class SyspurposeComplianceStatusCache(StatusCache):
             super(SyspurposeComplianceStatusCache, self).write_cache()
 
     def get_overall_status(self):
+        # Status can be loaded from the cache, thus static method is used
         if self.server_status is not None:
-            return self.syspurpose_service.get_overall_status(self.server_status["status"])
+            return syspurpose.Syspurpose.get_overall_status(self.server_status["status"])
         else:
-            return self.syspurpose_service.get_overall_status("unknown")
+            return syspurpose.Syspurpose.get_overall_status("unknown")
 
     def get_overall_status_code(self):
         if self.server_status is not None:
@@ -777,6 +1038,72 @@ class WrittenOverrideCache(CacheManager):
             pass
 
 
+class ContentCertAffinityCache(CacheManager):
+    """
+    Cache remembering which entitlement cert-key pair was accepted by CDN
+    for content path prefix. The pair is tried first next time and other
+    pairs are used only when it does not work anymore.
+    """
+
+    CACHE_FILE = "/var/lib/rhsm/cache/content_cert_affinity.json"
+
+    def __init__(self, affinity=None):
+        self.affinity = affinity or {}
+        self.changed = False
+
+    def to_dict(self):
+        return self.affinity
+
+    def _load_data(self, open_file):
+        try:
+            self.affinity = json.loads(open_file.read()) or {}
+            return self.affinity
+        except IOError as err:
+            log.error("Unable to read cache: %s" % self.CACHE_FILE)
+            log.exception(err)
+        except ValueError:
+            # ignore json file parse errors, we are going to generate
+            # a new as if it didn't exist
+            pass
+
+    def _lookup(self, path):
+        """
+        Return cert-key pair remembered for the longest prefix of the path
+        """
+        prefixes = [prefix for prefix in self.affinity if path.startswith(prefix)]
+        if not prefixes:
+            return None
+        return tuple(self.affinity[max(prefixes, key=len)])
+
+    def sort_cert_key_pairs(self, path, cert_key_pairs):
+        """
+        Return list of cert-key pairs, where the pair accepted last time
+        for the path is the first one
+        """
+        pairs = sorted(cert_key_pairs)
+        preferred = self._lookup(path)
+        if preferred in pairs:
+            pairs.remove(preferred)
+            pairs.insert(0, preferred)
+        return pairs
+
+    def remember(self, prefix, cert_key_pair):
+        cert_key_pair = list(cert_key_pair)
+        if self.affinity.get(prefix) == cert_key_pair:
+            return
+        # Forget certificates, which were removed
+        for key, (cert_file, _key_file) in list(self.affinity.items()):
+            if not os.path.exists(cert_file):
+                del self.affinity[key]
+        self.affinity[prefix] = cert_key_pair
+        self.changed = True
+
+    def write_cache(self, debug=True):
+        if self.changed:
+            super(ContentCertAffinityCache, self).write_cache(debug)
+            self.changed = False
+
+
 class ConsumerCache(CacheManager):
     """
     Base class for caching data that gets automatically obsoleted, when consumer uuid
@@ -871,14 +1198,9 @@ class ConsumerCache(CacheManager):
         # When timeout for cache is defined, then check if the cache file is not
         # too old. In that case content of the cache file will be overwritten with
         # new content from the server.
-        if self.TIMEOUT is not None:
-            if os.path.exists(self.CACHE_FILE):
-                mod_time = os.path.getmtime(self.CACHE_FILE)
-                cur_time = time.time()
-                diff = cur_time - mod_time
-                if diff > self.TIMEOUT:
-                    log.debug("Validity of cache file %s timed out (%d)" % (self.CACHE_FILE, self.TIMEOUT))
-                    cache_file_obsoleted = True
+        if self.TIMEOUT is not None and self._cache_expired():
+            log.debug("Validity of cache file %s timed out (%d)" % (self.CACHE_FILE, self.TIMEOUT))
+            cache_file_obsoleted = True
 
         if cache_file_obsoleted is False:
             # Try to read data from cache first
@@ -0,0 +1,183 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+
+"""
+Single-file storage backend for the caches in /var/lib/rhsm/cache.
+
+By default every CacheManager keeps its data in its own JSON file. When
+the "cache_backend" option in the [rhsm] section of rhsm.conf is set to
+"sqlite", the cached documents are stored as rows of one SQLite database
+instead. The database is opened once per process, single documents are
+read on demand and several documents can be read in one consistent
+snapshot.
+"""
+import collections
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+CACHE_DB_FILE = "/var/lib/rhsm/cache/cache.db"
+
+JSON_BACKEND = "json"
+SQLITE_BACKEND = "sqlite"
+
+CACHE_BACKENDS = (JSON_BACKEND, SQLITE_BACKEND)
+
+
+class CacheEntry(collections.namedtuple("CacheEntry", ["data", "mtime", "ttl"])):
+    """
+    One cached document together with its metadata. The data is the
+    serialized (JSON) representation of the document, mtime is the time
+    of the last write and ttl is the validity of the entry in seconds
+    (None means that the entry does not expire).
+    """
+
+    __slots__ = ()
+
+    def expired(self, now=None):
+        if self.ttl is None:
+            return False
+        if now is None:
+            now = time.time()
+        return now - self.mtime > self.ttl
+
+
+class SqliteCacheStore(object):
+    """
+    Transactional key/value store backed by one SQLite database file.
+    Keys are the names of the caches (the CACHE_FILE of the CacheManager),
+    values are serialized documents.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cache "
+        "(key TEXT PRIMARY KEY, data TEXT NOT NULL, mtime REAL NOT NULL, ttl REAL)"
+    )
+
+    def __init__(self, path=CACHE_DB_FILE):
+        self.path = path
+        self._conn = None
+        # CacheManager subclasses can write the cache from other threads
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        if self._conn is None:
+            cache_dir = os.path.dirname(self.path)
+            if cache_dir and not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            # isolation_level=None: transactions are controlled explicitly
+            self._conn = sqlite3.connect(
+                self.path, timeout=10.0, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute(self.SCHEMA)
+            log.debug("Opened cache store: %s" % self.path)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, key):
+        """
+        Return CacheEntry for given key or None, when there is no such entry.
+        """
+        with self._lock:
+            row = (
+                self._connect().execute("SELECT data, mtime, ttl FROM cache WHERE key = ?", (key,)).fetchone()
+            )
+        if row is None:
+            return None
+        return CacheEntry(*row)
+
+    def snapshot(self, keys):
+        """
+        Read several entries in one read transaction, so that they are consistent
+        with each other even when another process is writing to the store.
+        :param keys: iterable of keys
+        :return: dictionary {key: CacheEntry}; missing keys are not included
+        """
+        keys = list(keys)
+        result = {}
+        if not keys:
+            return result
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                placeholders = ",".join("?" * len(keys))
+                rows = conn.execute(
+                    "SELECT key, data, mtime, ttl FROM cache WHERE key IN (%s)" % placeholders, keys
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        for key, data, mtime, ttl in rows:
+            result[key] = CacheEntry(data, mtime, ttl)
+        return result
+
+    def set(self, key, data, ttl=None):
+        self.set_many({key: data}, ttl=ttl)
+
+    def set_many(self, items, ttl=None):
+        """
+        Write several entries atomically.
+        :param items: dictionary {key: serialized data}
+        :param ttl: validity of written entries in seconds
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, data, mtime, ttl) VALUES (?, ?, ?, ?)",
+                    [(key, data, now, ttl) for key, data in items.items()],
+                )
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def delete(self, key):
+        with self._lock:
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def exists(self, key):
+        with self._lock:
+            row = self._connect().execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def mtime(self, key):
+        entry = self.get(key)
+        if entry is None:
+            return None
+        return entry.mtime
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_cache_store(path=CACHE_DB_FILE):
+    """
+    Return the cache store shared by all caches of this process.
+    """
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != path:
+            _store = SqliteCacheStore(path)
+        return _store
@@ -46,7 +46,9 @@ UNKNOWN = "unknown"
 
 
 SOCKET_FACT = "cpu.cpu_socket(s)"
+CORES_FACT = "cpu.core(s)_per_socket"
 RAM_FACT = "memory.memtotal"
+GUEST_FACT = "virt.is_guest"
 
 RHSM_VALID = 0
 RHSM_EXPIRED = 1
@@ -75,6 +77,8 @@ class ComplianceManager(object):
         self.system_status = None
         self.valid_entitlement_certs = None
         self.status = None
+        # Compliance status can be confirmed by local evaluation
+        self.use_local_compliance = True
         self.load()
 
     def load(self):
@@ -129,11 +133,36 @@ class ComplianceManager(object):
         :return: Compliance status, when server of cache is available. Otherwise None is returned.
         """
         status_cache = inj.require(inj.ENTITLEMENT_STATUS_CACHE)
+        verdict = None
+        # Status for the current date can be reused, when local evaluation of
+        # compliance gives the same verdict like during the last status check
+        if self.on_date is None and status_cache.max_cache_age is None and self.use_local_compliance:
+            local_cache = inj.require(inj.LOCAL_COMPLIANCE_CACHE)
+            verdict = self.get_local_verdict()
+            self.status = local_cache.get_confirmed_status(status_cache, verdict)
+            if self.status is not None:
+                return self.status
         self.status = status_cache.load_status(
             self.cp_provider.get_consumer_auth_cp(), self.identity.uuid, self.on_date
         )
+        if verdict is not None and self.status is not None and not status_cache.last_error:
+            local_cache.set_verdict(verdict, self.status)
         return self.status
 
+    def get_local_verdict(self):
+        """
+        Evaluate compliance locally without contacting the server.
+        :return: Verdict of LocalComplianceEvaluator or None, when it cannot be evaluated
+        """
+        facts = inj.require(inj.FACTS).read_cache_only()
+        evaluator = LocalComplianceEvaluator(
+            self.installed_products,
+            self.entitlement_dir.list(),
+            facts,
+            content_access=bool(self.entitlement_dir.list_with_sca_mode()),
+        )
+        return evaluator.get_verdict()
+
     def _parse_server_status(self):
         """Fetch entitlement status info from server and parse."""
 
@@ -361,6 +390,8 @@ class CertSorter(ComplianceManager):
         # ComplianceManager.__init__ needs the installed product info
         # in sync before it will be accurate, so update it, then
         # super().__init__. See rhbz #1004893
+        # Installed products are uploaded only when they changed since the
+        # last upload, thus it does not need network in the common case.
         self.installed_mgr = inj.require(inj.INSTALLED_PRODUCTS_MANAGER)
         self.update_product_manager()
 
@@ -495,3 +526,131 @@ class EntitlementCertStackingGroupSorter(StackingGroupSorter):
             return cert.order.name
         else:
             return None
+
+
+class LocalComplianceEvaluator(object):
+    """
+    Evaluates compliance of installed products using only installed product
+    certificates, entitlement certificates and cached system facts. It is
+    conservative approximation of rules used by entitlement server and it is
+    not used for reporting of status. It is used for detection of changes,
+    which could change compliance status computed by the server.
+    """
+
+    def __init__(self, installed_products, ent_certs, facts=None, content_access=False):
+        """
+        :param installed_products: dictionary mapping product ID to product certificate
+        :param ent_certs: list of entitlement certificates
+        :param facts: system facts uploaded to the server
+        :param content_access: True, when simple content access certificate is installed
+        """
+        self.installed_products = installed_products
+        self.ent_certs = ent_certs
+        self.facts = facts or {}
+        self.content_access = content_access
+
+    def _get_int_fact(self, name, default):
+        try:
+            return int(self.facts.get(name, default))
+        except (TypeError, ValueError):
+            return default
+
+    def _get_system_values(self):
+        """
+        Return values of system attributes limited by entitlements: {limit attribute: value}
+        """
+        sockets = self._get_int_fact(SOCKET_FACT, 1)
+        values = {
+            "core_limit": sockets * self._get_int_fact(CORES_FACT, 1),
+            # memory.memtotal is in kB, but entitlements limit RAM in GB
+            "ram_limit": int(round(self._get_int_fact(RAM_FACT, 0) / (1024.0 * 1024.0))),
+        }
+        # Sockets are not counted for virtual guests
+        if str(self.facts.get(GUEST_FACT, False)).lower() != "true":
+            values["socket_limit"] = sockets
+        return values
+
+    @staticmethod
+    def _is_group_complete(group, system_values):
+        """
+        Check if the entitlements in the group cover all limited system attributes.
+        Limits of stacked entitlements are multiplied by quantity and summed.
+        """
+        for attribute, value in system_values.items():
+            covered = None
+            for cert in group.entitlements:
+                limit = getattr(cert.order, attribute, None) if cert.order else None
+                if limit is None:
+                    continue
+                if cert.order.stacking_id:
+                    limit *= cert.order.quantity_used
+                covered = limit if covered is None else covered + limit
+            if covered is not None and covered < value:
+                return False
+        return True
+
+    def evaluate(self, on_date=None):
+        """
+        Evaluate compliance of installed products on given date (now by default)
+        :return: tuple (status, compliant_until), where status is VALID, PARTIAL, INVALID
+            or UNKNOWN, when the status cannot be evaluated locally. compliant_until is the
+            last date, when all installed products are still covered, or None.
+        """
+        if self.content_access:
+            return UNKNOWN, None
+        if on_date is None:
+            on_date = datetime.now(GMT())
+
+        valid_certs = [cert for cert in self.ent_certs if cert.valid_range.has_date(on_date)]
+        system_values = self._get_system_values()
+
+        # Map product ID to the end dates of complete groups and the set of products
+        # provided by incomplete groups
+        covered_until = {}
+        partial = set()
+        partial_stack = False
+        for group in EntitlementCertStackingGroupSorter(valid_certs).groups:
+            product_ids = set(product.id for cert in group.entitlements for product in cert.products)
+            if self._is_group_complete(group, system_values):
+                # The stack could become incomplete, when any of its entitlements expires
+                end = min(cert.valid_range.end() for cert in group.entitlements)
+                for product_id in product_ids:
+                    covered_until[product_id] = max(end, covered_until.get(product_id, end))
+            else:
+                partial_stack = True
+                partial |= product_ids
+
+        status = VALID
+        compliant_until = None
+        for product_id in self.installed_products:
+            if product_id in covered_until:
+                if compliant_until is None or covered_until[product_id] < compliant_until:
+                    compliant_until = covered_until[product_id]
+            elif product_id in partial:
+                status = PARTIAL
+            else:
+                return INVALID, None
+
+        if status == VALID and partial_stack:
+            status = PARTIAL
+        if status != VALID:
+            compliant_until = None
+        return status, compliant_until
+
+    def get_verdict(self):
+        """
+        Return verdict of local evaluation, which can be compared with verdicts
+        evaluated in the past, or None, when compliance cannot be evaluated locally.
+        Besides the status, the verdict contains all inputs of the evaluation to
+        detect any change of entitlements, which could change the status on the server.
+        """
+        status, compliant_until = self.evaluate()
+        if status == UNKNOWN:
+            return None
+        return {
+            "status": status,
+            "compliant_until": compliant_until.isoformat() if compliant_until is not None else None,
+            "products": sorted(self.installed_products),
+            "entitlements": sorted(str(cert.serial) for cert in self.ent_certs),
+            "system": self._get_system_values(),
+        }
@@ -11,6 +11,8 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import collections.abc
+import importlib
 import os
 import sys
 import logging
@@ -93,22 +95,85 @@ class AbstractCLICommand(object):
         return ArgumentParser(usage=self._get_usage(), description=self.shortdesc)
 
 
+class LazyCommand(object):
+    """
+    Reference to a command class, which is not imported until the command
+    is needed. The module of the command (and everything it imports) is
+    loaded only when the command was selected on the command line or when
+    all commands have to be listed.
+    """
+
+    def __init__(self, name, module_name, class_name):
+        self.name = name
+        self.module_name = module_name
+        self.class_name = class_name
+
+    def load(self):
+        module = importlib.import_module(self.module_name)
+        return getattr(module, self.class_name)
+
+    def __repr__(self):
+        return "LazyCommand(%s -> %s.%s)" % (self.name, self.module_name, self.class_name)
+
+
+class CommandRegistry(collections.abc.Mapping):
+    """
+    Mapping of command names to command instances. Instances of commands
+    registered using LazyCommand are created on first access.
+    """
+
+    def __init__(self):
+        self._commands = {}
+        self._lazy_commands = {}
+
+    def add(self, cmd):
+        self._lazy_commands.pop(cmd.name, None)
+        self._commands[cmd.name] = cmd
+
+    def add_lazy(self, lazy_cmd):
+        self._lazy_commands[lazy_cmd.name] = lazy_cmd
+
+    def __getitem__(self, name):
+        if name not in self._commands:
+            if name not in self._lazy_commands:
+                raise KeyError(name)
+            lazy_cmd = self._lazy_commands.pop(name)
+            log.debug("Loading command %s from module %s" % (name, lazy_cmd.module_name))
+            self._commands[name] = lazy_cmd.load()()
+        return self._commands[name]
+
+    def __contains__(self, name):
+        return name in self._commands or name in self._lazy_commands
+
+    def __iter__(self):
+        return iter(list(self._commands) + list(self._lazy_commands))
+
+    def __len__(self):
+        return len(self._commands) + len(self._lazy_commands)
+
+    def is_loaded(self, name):
+        return name in self._commands
+
+
 # taken wholseale from rho...
 class CLI(object):
     def __init__(self, command_classes=None):
         command_classes = command_classes or []
-        self.cli_commands = {}
+        self.cli_commands = CommandRegistry()
         self.cli_aliases = {}
         for clazz in command_classes:
+            if isinstance(clazz, LazyCommand):
+                self.cli_commands.add_lazy(clazz)
+                continue
             cmd = clazz()
             # ignore the base class
             if cmd.name != "cli":
-                self.cli_commands[cmd.name] = cmd
+                self.cli_commands.add(cmd)
                 for alias in cmd.aliases:
                     self.cli_aliases[alias] = cmd
 
     def _add_command(self, cmd):
-        self.cli_commands[cmd.name] = cmd
+        self.cli_commands.add(cmd)
 
     def _default_command(self):
         self._usage()
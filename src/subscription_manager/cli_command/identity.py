@@ -26,7 +26,6 @@ from subscription_manager import managerlib
 from subscription_manager.branding import get_branding
 from subscription_manager.cli import system_exit
 from subscription_manager.cli_command.cli import handle_exception
-from subscription_manager.cli_command.environments import MULTI_ENV
 from subscription_manager.cli_command.user_pass import UserPassCommand
 from subscription_manager.exceptions import ExceptionMapper
 from subscription_manager.i18n import ugettext as _
@@ -95,7 +94,9 @@ class IdentityCommand(UserPassCommand):
                 supported_resources = get_supported_resources(self.cp, self.identity)
                 if "environments" in supported_resources:
                     consumer = self.cp.getConsumer(consumerid)
-                    evn_key = "environments" if self.cp.has_capability(MULTI_ENV) else "environment"
+                    evn_key = (
+                        "environments" if self.cp.has_capability(connection.MULTI_ENV) else "environment"
+                    )
                     environments = consumer[evn_key]
                     if environments:
                         if evn_key == "environment":
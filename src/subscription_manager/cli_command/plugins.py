@@ -71,6 +71,6 @@ class PluginsCommand(CliCommand):
             # get_slots is nicely sorted for presentation
             for slot in self.plugin_manager.get_slots():
                 print(slot)
-                for hook in sorted(self.plugin_manager._slot_to_funcs[slot], key=lambda func: func.__name__):
+                for hook in sorted(self.plugin_manager.get_slot_hooks(slot), key=lambda func: func.__name__):
                     hook_key = hook.__self__.__class__.get_plugin_key()
                     print("\t{key}.{name}".format(key=hook_key, name=hook.__name__))
@@ -14,17 +14,21 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import contextlib
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 import subscription_manager.injection as inj
 
 from rhsm.certificate2 import CONTENT_ACCESS_CERT_TYPE
+from rhsm.config import get_config_parser
 from rhsm.connection import ConnectionException
 
 from rhsmlib.services import entitlement
 from rhsmlib.services.refresh import Refresh
 
 from subscription_manager import syspurposelib
+from subscription_manager.cache import CacheManager
 from subscription_manager.cli import system_exit
 from subscription_manager.cli_command.cli import CliCommand
 from subscription_manager.i18n import ugettext as _
@@ -46,6 +50,20 @@ class StatusCommand(CliCommand):
                 example=strftime("%Y-%m-%d", localtime())
             ),
         )
+        self.parser.add_argument(
+            "--cached",
+            action="store_true",
+            default=False,
+            help=_(
+                "show status using only installed certificates and status cached by previous checks, "
+                "without contacting the entitlement server"
+            ),
+        )
+
+    def _validate_options(self):
+        # Cached status is the status for today, and it cannot be used for other date
+        if self.options.cached and self.options.on_date:
+            system_exit(os.EX_USAGE, _("Error: --ondate cannot be used with --cached"))
 
     def _get_date_cli_option(self):
         """
@@ -60,9 +78,44 @@ class StatusCommand(CliCommand):
                 system_exit(os.EX_DATAERR, err)
         return on_date
 
-    def _print_status(self, service_status):
+    def _get_cache_max_age(self):
+        """
+        Return maximal age of cached status used by --cached option in seconds
+        """
+        try:
+            return get_config_parser().get_int("rhsm", "status_cache_max_age")
+        except ValueError as err:
+            log.warning("Invalid value of status_cache_max_age: %s" % err)
+            return None
+
+    def _copy_cp(self):
+        """
+        Return copy of connection, which can be used by other thread
+        """
+        if self.cp is None:
+            return None
+        return self.cp.copy()
+
+    def _has_sca_certs(self):
+        """
+        Return True, when SCA entitlement certificate is installed
+        """
+        certs = self.entitlement_dir.list_with_content_access()
+        return any(cert.entitlement_type == CONTENT_ACCESS_CERT_TYPE for cert in certs)
+
+    def _is_cached_simple_content_access(self):
+        """
+        Return True, when cached content access mode of the owner is SCA
+        """
+        data = inj.require(inj.CONTENT_ACCESS_MODE_CACHE).read_cache_only() or {}
+        return data.get(self.identity.uuid) == "org_environment"
+
+    def _print_status(self, service_status, has_sca_certs, sca_mode_detected, allow_refresh=True):
         """
         Print only status
+        :param has_sca_certs: SCA entitlement certificate is installed
+        :param sca_mode_detected: SCA mode was detected using installed certificate or current owner
+        :param allow_refresh: Refresh entitlement certificates, when content access mode was changed
         :return: Print overall status
         """
 
@@ -76,22 +129,15 @@ class StatusCommand(CliCommand):
             "This host has access to content, regardless of subscription status.\n"
         )
 
-        certs = self.entitlement_dir.list_with_content_access()
-        sca_certs = [cert for cert in certs if cert.entitlement_type == CONTENT_ACCESS_CERT_TYPE]
-        sca_mode_detected = False
-
         refresh_service = Refresh(cp=self.cp, ent_cert_lib=self.entcertlib)
 
-        if sca_certs:
-            sca_mode_detected = True
-        else:
+        if not has_sca_certs:
             # When there are no entitlement SCA certificates, but status_id is "disabled", then
             # it means that content access mode has changed on the server and entitlement certificates
             # have to be refreshed
-            if service_status["status_id"] == "disabled":
+            if service_status["status_id"] == "disabled" and allow_refresh:
                 refresh_service.refresh()
-            if is_simple_content_access(uep=self.cp, identity=self.identity):
-                sca_mode_detected = True
+                sca_mode_detected = is_simple_content_access(uep=self.cp, identity=self.identity)
 
         if sca_mode_detected is True:
             # When SCA mode was detected using cache or installed SCA entitlement certificates, but status_id
@@ -99,11 +145,12 @@ class StatusCommand(CliCommand):
             # entitlement certificates have to be refreshed
             status_id = service_status["status_id"]
             if status_id != "disabled":
-                log.debug(
-                    f"Found SCA cert, but status ID is not 'disabled' ({status_id}). "
-                    "Refreshing entitlement certs..."
-                )
-                refresh_service.refresh()
+                if allow_refresh:
+                    log.debug(
+                        f"Found SCA cert, but status ID is not 'disabled' ({status_id}). "
+                        "Refreshing entitlement certs..."
+                    )
+                    refresh_service.refresh()
             else:
                 ca_message = has_cert
 
@@ -128,20 +175,40 @@ class StatusCommand(CliCommand):
                 print("- {name}".format(name=format_name(message, 2, columns)))
             print("")
 
-    def _print_syspurpose_status(self, on_date):
+    def _get_syspurpose_status(self, on_date, uep=None, max_cache_age=None):
         """
-        Print syspurpose status
-        :return: None
+        Synchronize syspurpose and load syspurpose status. When max_cache_age is
+        set, then only cached syspurpose status is used.
+        :return: Cache of syspurpose status
         """
+        syspurpose_cache = inj.require(inj.SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE)
+        if max_cache_age is not None:
+            syspurpose_cache.max_cache_age = max_cache_age
+            try:
+                syspurpose_cache.load_status(uep, self.identity.uuid, on_date)
+            finally:
+                syspurpose_cache.max_cache_age = None
+            return syspurpose_cache
+
+        uep = uep or self.cp
         try:
-            store = syspurposelib.get_sys_purpose_store()
+            if uep is self.cp:
+                store = syspurposelib.get_sys_purpose_store()
+            else:
+                store = syspurposelib.SyncedStore(uep, consumer_uuid=self.identity.uuid)
             if store:
                 store.sync()
         except (OSError, ConnectionException) as ne:
             log.exception(ne)
 
-        syspurpose_cache = inj.require(inj.SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE)
-        syspurpose_cache.load_status(self.cp, self.identity.uuid, on_date)
+        syspurpose_cache.load_status(uep, self.identity.uuid, on_date)
+        return syspurpose_cache
+
+    def _print_syspurpose_status(self, syspurpose_cache):
+        """
+        Print syspurpose status
+        :return: None
+        """
         print(_("System Purpose Status: {status}").format(status=syspurpose_cache.get_overall_status()))
 
         syspurpose_status_code = syspurpose_cache.get_overall_status_code()
@@ -152,21 +219,73 @@ class StatusCommand(CliCommand):
                     print("- {reason}".format(reason=reason))
         print("")
 
+    def _get_status(self, on_date, has_sca_certs):
+        """
+        Get entitlement status, content access mode and syspurpose status. The entitlement
+        status is loaded by this thread and other data are loaded concurrently using copies
+        of the connection.
+        :return: tuple (entitlement status, SCA mode detected, syspurpose status cache)
+        """
+        copies = []
+
+        def _run(method, *args, **kwargs):
+            uep = self._copy_cp()
+            copies.append(uep)
+            return method(*args, uep=uep, **kwargs)
+
+        try:
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="Thread-Status") as executor:
+                sca_future = None
+                if not has_sca_certs:
+                    sca_future = executor.submit(_run, is_simple_content_access, identity=self.identity)
+                syspurpose_future = executor.submit(_run, self._get_syspurpose_status, on_date)
+                # Explicit status check always asks the server
+                service_status = entitlement.EntitlementService(cp=self.cp).get_status(
+                    on_date, use_local_compliance=False
+                )
+            sca_mode_detected = has_sca_certs or sca_future.result()
+            return service_status, sca_mode_detected, syspurpose_future.result()
+        finally:
+            for uep in copies:
+                if uep is not None and uep is not self.cp:
+                    uep.close()
+
     def _do_command(self):
         """
         Print status and all reasons it is not valid
         """
+        self._validate_options()
 
         # First get/check if provided date is valid
         on_date = self._get_date_cli_option()
 
-        service_status = entitlement.EntitlementService(cp=self.cp).get_status(on_date)
+        has_sca_certs = self._has_sca_certs()
+
+        if self.options.cached is True:
+            max_age = self._get_cache_max_age()
+            if max_age is None:
+                system_exit(os.EX_CONFIG, _("Invalid value of status_cache_max_age in rhsm.conf"))
+            # Cached entitlement status and content access mode are read
+            # in one snapshot to be consistent with each other
+            caches = [inj.require(inj.ENTITLEMENT_STATUS_CACHE), inj.require(inj.CONTENT_ACCESS_MODE_CACHE)]
+            with CacheManager.cache_snapshot(caches):
+                service_status = entitlement.EntitlementService(cp=self.cp).get_cached_status(
+                    on_date, max_age
+                )
+                sca_mode_detected = has_sca_certs or self._is_cached_simple_content_access()
+            self._print_status(service_status, has_sca_certs, sca_mode_detected, allow_refresh=False)
+            self._print_reasons(service_status)
+            self._print_syspurpose_status(self._get_syspurpose_status(on_date, max_cache_age=max_age))
+        else:
+            # Consumer and owner documents are fetched only once by all steps
+            with self.cp.request_scope() if self.cp is not None else contextlib.nullcontext():
+                service_status, sca_mode_detected, syspurpose_cache = self._get_status(on_date, has_sca_certs)
 
-        self._print_status(service_status)
+                self._print_status(service_status, has_sca_certs, sca_mode_detected)
 
-        self._print_reasons(service_status)
+                self._print_reasons(service_status)
 
-        self._print_syspurpose_status(on_date)
+                self._print_syspurpose_status(syspurpose_cache)
 
         if service_status["valid"]:
             result = 0
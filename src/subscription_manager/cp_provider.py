@@ -12,8 +12,11 @@
 # in this software or its documentation.
 #
 import base64
+import collections
+import hashlib
 import json
 import logging
+import os
 
 from subscription_manager.identity import ConsumerIdentity
 from subscription_manager import utils
@@ -41,8 +44,15 @@ class CPProvider(object):
     basic_auth_cp: also called admin_auth uses a username/password
     no_auth_cp: no authentication
     content_connection: ent cert based auth connection to cdn
+
+    Candlepin connections are cached by connection info (authentication type,
+    server, proxy and credentials), thus setting the same connection info
+    again does not create new connections. Correlation ID and D-Bus sender
+    are set on every reused connection.
     """
 
+    MAX_CACHED_CONNECTIONS = 8
+
     consumer_auth_cp = None
     basic_auth_cp = None
     no_auth_cp = None
@@ -51,6 +61,7 @@ class CPProvider(object):
 
     # Initialize with default connection info from the config file
     def __init__(self):
+        self._connections = collections.OrderedDict()
         self.set_connection_info()
         self.correlation_id = None
         self.username = None
@@ -101,7 +112,8 @@ class CPProvider(object):
         self.proxy_password = proxy_password_arg
         self.no_proxy = no_proxy_arg
         self.restlib_class = restlib_class
-        self.clean()
+        # Connections matching new connection info are taken from the cache
+        self._reset_connections()
 
     # Set username and password used for basic_auth without
     # modifying previously set options
@@ -131,14 +143,100 @@ class CPProvider(object):
 
     def set_correlation_id(self, correlation_id):
         self.correlation_id = correlation_id
+        # Correlation ID is sent with every request; connections are not recreated
+        for uep in self._connections.values():
+            uep.conn.correlation_id = correlation_id
 
-    # Force connections to be re-initialized
-    def clean(self):
+    def _reset_connections(self):
         self.consumer_auth_cp = None
         self.basic_auth_cp = None
         self.no_auth_cp = None
         self.keycloak_auth_cp = None
 
+    # Force connections to be re-initialized
+    def clean(self):
+        self._reset_connections()
+        connections = list(self._connections.values())
+        self._connections.clear()
+        for uep in connections:
+            uep.conn.close_connection()
+
+    @staticmethod
+    def _file_mtime(path):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _connection_key(self, auth_type, *credentials):
+        """
+        Return key of cached connection. Credentials (including proxy
+        credentials) are hashed, and new consumer certificate (e.g. after
+        registration) gives a new key.
+        """
+        if auth_type == connection.ConnectionType.CONSUMER_CERT_AUTH:
+            credentials += tuple(self._file_mtime(path) for path in credentials)
+        credentials += (self.proxy_user, self.proxy_password)
+        credentials_hash = hashlib.sha256(repr(credentials).encode("utf-8")).hexdigest()
+        proxy = (self.proxy_hostname, self.proxy_port, self.no_proxy)
+        # Options read from the configuration file, when the connection is created
+        tls = (
+            connection.config.get("server", "insecure"),
+            connection.config.get("rhsm", "ca_cert_dir"),
+            connection.config.get("server", "server_timeout"),
+        )
+        return (
+            auth_type,
+            self.server_hostname,
+            self.server_port,
+            self.server_prefix,
+            proxy,
+            tls,
+            self.restlib_class or connection.Restlib,
+            credentials_hash,
+        )
+
+    def _get_cached_cp(self, auth_type, credentials, **kwargs):
+        """
+        Return cached connection for current connection info or create new one
+        :param auth_type: type of authentication
+        :param credentials: tuple of credentials used for computing key of connection
+        :param kwargs: arguments of UEPConnection specific for authentication type
+        :return: instance of UEPConnection
+        """
+        key = self._connection_key(auth_type, *credentials)
+        uep = self._connections.get(key)
+        if uep is not None:
+            self._connections.move_to_end(key)
+            uep.set_request_context(
+                correlation_id=self.correlation_id,
+                client_version=self.get_client_version(),
+                dbus_sender=self.get_dbus_sender(),
+            )
+            return uep
+
+        uep = connection.UEPConnection(
+            host=self.server_hostname,
+            ssl_port=self.server_port,
+            handler=self.server_prefix,
+            proxy_hostname=self.proxy_hostname,
+            proxy_port=self.proxy_port,
+            proxy_user=self.proxy_user,
+            proxy_password=self.proxy_password,
+            correlation_id=self.correlation_id,
+            no_proxy=self.no_proxy,
+            restlib_class=self.restlib_class,
+            client_version=self.get_client_version(),
+            dbus_sender=self.get_dbus_sender(),
+            auth_type=auth_type,
+            **kwargs,
+        )
+        self._connections[key] = uep
+        if len(self._connections) > self.MAX_CACHED_CONNECTIONS:
+            _key, oldest = self._connections.popitem(last=False)
+            oldest.conn.close_connection()
+        return uep
+
     def get_client_version(self):
         """
         Try to get version of subscription manager
@@ -163,37 +261,17 @@ class CPProvider(object):
         Try to close all connections to candlepin server, CDN, etc.
         :return: None
         """
-        if self.consumer_auth_cp is not None:
-            log.debug("Closing auth/consumer connection...")
-            self.consumer_auth_cp.conn.close_connection()
-        if self.no_auth_cp is not None:
-            log.debug("Closing no auth connection...")
-            self.no_auth_cp.conn.close_connection()
-        if self.basic_auth_cp is not None:
-            log.debug("Closing auth/basic connection...")
-            self.basic_auth_cp.conn.close_connection()
-        if self.keycloak_auth_cp is not None:
-            log.debug("Closing auth/keycloak connection...")
-            self.keycloak_auth_cp.conn.close_connestion()
+        for uep in self._connections.values():
+            log.debug("Closing %s connection..." % uep.auth_type)
+            uep.conn.close_connection()
 
     def get_consumer_auth_cp(self):
         if not self.consumer_auth_cp:
-            self.consumer_auth_cp = connection.UEPConnection(
-                host=self.server_hostname,
-                ssl_port=self.server_port,
-                handler=self.server_prefix,
-                proxy_hostname=self.proxy_hostname,
-                proxy_port=self.proxy_port,
-                proxy_user=self.proxy_user,
-                proxy_password=self.proxy_password,
+            self.consumer_auth_cp = self._get_cached_cp(
+                connection.ConnectionType.CONSUMER_CERT_AUTH,
+                (self.cert_file, self.key_file),
                 cert_file=self.cert_file,
                 key_file=self.key_file,
-                correlation_id=self.correlation_id,
-                no_proxy=self.no_proxy,
-                restlib_class=self.restlib_class,
-                client_version=self.get_client_version(),
-                dbus_sender=self.get_dbus_sender(),
-                auth_type=connection.ConnectionType.CONSUMER_CERT_AUTH,
             )
         return self.consumer_auth_cp
 
@@ -221,64 +299,28 @@ class CPProvider(object):
 
         self.set_token(access_token)
 
-        self.keycloak_auth_cp = connection.UEPConnection(
-            host=self.server_hostname,
-            ssl_port=self.server_port,
-            handler=self.server_prefix,
-            proxy_hostname=self.proxy_hostname,
-            proxy_port=self.proxy_port,
-            proxy_user=self.proxy_user,
-            proxy_password=self.proxy_password,
+        self.keycloak_auth_cp = self._get_cached_cp(
+            connection.ConnectionType.KEYCLOAK_AUTH,
+            (self.token,),
             username=None,
             password=None,
-            correlation_id=self.correlation_id,
-            no_proxy=self.no_proxy,
-            restlib_class=self.restlib_class,
             token=self.token,
-            client_version=self.get_client_version(),
-            dbus_sender=self.get_dbus_sender(),
-            auth_type=connection.ConnectionType.KEYCLOAK_AUTH,
         )
         return self.keycloak_auth_cp
 
     def get_basic_auth_cp(self):
         if not self.basic_auth_cp:
-            self.basic_auth_cp = connection.UEPConnection(
-                host=self.server_hostname,
-                ssl_port=self.server_port,
-                handler=self.server_prefix,
-                proxy_hostname=self.proxy_hostname,
-                proxy_port=self.proxy_port,
-                proxy_user=self.proxy_user,
-                proxy_password=self.proxy_password,
+            self.basic_auth_cp = self._get_cached_cp(
+                connection.ConnectionType.BASIC_AUTH,
+                (self.username, self.password),
                 username=self.username,
                 password=self.password,
-                correlation_id=self.correlation_id,
-                no_proxy=self.no_proxy,
-                restlib_class=self.restlib_class,
-                client_version=self.get_client_version(),
-                dbus_sender=self.get_dbus_sender(),
-                auth_type=connection.ConnectionType.BASIC_AUTH,
             )
         return self.basic_auth_cp
 
     def get_no_auth_cp(self):
         if not self.no_auth_cp:
-            self.no_auth_cp = connection.UEPConnection(
-                host=self.server_hostname,
-                ssl_port=self.server_port,
-                handler=self.server_prefix,
-                proxy_hostname=self.proxy_hostname,
-                proxy_port=self.proxy_port,
-                proxy_user=self.proxy_user,
-                proxy_password=self.proxy_password,
-                correlation_id=self.correlation_id,
-                no_proxy=self.no_proxy,
-                restlib_class=self.restlib_class,
-                client_version=self.get_client_version(),
-                dbus_sender=self.get_dbus_sender(),
-                auth_type=connection.ConnectionType.NO_AUTH,
-            )
+            self.no_auth_cp = self._get_cached_cp(connection.ConnectionType.NO_AUTH, ())
         return self.no_auth_cp
 
     def get_content_connection(self):
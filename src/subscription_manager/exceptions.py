@@ -49,6 +49,9 @@ RATE_LIMIT_MESSAGE = _("The server rate limit has been exceeded, please try agai
 RATE_LIMIT_EXPIRATION = _(
     "The server rate limit has been exceeded, please try again later. (Expires in %s seconds)"
 )
+CIRCUIT_OPEN_MESSAGE = _(
+    "The server is temporarily unavailable, please try again later. (Retry in %s seconds)"
+)
 
 # TRANSLATORS: example: "You don't have permission to perform this action (HTTP error code 403: Forbidden)"
 # (the part before the opening bracket originates on the server)
@@ -78,6 +81,7 @@ class ExceptionMapper(object):
             # message is already translated server-side.
             connection.RestlibException: (RESTLIB_MESSAGE, self.format_restlib_exception),
             connection.RateLimitExceededException: (None, self.format_rate_limit_exception),
+            connection.CircuitOpenException: (CIRCUIT_OPEN_MESSAGE, self.format_circuit_open_exception),
             httplib.BadStatusLine: (REMOTE_SERVER_MESSAGE, self.format_using_template),
             TokenAuthUnsupportedException: (TOKEN_AUTH_UNSUPPORTED_MESSAGE, self.format_using_template),
         }
@@ -107,6 +111,9 @@ class ExceptionMapper(object):
         else:
             return RATE_LIMIT_MESSAGE
 
+    def format_circuit_open_exception(self, circuit_open_exception, message_template):
+        return message_template % int(circuit_open_exception.retry_after)
+
     def get_message(self, exception) -> str:
         """Get string representation of an exception.
 
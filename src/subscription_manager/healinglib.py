@@ -68,10 +68,39 @@ class HealingUpdateAction(object):
         self.report = entcertlib.EntCertUpdateReport()
         self.plugin_manager = inj.require(inj.PLUGIN_MANAGER)
 
+    @staticmethod
+    def _is_valid_until(tomorrow):
+        try:
+            # Auto-heal check runs rarely, thus it can reuse older status
+            local_cache = inj.require(inj.LOCAL_COMPLIANCE_CACHE)
+            local_cache.max_age = local_cache.get_autoheal_max_age()
+            try:
+                cs = inj.require(inj.CERT_SORTER)
+            finally:
+                local_cache.max_age = None
+            return cs.is_valid() and cs.compliant_until is not None and tomorrow <= cs.compliant_until
+        except Exception as e:
+            log.debug("Unable to check compliance status before auto-heal: %s" % e)
+            return False
+
     def perform(self):
         # inject
         identity = inj.require(inj.IDENTITY)
         uuid = identity.uuid
+
+        # Compliance status is usually confirmed by local evaluation without
+        # contacting the server, so the consumer is fetched from the server only
+        # when healing is needed
+        today = datetime.datetime.now(certificate.GMT())
+        tomorrow = today + datetime.timedelta(days=1)
+        if self._is_valid_until(tomorrow):
+            log.debug(
+                "Entitlement auto healing was checked and entitlements are valid today %s and tomorrow %s"
+                % (today, tomorrow)
+            )
+            log.debug("Auto-heal check complete.")
+            return self.report
+
         consumer = self.uep.getConsumer(uuid)
 
         if "autoheal" not in consumer or not consumer["autoheal"]:
@@ -11,6 +11,8 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import importlib
+
 # Supported Features:
 IDENTITY = "IDENTITY"
 CERT_SORTER = "CERT_SORTER"
@@ -23,6 +25,7 @@ SYSPURPOSE_VALID_FIELDS_CACHE = "SYSPURPOSE_VALID_FIELDS_CACHE"
 SUPPORTED_RESOURCES_CACHE = "SUPPORTED_RESOURCES_CACHE"
 AVAILABLE_ENTITLEMENT_CACHE = "AVAILABLE_ENTITLEMENT_CACHE"
 ENTITLEMENT_STATUS_CACHE = "ENTITLEMENT_STATUS_CACHE"
+LOCAL_COMPLIANCE_CACHE = "LOCAL_COMPLIANCE_CACHE"
 POOL_STATUS_CACHE = "POOL_STATUS_CACHE"
 PROD_STATUS_CACHE = "PROD_STATUS_CACHE"
 OVERRIDE_STATUS_CACHE = "OVERRIDE_STATUS_CACHE"
@@ -38,6 +41,24 @@ CONTENT_ACCESS_CACHE = "CONTENT_ACCESS_CACHE"
 SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE = "SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE"
 
 
+class LazyProvider(object):
+    """
+    Provider given by the name of module and the name of class (or other
+    callable) in that module. The module is imported when the feature is
+    required for the first time, so that setting up of all features does
+    not import modules, which are not used by current process.
+    """
+
+    def __init__(self, module_name, attr_name):
+        self.module_name = module_name
+        self.attr_name = attr_name
+        self.singleton = False
+
+    def resolve(self):
+        module = importlib.import_module(self.module_name)
+        return getattr(module, self.attr_name)
+
+
 class FeatureBroker(object):
     """
     Tracks all configured features.
@@ -76,6 +97,13 @@ class FeatureBroker(object):
         except KeyError:
             raise KeyError("Unknown feature: %r" % feature)
 
+        if isinstance(provider, LazyProvider):
+            singleton = provider.singleton
+            provider = provider.resolve()
+            if not singleton and isinstance(provider, type):
+                provider = nonSingleton(provider)
+            self.providers[feature] = provider
+
         if isinstance(provider, type):
             self.providers[feature] = provider(*args, **kwargs)
         elif callable(provider):
@@ -110,6 +138,8 @@ def require(feature, *args, **kwargs):
 
 def provide(feature, provider, singleton=False):
     global FEATURES
-    if not singleton and isinstance(provider, type):
+    if isinstance(provider, LazyProvider):
+        provider.singleton = singleton
+    elif not singleton and isinstance(provider, type):
         provider = nonSingleton(provider)
     return FEATURES.provide(feature, provider)
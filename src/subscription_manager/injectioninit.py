@@ -15,33 +15,11 @@
 import subscription_manager.injection as inj
 
 
-from subscription_manager.cache import (
-    ProductStatusCache,
-    EntitlementStatusCache,
-    OverrideStatusCache,
-    ProfileManager,
-    InstalledProductsManager,
-    PoolTypeCache,
-    ReleaseStatusCache,
-    ContentAccessCache,
-    PoolStatusCache,
-    SyspurposeComplianceStatusCache,
-    SupportedResourcesCache,
-    AvailableEntitlementsCache,
-    CurrentOwnerCache,
-    SyspurposeValidFieldsCache,
-    ContentAccessModeCache,
-)
-
-from subscription_manager.cert_sorter import CertSorter
-from subscription_manager.certdirectory import EntitlementDirectory
-from subscription_manager.certdirectory import ProductDirectory
-from subscription_manager.facts import Facts
-from subscription_manager.identity import Identity
-from subscription_manager.validity import ValidProductDateRangeCalculator
-from subscription_manager.cp_provider import CPProvider
-from subscription_manager.plugins import PluginManager
-from subscription_manager.lock import ActionLock
+def _lazy(module_name, class_name):
+    return inj.LazyProvider(module_name, class_name)
+
+
+_CACHE = "subscription_manager.cache"
 
 
 def init_dep_injection():
@@ -53,43 +31,53 @@ def init_dep_injection():
     # Set up consumer identity as a singleton so we don't constantly re-load
     # it from disk. Call reload when anything changes and all references will be
     # updated.
-    inj.provide(inj.IDENTITY, Identity, singleton=True)
+    inj.provide(inj.IDENTITY, _lazy("subscription_manager.identity", "Identity"), singleton=True)
 
-    inj.provide(inj.PRODUCT_DATE_RANGE_CALCULATOR, ValidProductDateRangeCalculator)
+    inj.provide(
+        inj.PRODUCT_DATE_RANGE_CALCULATOR,
+        _lazy("subscription_manager.validity", "ValidProductDateRangeCalculator"),
+    )
 
-    inj.provide(inj.ENT_DIR, EntitlementDirectory, singleton=True)
-    inj.provide(inj.PROD_DIR, ProductDirectory, singleton=True)
+    inj.provide(
+        inj.ENT_DIR, _lazy("subscription_manager.certdirectory", "EntitlementDirectory"), singleton=True
+    )
+    inj.provide(inj.PROD_DIR, _lazy("subscription_manager.certdirectory", "ProductDirectory"), singleton=True)
 
     # FIXME: find a way to handle exceptions when looking for
     #        attributes of inj (can happen if yum has old inj module,
     #        but runs a new version of injectioninit...)
-    inj.provide(inj.ENTITLEMENT_STATUS_CACHE, EntitlementStatusCache, singleton=True)
-    inj.provide(inj.SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE, SyspurposeComplianceStatusCache, singleton=True)
-    inj.provide(inj.CONTENT_ACCESS_MODE_CACHE, ContentAccessModeCache, singleton=True)
-    inj.provide(inj.CURRENT_OWNER_CACHE, CurrentOwnerCache, singleton=True)
-    inj.provide(inj.SYSPURPOSE_VALID_FIELDS_CACHE, SyspurposeValidFieldsCache)
-    inj.provide(inj.SUPPORTED_RESOURCES_CACHE, SupportedResourcesCache, singleton=True)
-    inj.provide(inj.AVAILABLE_ENTITLEMENT_CACHE, AvailableEntitlementsCache, singleton=True)
-    inj.provide(inj.PROD_STATUS_CACHE, ProductStatusCache, singleton=True)
-    inj.provide(inj.OVERRIDE_STATUS_CACHE, OverrideStatusCache, singleton=True)
-    inj.provide(inj.RELEASE_STATUS_CACHE, ReleaseStatusCache, singleton=False)
-    inj.provide(inj.CONTENT_ACCESS_CACHE, ContentAccessCache, singleton=True)
-
-    inj.provide(inj.PROFILE_MANAGER, ProfileManager, singleton=True)
-    inj.provide(inj.INSTALLED_PRODUCTS_MANAGER, InstalledProductsManager, singleton=True)
-
-    inj.provide(inj.CP_PROVIDER, CPProvider, singleton=True)
-
-    inj.provide(inj.CERT_SORTER, CertSorter, singleton=True)
+    inj.provide(inj.ENTITLEMENT_STATUS_CACHE, _lazy(_CACHE, "EntitlementStatusCache"), singleton=True)
+    inj.provide(inj.LOCAL_COMPLIANCE_CACHE, _lazy(_CACHE, "LocalComplianceCache"), singleton=True)
+    inj.provide(
+        inj.SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE,
+        _lazy(_CACHE, "SyspurposeComplianceStatusCache"),
+        singleton=True,
+    )
+    inj.provide(inj.CONTENT_ACCESS_MODE_CACHE, _lazy(_CACHE, "ContentAccessModeCache"), singleton=True)
+    inj.provide(inj.CURRENT_OWNER_CACHE, _lazy(_CACHE, "CurrentOwnerCache"), singleton=True)
+    inj.provide(inj.SYSPURPOSE_VALID_FIELDS_CACHE, _lazy(_CACHE, "SyspurposeValidFieldsCache"))
+    inj.provide(inj.SUPPORTED_RESOURCES_CACHE, _lazy(_CACHE, "SupportedResourcesCache"), singleton=True)
+    inj.provide(inj.AVAILABLE_ENTITLEMENT_CACHE, _lazy(_CACHE, "AvailableEntitlementsCache"), singleton=True)
+    inj.provide(inj.PROD_STATUS_CACHE, _lazy(_CACHE, "ProductStatusCache"), singleton=True)
+    inj.provide(inj.OVERRIDE_STATUS_CACHE, _lazy(_CACHE, "OverrideStatusCache"), singleton=True)
+    inj.provide(inj.RELEASE_STATUS_CACHE, _lazy(_CACHE, "ReleaseStatusCache"), singleton=False)
+    inj.provide(inj.CONTENT_ACCESS_CACHE, _lazy(_CACHE, "ContentAccessCache"), singleton=True)
+
+    inj.provide(inj.PROFILE_MANAGER, _lazy(_CACHE, "ProfileManager"), singleton=True)
+    inj.provide(inj.INSTALLED_PRODUCTS_MANAGER, _lazy(_CACHE, "InstalledProductsManager"), singleton=True)
+
+    inj.provide(inj.CP_PROVIDER, _lazy("subscription_manager.cp_provider", "CPProvider"), singleton=True)
+
+    inj.provide(inj.CERT_SORTER, _lazy("subscription_manager.cert_sorter", "CertSorter"), singleton=True)
 
     # Set up plugin manager as a singleton.
     # FIXME: should we aggressively catch exceptions here? If we can't
     # create a PluginManager we should probably raise an exception all the way up
-    inj.provide(inj.PLUGIN_MANAGER, PluginManager, singleton=True)
+    inj.provide(inj.PLUGIN_MANAGER, _lazy("subscription_manager.plugins", "PluginManager"), singleton=True)
 
-    inj.provide(inj.POOL_STATUS_CACHE, PoolStatusCache, singleton=True)
-    inj.provide(inj.POOLTYPE_CACHE, PoolTypeCache, singleton=True)
-    inj.provide(inj.ACTION_LOCK, ActionLock)
+    inj.provide(inj.POOL_STATUS_CACHE, _lazy(_CACHE, "PoolStatusCache"), singleton=True)
+    inj.provide(inj.POOLTYPE_CACHE, _lazy(_CACHE, "PoolTypeCache"), singleton=True)
+    inj.provide(inj.ACTION_LOCK, _lazy("subscription_manager.lock", "ActionLock"))
 
     # see what happens with non singleton, callable
-    inj.provide(inj.FACTS, Facts)
+    inj.provide(inj.FACTS, _lazy("subscription_manager.facts", "Facts"))
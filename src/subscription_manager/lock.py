@@ -13,9 +13,10 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import errno
 import fcntl
 import os
-from threading import RLock as Mutex
+from threading import Condition, RLock as Mutex
 import time
 
 import logging
@@ -26,6 +27,14 @@ log = logging.getLogger(__name__)
 # acquire the lock.
 LOCK_WAIT_DURATION = 0.5
 
+# bounds of the interval used for polling flock() when waiting
+# for the lock with timeout
+FLOCK_POLL_MIN = 0.01
+FLOCK_POLL_MAX = 0.1
+
+SHARED = "shared"
+EXCLUSIVE = "exclusive"
+
 
 class LockFile(object):
     def __init__(self, path):
@@ -212,7 +221,284 @@ class Lock(object):
             pass
 
 
-class ActionLock(Lock):
+def lock_holders(path):
+    """
+    Try to find out which processes hold flock() lock on given file.
+    :return: list of (pid, mode) tuples; the list is empty, when holders cannot be found
+    """
+    try:
+        st = os.stat(path)
+        with open("/proc/locks", "r") as locks_file:
+            lines = locks_file.readlines()
+    except (IOError, OSError):
+        return []
+    holders = []
+    for line in lines:
+        # e.g.: "1: FLOCK  ADVISORY  WRITE 1234 fd:00:4567 0 EOF"
+        fields = line.split()
+        if len(fields) < 6 or fields[1] != "FLOCK":
+            continue
+        try:
+            _major, _minor, inode = fields[5].split(":")
+            if int(inode) != st.st_ino:
+                continue
+            mode = EXCLUSIVE if fields[3] == "WRITE" else SHARED
+            holders.append((int(fields[4]), mode))
+        except ValueError:
+            continue
+    return holders
+
+
+def process_name(pid):
+    try:
+        with open("/proc/%s/cmdline" % pid, "rb") as cmdline_file:
+            cmdline = cmdline_file.read().split(b"\0")
+    except (IOError, OSError):
+        return None
+    if not cmdline or not cmdline[0]:
+        return None
+    args = [arg.decode("utf-8", "replace") for arg in cmdline if arg]
+    # interpreted scripts (python3 /usr/bin/rhsmcertd-worker) are named by the script
+    if len(args) > 1 and os.path.basename(args[0]).startswith("python"):
+        return os.path.basename(args[1])
+    return os.path.basename(args[0])
+
+
+class _FlockState(object):
+    """
+    State of the flock() lock of one lock file shared by all FlockLock
+    objects of the process. flock() locks belong to open file descriptions,
+    so two descriptors of the same file opened by one process would conflict
+    with each other. The process has to hold only one of them to be
+    re-entrant like Lock.
+    """
+
+    def __init__(self):
+        self.fd = None
+        self.writable = False
+        self.depth = 0
+        # a thread of the process is waiting in flock()
+        self.locking = False
+        # protects the attributes above; it is never held while waiting in flock()
+        self.condition = Condition()
+
+
+_flock_states = {}
+_flock_states_mutex = Mutex()
+
+
+def _get_flock_state(path):
+    with _flock_states_mutex:
+        return _flock_states.setdefault(os.path.abspath(path), _FlockState())
+
+
+class FlockLock(object):
+    """
+    Inter-process lock implemented using kernel advisory lock (flock()).
+
+    The lock is held as long as the lock file is open, so it is released
+    by the kernel even when the holder dies and waiters are woken
+    immediately, when the lock is released. Like Lock, it is re-entrant
+    within one process, even when it is acquired using several FlockLock
+    objects of the same path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lockdir = None
+        self._state = _get_flock_state(path)
+        # how many times and how long in total we had to wait for the lock
+        self.wait_count = 0
+        self.wait_time = 0.0
+        self.last_wait_time = 0.0
+
+        lock_dir, _fn = os.path.split(self.path)
+        try:
+            if not os.path.exists(lock_dir):
+                os.makedirs(lock_dir)
+            self.lockdir = lock_dir
+        except Exception:
+            self.lockdir = None
+
+    @property
+    def fd(self):
+        return self._state.fd
+
+    @property
+    def depth(self):
+        return self._state.depth
+
+    def _open(self):
+        try:
+            return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), True
+        except OSError as err:
+            if err.errno not in (errno.EACCES, errno.EPERM, errno.EROFS):
+                raise
+        # flock() works also with read-only file descriptor
+        return os.open(self.path, os.O_RDONLY), False
+
+    def _flock(self, blocking, timeout):
+        """
+        Call flock() and wait, when it is requested.
+        :return: True, when the lock was acquired, False otherwise
+        """
+        if blocking is False:
+            timeout = 0
+        if timeout is None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            return True
+        deadline = time.monotonic() + timeout
+        interval = FLOCK_POLL_MIN
+        while True:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError as err:
+                if err.errno not in (errno.EAGAIN, errno.EACCES):
+                    raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, FLOCK_POLL_MAX)
+
+    def _holders_description(self):
+        holders = ["%s (%s, %s)" % (pid, process_name(pid), mode) for pid, mode in lock_holders(self.path)]
+        return ", ".join(holders) or "unknown process"
+
+    def _lock(self, blocking, timeout):
+        # Try it without waiting first, so we know if we have to wait at all
+        if self._flock(False, None):
+            return True
+        if blocking is False:
+            log.debug("Lock %s is held by %s" % (self.path, self._holders_description()))
+            return False
+        log.info("Waiting for lock %s held by %s" % (self.path, self._holders_description()))
+        start = time.monotonic()
+        acquired = self._flock(blocking, timeout)
+        waited = time.monotonic() - start
+        self.wait_count += 1
+        self.wait_time += waited
+        self.last_wait_time = waited
+        if acquired:
+            log.info("Acquired lock %s after %.3f s" % (self.path, waited))
+        else:
+            log.warning("Unable to acquire lock %s in %.3f s" % (self.path, waited))
+        return acquired
+
+    def _write_pid(self):
+        os.ftruncate(self.fd, 0)
+        os.lseek(self.fd, 0, os.SEEK_SET)
+        os.write(self.fd, str(os.getpid()).encode("utf-8"))
+
+    def _wait_for_other_thread(self, blocking, timeout):
+        """
+        Wait until no other thread of the process waits in flock(). The
+        condition of the state has to be held.
+        :return: False, when the other thread is still waiting in flock()
+        """
+        if blocking is False:
+            timeout = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._state.locking:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._state.condition.wait(remaining)
+        return True
+
+    def acquire(self, blocking=None, timeout=None):
+        """
+        The meaning of 'blocking' and the returned value is the same as
+        in Lock.acquire().
+
+        When 'timeout' (in seconds) is set, then we wait only for the given
+        time and we return False when the lock was not acquired in time.
+        """
+        if self.lockdir is None:
+            return
+        state = self._state
+        acquired = False
+        locking = False
+        try:
+            with state.condition:
+                if self._wait_for_other_thread(blocking, timeout):
+                    if state.depth > 0:
+                        state.depth += 1
+                        acquired = True
+                    else:
+                        if state.fd is None:
+                            state.fd, state.writable = self._open()
+                        state.locking = locking = True
+            if locking:
+                try:
+                    acquired = self._lock(blocking, timeout)
+                finally:
+                    with state.condition:
+                        state.locking = False
+                        state.condition.notify_all()
+                        if acquired:
+                            state.depth += 1
+                            if state.writable:
+                                self._write_pid()
+                        else:
+                            self._close()
+        except OSError as e:
+            log.exception(e)
+            with state.condition:
+                if state.depth == 0:
+                    self._close()
+
+        if blocking is not None or timeout is not None:
+            return acquired
+        return None
+
+    def release(self):
+        if self.lockdir is None:
+            return
+        state = self._state
+        with state.condition:
+            if state.depth == 0:
+                return
+            state.depth -= 1
+            if state.depth == 0:
+                self._close()
+
+    def _close(self):
+        """Close the lock file. The condition of the state has to be held."""
+        state = self._state
+        if state.fd is None:
+            return
+        try:
+            if state.writable:
+                # Do not leave stale pid in the lock file. The file is never
+                # removed, because it would race with other waiters.
+                os.ftruncate(state.fd, 0)
+            os.close(state.fd)
+        except OSError:
+            pass
+        state.fd = None
+
+    def acquired(self):
+        if self.lockdir is None:
+            return
+        with self._state.condition:
+            return self._state.depth > 0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class ActionLock(FlockLock):
+    """
+    Lock serializing actions changing the system (updates of entitlement
+    certificates, repositories, etc.) across rhsmcertd, subscription-manager,
+    dnf plugins and D-Bus services.
+    """
 
     PATH = "/run/rhsm/cert.pid"
 
@@ -17,70 +17,59 @@ import logging
 import sys
 
 from subscription_manager import managerlib
-from subscription_manager.cli import CLI
-from subscription_manager.cli_command.addons import AddonsCommand
-from subscription_manager.cli_command.attach import AttachCommand
-from subscription_manager.cli_command.autoheal import AutohealCommand
-from subscription_manager.cli_command.clean import CleanCommand
-from subscription_manager.cli_command.config import ConfigCommand
-from subscription_manager.cli_command.environments import EnvironmentsCommand
-from subscription_manager.cli_command.facts import FactsCommand
-from subscription_manager.cli_command.identity import IdentityCommand
-from subscription_manager.cli_command.import_cert import ImportCertCommand
-from subscription_manager.cli_command.list import ListCommand
-from subscription_manager.cli_command.override import OverrideCommand
-from subscription_manager.cli_command.owners import OwnersCommand
-from subscription_manager.cli_command.plugins import PluginsCommand
-from subscription_manager.cli_command.redeem import RedeemCommand
-from subscription_manager.cli_command.refresh import RefreshCommand
-from subscription_manager.cli_command.register import RegisterCommand
-from subscription_manager.cli_command.release import ReleaseCommand
-from subscription_manager.cli_command.remove import RemoveCommand
-from subscription_manager.cli_command.repos import ReposCommand
-from subscription_manager.cli_command.role import RoleCommand
-from subscription_manager.cli_command.service_level import ServiceLevelCommand
-from subscription_manager.cli_command.status import StatusCommand
-from subscription_manager.cli_command.syspurpose import SyspurposeCommand
-from subscription_manager.cli_command.unregister import UnRegisterCommand
-from subscription_manager.cli_command.usage import UsageCommand
-from subscription_manager.cli_command.version import VersionCommand
+from subscription_manager.cli import CLI, LazyCommand
 from subscription_manager.i18n import ugettext as _
 from subscription_manager.repolib import YumPluginManager
 
 log = logging.getLogger(__name__)
 
 
+# Modules of the commands are imported only when the command is used,
+# because importing all of them makes startup of every command slow.
+COMMANDS = [
+    LazyCommand("register", "subscription_manager.cli_command.register", "RegisterCommand"),
+    LazyCommand("unregister", "subscription_manager.cli_command.unregister", "UnRegisterCommand"),
+    LazyCommand("addons", "subscription_manager.cli_command.addons", "AddonsCommand"),
+    LazyCommand("config", "subscription_manager.cli_command.config", "ConfigCommand"),
+    LazyCommand("list", "subscription_manager.cli_command.list", "ListCommand"),
+    LazyCommand("identity", "subscription_manager.cli_command.identity", "IdentityCommand"),
+    LazyCommand("orgs", "subscription_manager.cli_command.owners", "OwnersCommand"),
+    LazyCommand("refresh", "subscription_manager.cli_command.refresh", "RefreshCommand"),
+    LazyCommand("clean", "subscription_manager.cli_command.clean", "CleanCommand"),
+    LazyCommand("redeem", "subscription_manager.cli_command.redeem", "RedeemCommand"),
+    LazyCommand("repos", "subscription_manager.cli_command.repos", "ReposCommand"),
+    LazyCommand("release", "subscription_manager.cli_command.release", "ReleaseCommand"),
+    LazyCommand("status", "subscription_manager.cli_command.status", "StatusCommand"),
+    LazyCommand("environments", "subscription_manager.cli_command.environments", "EnvironmentsCommand"),
+    LazyCommand("import", "subscription_manager.cli_command.import_cert", "ImportCertCommand"),
+    LazyCommand("service-level", "subscription_manager.cli_command.service_level", "ServiceLevelCommand"),
+    LazyCommand("version", "subscription_manager.cli_command.version", "VersionCommand"),
+    LazyCommand("remove", "subscription_manager.cli_command.remove", "RemoveCommand"),
+    LazyCommand("attach", "subscription_manager.cli_command.attach", "AttachCommand"),
+    LazyCommand("plugins", "subscription_manager.cli_command.plugins", "PluginsCommand"),
+    LazyCommand("auto-attach", "subscription_manager.cli_command.autoheal", "AutohealCommand"),
+    LazyCommand("repo-override", "subscription_manager.cli_command.override", "OverrideCommand"),
+    LazyCommand("role", "subscription_manager.cli_command.role", "RoleCommand"),
+    LazyCommand("usage", "subscription_manager.cli_command.usage", "UsageCommand"),
+    LazyCommand("facts", "subscription_manager.cli_command.facts", "FactsCommand"),
+    LazyCommand("syspurpose", "subscription_manager.cli_command.syspurpose", "SyspurposeCommand"),
+]
+
+
+def __getattr__(name):
+    """
+    Command classes used to be imported to this module. Keep them available
+    as attributes of this module, but import them only when they are used.
+    """
+    for lazy_cmd in COMMANDS:
+        if lazy_cmd.class_name == name:
+            return lazy_cmd.load()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
 class ManagerCLI(CLI):
     def __init__(self):
-        commands = [
-            RegisterCommand,
-            UnRegisterCommand,
-            AddonsCommand,
-            ConfigCommand,
-            ListCommand,
-            IdentityCommand,
-            OwnersCommand,
-            RefreshCommand,
-            CleanCommand,
-            RedeemCommand,
-            ReposCommand,
-            ReleaseCommand,
-            StatusCommand,
-            EnvironmentsCommand,
-            ImportCertCommand,
-            ServiceLevelCommand,
-            VersionCommand,
-            RemoveCommand,
-            AttachCommand,
-            PluginsCommand,
-            AutohealCommand,
-            OverrideCommand,
-            RoleCommand,
-            UsageCommand,
-            FactsCommand,
-            SyspurposeCommand,
-        ]
-        CLI.__init__(self, command_classes=commands)
+        CLI.__init__(self, command_classes=COMMANDS)
 
     def main(self):
         managerlib.check_identity_cert_perms()
@@ -32,6 +32,7 @@ from subscription_manager.injection import (
     CERT_SORTER,
     IDENTITY,
     ENTITLEMENT_STATUS_CACHE,
+    LOCAL_COMPLIANCE_CACHE,
     SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE,
     PROD_STATUS_CACHE,
     ENT_DIR,
@@ -982,6 +983,7 @@ def clean_all_data(backup=True):
     # and delete_cache is an instance method, so we need to call
     # the delete_cache on the instances created in injectioninit.
     require(ENTITLEMENT_STATUS_CACHE).delete_cache()
+    require(LOCAL_COMPLIANCE_CACHE).delete_cache()
     require(SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE).delete_cache()
     require(PROD_STATUS_CACHE).delete_cache()
     require(POOL_STATUS_CACHE).delete_cache()
@@ -13,9 +13,11 @@
 #
 import glob
 import inspect
+import json
 import logging
 import os
 import importlib.util
+import tempfile
 
 from iniparse import SafeConfigParser
 from iniparse.compat import NoSectionError, NoOptionError
@@ -41,6 +43,7 @@ API_VERSION = "1.1"
 
 DEFAULT_SEARCH_PATH = "/usr/share/rhsm-plugins/"
 DEFAULT_CONF_PATH = "/etc/rhsm/pluginconf.d/"
+DEFAULT_MANIFEST_FILE = "/var/lib/rhsm/cache/plugin_manifest.json"
 
 cfg = get_config_parser()
 
@@ -504,6 +507,22 @@ class PluginHookRunner(object):
             raise
 
 
+class LazyPluginHook(object):
+    """Placeholder for a hook of a plugin class, which was not imported yet.
+
+    PluginManager puts these into the list of hooks of a slot, when it
+    knows from the plugin manifest, that the plugin class has a hook for
+    that slot. The plugin module is imported when the slot is run.
+    """
+
+    def __init__(self, module_file, class_name):
+        self.module_file = module_file
+        self.class_name = class_name
+
+    def __repr__(self):
+        return "<LazyPluginHook %s in %s>" % (self.class_name, self.module_file)
+
+
 # NOTE: need to be super paranoid here about existing of cfg variables
 # BasePluginManager with our default config info
 class BasePluginManager(object):
@@ -546,6 +565,9 @@ class BasePluginManager(object):
         self._slot_to_funcs = {}
         self._slot_to_conduit = {}
 
+        # maps a plugin method to plugin_key of its class
+        self._hook_plugin_keys = {}
+
         # find our list of conduits
         self.conduits = self._get_conduits()
 
@@ -776,21 +798,13 @@ class BasePluginManager(object):
         if slot_name not in self._slot_to_funcs:
             raise SlotNameException(slot_name)
 
-        for func in self._slot_to_funcs[slot_name]:
-            module = inspect.getmodule(func)
-            func_module_name = getattr(func, "__module__")
-            if not func_module_name:
-                if module:
-                    func_module_name = module.__name__
-                else:
-                    func_module_name = "unknown_module"
-            func_class_name = func.__self__.__class__.__name__
-            plugin_key = ".".join([func_module_name, func_class_name])
-            log.debug("Running %s in %s" % (func.__name__, plugin_key))
-            # resolve slot_name to conduit
-            # FIXME: handle cases where we don't have a conduit for a slot_name
-            #   (should be able to handle this since we map those at the same time)
-            conduit = self._slot_to_conduit[slot_name]
+        # resolve slot_name to conduit
+        # FIXME: handle cases where we don't have a conduit for a slot_name
+        #   (should be able to handle this since we map those at the same time)
+        conduit = self._slot_to_conduit[slot_name]
+
+        for func in self.get_slot_hooks(slot_name):
+            log.debug("Running %s in %s" % (func.__name__, self._get_hook_plugin_key(func)))
 
             try:
                 # create a Conduit
@@ -808,6 +822,30 @@ class BasePluginManager(object):
             runner = PluginHookRunner(conduit_instance, func)
             yield runner
 
+    def get_slot_hooks(self, slot_name):
+        """Return list of plugin methods registered for slot_name."""
+        return self._slot_to_funcs[slot_name]
+
+    def _get_hook_plugin_key(self, func):
+        """Return plugin_key of the plugin class the hook func is bound to.
+
+        The key is computed only once for every hook.
+        """
+        if func in self._hook_plugin_keys:
+            return self._hook_plugin_keys[func]
+
+        func_module_name = getattr(func, "__module__")
+        if not func_module_name:
+            module = inspect.getmodule(func)
+            if module:
+                func_module_name = module.__name__
+            else:
+                func_module_name = "unknown_module"
+        func_class_name = func.__self__.__class__.__name__
+        plugin_key = ".".join([func_module_name, func_class_name])
+        self._hook_plugin_keys[func] = plugin_key
+        return plugin_key
+
     def _get_plugin_config(self, plugin_clazz, plugin_to_config_map=None):
         """Get a PluginConfig for plugin_class, creating it if need be.
 
@@ -864,14 +902,30 @@ class PluginManager(BasePluginManager):
 
     default_search_path = DEFAULT_SEARCH_PATH
     default_conf_path = DEFAULT_CONF_PATH
+    default_manifest_file = DEFAULT_MANIFEST_FILE
 
-    def __init__(self, search_path=None, plugin_conf_path=None):
+    def __init__(self, search_path=None, plugin_conf_path=None, manifest_file=None):
         """init PluginManager
 
+        When the plugin manifest (the list of plugin classes and their hooks
+        found in every plugin module) is up to date with the plugin modules
+        in search_path, the modules are not imported until one of their
+        hooks is run.
+
         Args:
             search_path: if not specified, use the configured 'pluginDir'
             plugin_conf_path: if not specified, use the configured 'pluginConfDir'
+            manifest_file: file with cached plugin manifest
         """
+        self.manifest_file = manifest_file or self.default_manifest_file
+        # map of module files to their entries in the manifest, None when the
+        # plugins were loaded without the manifest
+        self._manifest = None
+        # module files known from the manifest, which were not imported yet
+        self._lazy_module_files = set()
+        # errors of plugin modules, which could not be imported
+        self._module_file_errors = {}
+
         cfg_search_path = None
         cfg_conf_path = None
 
@@ -909,9 +963,197 @@ class PluginManager(BasePluginManager):
 
     def _get_modules(self):
         module_files = self._find_plugin_module_files(self.search_path)
+        self._manifest = self._read_manifest(module_files)
+        if self._manifest is not None:
+            log.debug("Using plugin manifest %s" % self.manifest_file)
+            return []
         plugin_modules = self._load_plugin_module_files(module_files)
         return plugin_modules
 
+    def _import_plugins(self):
+        if self._manifest is None:
+            super()._import_plugins()
+            self._write_manifest()
+            return
+
+        for module_file in sorted(self._manifest):
+            entry = self._manifest[module_file]
+            if "error" in entry:
+                log.error(entry["error"])
+                continue
+            if any(slots is None for slots in entry["classes"].values()):
+                # hooks of some class can't be found without importing it
+                self._lazy_module_files.add(module_file)
+                self._load_lazy_module(module_file)
+                continue
+            self._lazy_module_files.add(module_file)
+            self._add_lazy_hooks(module_file, entry)
+        log.debug("plugin modules waiting for import: %s" % sorted(self._lazy_module_files))
+
+    def _add_lazy_hooks(self, module_file, entry):
+        """Register hooks of enabled plugin classes of not imported module."""
+        for class_name in sorted(entry["classes"]):
+            plugin_key = ".".join([entry["module"], class_name])
+            try:
+                plugin_conf = PluginConfig(plugin_key, self.plugin_conf_path)
+                enabled = plugin_conf.is_plugin_enabled()
+            except PluginException as e:
+                # same as add_plugins_from_modules(), skip rest of the module
+                log.exception(e)
+                log.error(e)
+                return
+            if not enabled:
+                continue
+            for slot in entry["classes"][class_name]:
+                if slot in self._slot_to_funcs:
+                    self._slot_to_funcs[slot].append(LazyPluginHook(module_file, class_name))
+
+    def _load_lazy_module(self, module_file):
+        """Import plugin module and replace its LazyPluginHooks with real hooks."""
+        if module_file not in self._lazy_module_files:
+            return
+        self._lazy_module_files.discard(module_file)
+        log.debug("Importing plugin module %s" % module_file)
+
+        # collect hooks of the module separately, so they can be put to the
+        # same position, where the LazyPluginHooks are
+        slot_to_funcs = self._slot_to_funcs
+        self._slot_to_funcs = dict((slot, []) for slot in slot_to_funcs)
+        try:
+            module = self._load_plugin_module_file(module_file)
+            self.modules.append(module)
+            self.add_plugins_from_module(module)
+        except PluginException as e:
+            log.exception(e)
+            log.error(e)
+        finally:
+            module_slot_to_funcs = self._slot_to_funcs
+            self._slot_to_funcs = slot_to_funcs
+
+        for slot, funcs in slot_to_funcs.items():
+            new_funcs = []
+            inserted = False
+            for func in funcs:
+                if isinstance(func, LazyPluginHook) and func.module_file == module_file:
+                    if not inserted:
+                        new_funcs.extend(module_slot_to_funcs[slot])
+                        inserted = True
+                else:
+                    new_funcs.append(func)
+            if not inserted:
+                new_funcs.extend(module_slot_to_funcs[slot])
+            funcs[:] = new_funcs
+
+    def get_slot_hooks(self, slot_name):
+        for func in list(self._slot_to_funcs[slot_name]):
+            if isinstance(func, LazyPluginHook):
+                self._load_lazy_module(func.module_file)
+        return self._slot_to_funcs[slot_name]
+
+    def get_plugins(self):
+        # disabled plugins are reported too, so all modules have to be imported
+        for module_file in sorted(self._lazy_module_files):
+            self._load_lazy_module(module_file)
+        return super().get_plugins()
+
+    def _get_plugin_class_slots(self, plugin_clazz):
+        """Return list of slots plugin_clazz has hooks for.
+
+        Returns None, when the hooks can't be found without an instance
+        of the class.
+        """
+        if plugin_clazz.all_slots:
+            return None
+        for clazz in plugin_clazz.__mro__:
+            if clazz is not object and "__getattr__" in vars(clazz):
+                return None
+        slots = []
+        for slot in sorted(self._slot_to_conduit):
+            if callable(getattr(plugin_clazz, slot + "_hook", None)):
+                slots.append(slot)
+        return slots
+
+    def _get_known_slots(self):
+        """Return sorted list of slots of all conduits."""
+        # _get_modules() reads the manifest before _slot_to_conduit is populated
+        return sorted(set(slot for conduit in self._get_conduits() for slot in conduit.slots))
+
+    def _read_manifest(self, module_files):
+        """Return modules from the manifest, when it matches module_files."""
+        try:
+            with open(self.manifest_file, "r") as manifest_file:
+                manifest = json.load(manifest_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if (
+            manifest.get("api_version") != API_VERSION
+            or manifest.get("search_path") != self.search_path
+            or manifest.get("slots") != self._get_known_slots()
+        ):
+            return None
+        modules = manifest.get("modules")
+        if not isinstance(modules, dict) or sorted(modules) != sorted(module_files):
+            return None
+        for module_file in module_files:
+            try:
+                stat = os.stat(module_file)
+            except OSError:
+                return None
+            entry = modules[module_file]
+            if entry.get("mtime") != stat.st_mtime or entry.get("size") != stat.st_size:
+                return None
+        return modules
+
+    def _write_manifest(self):
+        """Write manifest of all plugin modules found in the search path."""
+        module_files = self._find_plugin_module_files(self.search_path)
+        manifest_dir = os.path.dirname(self.manifest_file)
+        if not module_files or not os.path.isdir(manifest_dir):
+            return
+
+        loaded_modules = dict((os.path.abspath(module.__file__), module) for module in self.modules)
+        modules = {}
+        for module_file in module_files:
+            try:
+                stat = os.stat(module_file)
+            except OSError:
+                return
+            module_name = os.path.basename(module_file).split(".py")[0]
+            entry = {"module": module_name, "mtime": stat.st_mtime, "size": stat.st_size}
+            if os.path.abspath(module_file) in loaded_modules:
+                module = loaded_modules[os.path.abspath(module_file)]
+                entry["classes"] = dict(
+                    (name, self._get_plugin_class_slots(clazz))
+                    for name, clazz in inspect.getmembers(module, inspect.isclass)
+                    if clazz.__module__ == module.__name__ and issubclass(clazz, SubManPlugin)
+                )
+            else:
+                entry["error"] = self._module_file_errors.get(
+                    module_file, "Plugin module %s can't be imported" % module_file
+                )
+            modules[module_file] = entry
+
+        manifest = {
+            "api_version": API_VERSION,
+            "search_path": self.search_path,
+            # hooks of known classes are listed only for slots known to this version
+            "slots": self._get_known_slots(),
+            "modules": modules,
+        }
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=manifest_dir, prefix=".plugin_manifest")
+            # mkstemp() creates the file readable only by owner
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(manifest, tmp_file)
+            os.rename(tmp_path, self.manifest_file)
+        except (IOError, OSError) as err:
+            log.debug("Unable to write plugin manifest %s: %s" % (self.manifest_file, err))
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     # subman specific module/plugin loading
     def _find_plugin_module_files(self, search_path):
         """Load all the plugins in the search path.
@@ -940,6 +1182,7 @@ class PluginManager(BasePluginManager):
                 modules.append(self._load_plugin_module_file(module_file))
             except PluginException as e:
                 log.error(e)
+                self._module_file_errors[module_file] = str(e)
 
         return modules
 
@@ -13,9 +13,11 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import collections
 from gzip import GzipFile
 import logging
 import os
+import time
 
 # for labelCompare
 import rpm
@@ -49,24 +51,57 @@ class ProductIdRepoMap(utils.DefaultDict):
 
 
 class ProductDatabase(object):
+    """
+    Database of product id -> [repo ids] mapping. The reverse repo id ->
+    {product ids} index is kept in memory and updated together with the
+    mapping, so products backed by given repo can be found without
+    iterating all products.
+
+    The database also keeps the time of the last check of all product
+    certs for removal and ids of products, whose removal was postponed.
+    This state is stored in its own file to keep productid.js compatible.
+    """
+
     def __init__(self):
         self.dir = DatabaseDirectory()
         self.content = ProductIdRepoMap()
+        self._repo_index = collections.defaultdict(set)
+        self.last_full_check = None
+        self.postponed = set()
         self.create()
 
     def add(self, product, repo):
         self.content[product].append(repo)
+        self._repo_index[repo].add(product)
 
-    # TODO: need way to delete one prod->repo map
     def delete(self, product):
         try:
-            del self.content[product]
+            repos = self.content.pop(product)
         except Exception:
-            pass
+            return
+        for repo in repos:
+            self._unindex(product, repo)
+
+    def _unindex(self, product, repo):
+        products = self._repo_index.get(repo)
+        if products is not None:
+            products.discard(product)
+            if not products:
+                del self._repo_index[repo]
+
+    def _build_index(self):
+        self._repo_index = collections.defaultdict(set)
+        for product, repos in self.content.items():
+            for repo in repos:
+                self._repo_index[repo].add(product)
 
     def find_repos(self, product):
         return self.content.get(product, None)
 
+    def find_products(self, repo):
+        """Return set of product ids backed by the repo"""
+        return set(self._repo_index.get(repo, ()))
+
     def create(self):
         if not os.path.exists(self.__fn()):
             self.write()
@@ -80,6 +115,17 @@ class ProductDatabase(object):
         except Exception:
             pass
         f.close()
+        self.read_check_state()
+
+    def read_check_state(self):
+        try:
+            with open(self.__check_fn()) as f:
+                d = json.load(f)
+            self.last_full_check = float(d["last_full_check"])
+            self.postponed = set(d.get("postponed", []))
+        except Exception:
+            self.last_full_check = None
+            self.postponed = set()
 
     def populate_content(self, db_dict):
         """Populate map with info from a productid -> [repoids] map.
@@ -92,18 +138,39 @@ class ProductDatabase(object):
                 self.content[productid].append(repo_data)
             else:
                 self.content[productid] = repo_data
+        self._build_index()
 
     def write(self):
-        f = open(self.__fn(), "w")
+        # The database is written to temporary file, which replaces the
+        # database only when it was written completely
+        fn = self.__fn()
+        tmp_fn = "%s.tmp" % fn
+        f = open(tmp_fn, "w")
         try:
             json.dump(self.content, f, indent=2, default=json.encode)
         except Exception:
-            pass
+            f.close()
+            os.unlink(tmp_fn)
+            return
         f.close()
+        os.replace(tmp_fn, fn)
+
+    def write_check_state(self):
+        fn = self.__check_fn()
+        tmp_fn = "%s.tmp" % fn
+        try:
+            with open(tmp_fn, "w") as f:
+                json.dump({"last_full_check": self.last_full_check, "postponed": sorted(self.postponed)}, f)
+            os.replace(tmp_fn, fn)
+        except (OSError, TypeError, ValueError) as err:
+            log.debug("Unable to write state of product cert check: %s" % err)
 
     def __fn(self):
         return self.dir.abspath("productid.js")
 
+    def __check_fn(self):
+        return self.dir.abspath("productid_check.json")
+
 
 class ComparableMixin(object):
     """Needs compare_keys to be implemented."""
@@ -312,6 +379,11 @@ class ProductManager(object):
 
     PRODUCTID = "productid"
 
+    # Certs are checked for removal only when their repos were changed by
+    # the transaction, if all certs were checked within this number of seconds.
+    # Otherwise all certs are checked to detect e.g. packages removed by rpm.
+    FULL_CHECK_INTERVAL = 24 * 60 * 60
+
     def __init__(self, product_dir=None, product_db=None):
 
         self.pdir = product_dir
@@ -364,7 +436,7 @@ class ProductManager(object):
 
         return temp_disabled
 
-    def update(self, enabled, active, tracks_repos):
+    def update(self, enabled, active, tracks_repos, changed_repos=None):
         # populate the temp_disabled list so update_remove has it
         # this could likely happen later...
         temp_disabled_repos = self.find_temp_disabled_repos(enabled)
@@ -380,7 +452,7 @@ class ProductManager(object):
                 # Check that we have either active repos
                 # or that we have temp_disabled_repos
                 # See bz 1222627
-                self.update_removed(active, temp_disabled_repos)
+                self.update_removed(active, temp_disabled_repos, changed_repos)
 
         # TODO: it would probably be useful to keep track of
         # the state a bit, so we can report what we did
@@ -435,6 +507,7 @@ class ProductManager(object):
             have to obsolete some deprecated certs
         """
         log.debug("Checking for product id certs to install or update.")
+        db_updated = False
         products_to_install = []
         products_to_update_db = []
         products_installed = []
@@ -482,7 +555,7 @@ class ProductManager(object):
                         pc.delete()
                         self.pdir.refresh()  # must refresh to see the removal of the cert
                         self.db.delete(pc.products[0].id)
-                        self.db.write()
+                        db_updated = True
 
             # if installing desktop cert, see if workstation exists on disk and skip
             # the write if so:
@@ -544,7 +617,6 @@ class ProductManager(object):
         products_to_update_db = self._desktop_workstation_cleanup(products_to_update_db)
         products_to_update = self._desktop_workstation_cleanup(products_to_update)
 
-        db_updated = False
         for (product, repo) in products_to_update_db:
             # known_repos is None means we have no repo info at all
             log.info("Updating product db with %s -> %s" % (product.id, repo))
@@ -597,9 +669,11 @@ class ProductManager(object):
             fn = "%s.pem" % product.id
             path = self.pdir.abspath(fn)
             cert.write(path)
-            self.pdir.refresh()
             log.info("Installed product cert %s: %s %s" % (product.id, product.name, cert.path))
             products_installed.append(cert)
+        if products_installed:
+            # refresh only once to see all written certs
+            self.pdir.refresh()
         return products_installed
 
     def _workstation_cert_exists(self):
@@ -631,7 +705,7 @@ class ProductManager(object):
     # We should only delete productcerts if there are no
     # packages from that repo installed (not "active")
     # and we have the product cert installed.
-    def update_removed(self, active, temp_disabled_repos=None):
+    def update_removed(self, active, temp_disabled_repos=None, changed_repos=None):
         """remove product certs for inactive products
 
         For each installed product cert, check to see if we still have
@@ -650,6 +724,11 @@ class ProductManager(object):
         Args:
             active: a set of repo name strings of the repos that installed
                     packages were installed from
+            changed_repos: optional set of repo names, whose installed packages
+                    were changed (e.g. by dnf transaction). When it is set and
+                    all product certs were checked within FULL_CHECK_INTERVAL,
+                    then only product certs backed by these repos and product
+                    certs with postponed removal are checked.
         Side effects:
             deletes certs that need to be deleted
         """
@@ -660,12 +739,31 @@ class ProductManager(object):
 
         log.debug("Temporary disabled repos: %s" % temp_disabled_repos)
 
+        now = time.time()
+        last_full_check = self.db.last_full_check
+        changed_products = None
+        if (
+            changed_repos is not None
+            and last_full_check is not None
+            and 0 <= now - last_full_check < self.FULL_CHECK_INTERVAL
+        ):
+            changed_products = set(self.db.postponed)
+            for repo in changed_repos:
+                changed_products |= self.db.find_products(repo)
+            log.debug("Products backed by changed repos or with postponed removal: %s", changed_products)
+            if not changed_products:
+                return
+
+        postponed = set()
         disabled_repos = self.find_disabled_repos()
 
         for cert in self.pdir.list():
             product = cert.products[0]
             prod_hash = product.id
 
+            if changed_products is not None and prod_hash not in changed_products:
+                continue
+
             # Protect all product certificates in /etc/pki/product-default
             # See: BZ: 1526622
             if cert.path.startswith(DEFAULT_PRODUCT_CERT_DIR):
@@ -693,6 +791,7 @@ class ProductManager(object):
                 if repo in self.meta_data_errors:
                     log.debug("%s has meta-data errors. Not deleting product cert %s.", repo, prod_hash)
                     delete_product_cert = False
+                    postponed.add(prod_hash)
                     continue
 
                 # If product id maps to a repo that we know is disabled, don't delete it.
@@ -726,21 +825,36 @@ class ProductManager(object):
             if delete_product_cert:
                 certs_to_delete.append((product, cert))
 
+        # Removal of products not checked now stays postponed
+        if changed_products is not None:
+            postponed |= set(self.db.postponed) - changed_products
+        else:
+            self.db.last_full_check = now
+        self.db.postponed = postponed
+        self.db.write_check_state()
+
+        if not certs_to_delete:
+            return
+
         # TODO: plugin hook for pre_product_id_delete
         for product, cert in certs_to_delete:
             log.debug("None of the repos for %s are active: %s", product.id, self.db.find_repos(product.id))
             log.info("product cert %s for %s is being deleted" % (product.id, product.id))
             cert.delete()
-            self.pdir.refresh()
             # TODO: plugin hook for post_product_id_delete
 
+        # All certs are deleted, so the directory is refreshed and the database
+        # is written only once
+        self.pdir.refresh()
+        for product, cert in certs_to_delete:
             # it should be safe to delete it's entry now, we either don't
             # know anything about it's repos, it doesnt have any, or none
             # of the repos are active
             self.db.delete(product.id)
-            self.db.write()
+        self.db.write()
 
-    def _get_cert(self, filename):
+    @staticmethod
+    def _read_pem(filename):
         if filename.endswith(".gz"):
             f = GzipFile(filename)
         else:
@@ -749,12 +863,16 @@ class ProductManager(object):
             pem = f.read()
             if type(pem) == bytes:
                 pem = pem.decode("utf-8")
-            cert = create_from_pem(pem)
-            cert.pem = pem
-            return cert
+            return pem
         finally:
             f.close()
 
+    def _get_cert(self, filename):
+        pem = self._read_pem(filename)
+        cert = create_from_pem(pem)
+        cert.pem = pem
+        return cert
+
 
 if __name__ == "__main__":
     from subscription_manager.injectioninit import init_dep_injection
@@ -16,7 +16,9 @@
 #
 
 import logging
+import queue
 import socket
+from concurrent.futures import ThreadPoolExecutor
 
 import http.client
 from rhsm.https import ssl
@@ -27,6 +29,7 @@ import rhsm.config
 from subscription_manager import injection as inj
 from subscription_manager import listing
 from subscription_manager import rhelproduct
+from subscription_manager.cache import ContentCertAffinityCache
 from subscription_manager.i18n import ugettext as _
 
 log = logging.getLogger(__name__)
@@ -84,11 +87,15 @@ class ApiReleaseVersionProvider(object):
 
 
 class CdnReleaseVersionProvider(object):
+    # Maximal number of listing files downloaded at the same time
+    MAX_WORKERS = 4
+
     def __init__(self):
         self.entitlement_dir = inj.require(inj.ENT_DIR)
         self.product_dir = inj.require(inj.PROD_DIR)
         self.cp_provider = inj.require(inj.CP_PROVIDER)
         self.content_connection = self.cp_provider.get_content_connection()
+        self.cert_affinity = ContentCertAffinityCache()
 
     def get_releases(self):
         # cdn base url
@@ -121,8 +128,9 @@ class CdnReleaseVersionProvider(object):
         sca_entitlements = self.entitlement_dir.list_with_sca_mode()
         entitlements.extend(sca_entitlements)
 
-        listings = []
-        ent_cert_key_pairs = set()
+        # Only cert-key pairs of entitlements providing the content are
+        # used for downloading its listing file
+        listings = {}
         for entitlement in entitlements:
             contents = entitlement.content
             for content in contents:
@@ -132,31 +140,15 @@ class CdnReleaseVersionProvider(object):
                     continue
                 if self._is_correct_rhel(release_product.provided_tags, content.required_tags):
                     listing_path = self._build_listing_path(content.url)
-                    listings.append(listing_path)
-                    ent_cert_key_pairs.add((entitlement.path, entitlement.key_path()))
+                    listings.setdefault(listing_path, set()).add((entitlement.path, entitlement.key_path()))
 
         # FIXME: not sure how to get the "base" content if we have multiple
         # entitlements for a product
 
-        # for a entitlement, grant the corresponding entitlement cert
-        # use it for this connection
-
         # hmm. We are really only supposed to have one product
         # with one content with one listing file. We shall see.
         releases = []
-        listings = sorted(set(listings))
-        for listing_path in listings:
-            try:
-                data = self.content_connection.get_versions(
-                    path=listing_path, cert_key_pairs=ent_cert_key_pairs
-                )
-            except (socket.error, http.client.HTTPException, ssl.SSLError, NoValidEntitlement) as e:
-                # content connection doesn't handle any exceptions
-                # and the code that invokes this doesn't either, so
-                # swallow them here.
-                log.exception(e)
-                continue
-
+        for data in self._get_listings(listings):
             # any non 200 response on fetching the release version
             # listing file returns a None here
             if not data:
@@ -170,6 +162,72 @@ class CdnReleaseVersionProvider(object):
         releases_set = sorted(set(releases))
         return releases_set
 
+    def _get_listings(self, listings):
+        """
+        Download listing files concurrently. Every thread uses its own copy
+        of content connection.
+        :param listings: dictionary {listing path: set of cert-key pairs}
+        :return: list of listing files data
+        """
+        if not listings:
+            return []
+        self.cert_affinity.read_cache_only()
+        listing_paths = sorted(listings)
+        workers = min(len(listing_paths), self.MAX_WORKERS)
+
+        connection_copies = [self.content_connection.copy() for _ in range(workers - 1)]
+        connections = queue.Queue()
+        for content_connection in [self.content_connection] + connection_copies:
+            connections.put(content_connection)
+
+        def get_listing(listing_path):
+            content_connection = connections.get()
+            try:
+                return self._get_listing(content_connection, listing_path, listings[listing_path])
+            finally:
+                connections.put(content_connection)
+
+        try:
+            if workers == 1:
+                results = [get_listing(listing_paths[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(get_listing, listing_paths))
+        finally:
+            for content_connection in connection_copies:
+                content_connection.close()
+
+        for listing_path, (_data, cert_key_pair) in zip(listing_paths, results):
+            if cert_key_pair is not None:
+                self.cert_affinity.remember(self._listing_prefix(listing_path), cert_key_pair)
+        self.cert_affinity.write_cache()
+        return [data for data, _cert_key_pair in results]
+
+    def _get_listing(self, content_connection, listing_path, cert_key_pairs):
+        """
+        Download one listing file. Cert-key pair, which worked last time
+        for the content, is tried first.
+        :return: tuple: data of listing file and cert-key pair, which was accepted
+        """
+        cert_key_pairs = self.cert_affinity.sort_cert_key_pairs(
+            self._listing_prefix(listing_path), cert_key_pairs
+        )
+        try:
+            data = content_connection.get_versions(path=listing_path, cert_key_pairs=cert_key_pairs)
+        except (socket.error, http.client.HTTPException, ssl.SSLError, NoValidEntitlement) as e:
+            # content connection doesn't handle any exceptions
+            # and the code that invokes this doesn't either, so
+            # swallow them here.
+            log.exception(e)
+            return None, None
+        if not data:
+            return data, None
+        return data, getattr(content_connection, "last_cert_key_pair", None)
+
+    @staticmethod
+    def _listing_prefix(listing_path):
+        return listing_path[: -len("listing")]
+
     def _build_listing_path(self, content_url):
         listing_parts = content_url.split("$releasever", 1)
         listing_base = listing_parts[0]
@@ -17,8 +17,11 @@
 # See http://stackoverflow.com/a/29832646/6124862 for more details
 import sys
 
+import os
+import random
 import signal
 import logging
+import time
 import dbus.mainloop.glib
 import base64
 from typing import Union
@@ -33,6 +36,7 @@ from subscription_manager.action_client import HealingActionClient, ActionClient
 from subscription_manager import managerlib
 from subscription_manager.identity import ConsumerIdentity
 from subscription_manager.i18n_argparse import ArgumentParser, USAGE
+import argparse
 from argparse import SUPPRESS
 from subscription_manager.utils import generate_correlation_id
 
@@ -44,8 +48,25 @@ from rhsmlib.services.register import RegisterService
 
 init_dep_injection()
 
+log = logging.getLogger("rhsm-app." + __name__)
+
+# Files with timestamps of next runs; they are shared with rhsmcertd
+NEXT_CERT_UPDATE_FILE = "/run/rhsm/next_cert_check_update"
+NEXT_AUTO_ATTACH_UPDATE_FILE = "/run/rhsm/next_auto_attach_update"
+NEXT_AUTO_REGISTER_UPDATE_FILE = "/run/rhsm/next_auto_register_update"
+
+# Delay of the first checks after start of the persistent worker (seconds)
+INITIAL_DELAY_SECONDS = 120
+
+MAX_AUTO_REGISTER_ATTEMPTS = 3
+
+# Set, when the worker was asked to terminate
+terminating = False
+
 
 def exit_on_signal(_signumber, _stackframe):
+    global terminating
+    terminating = True
     sys.exit(0)
 
 
@@ -198,7 +219,8 @@ def _main(options, log):
     print(_("Updating entitlement certificates & repositories"))
 
     cp = cp_provider.get_consumer_auth_cp()
-    # pre-load supported resources; serves as a way of failing before locking the repos
+    # pre-load supported resources; serves as a way of failing before locking the repos,
+    # when they are not in the cache file shared with other processes
     cp.supports_resource(None)
 
     try:
@@ -207,7 +229,9 @@ def _main(options, log):
         else:
             action_client = ActionClient()
 
-        action_client.update(options.autoheal)
+        # All sync steps of one cycle share consumer and owner documents
+        with cp.request_scope():
+            action_client.update(options.autoheal)
 
         for update_report in action_client.update_reports:
             # FIXME: make sure we don't get None reports
@@ -257,10 +281,320 @@ def _main(options, log):
         raise ge
 
 
+def _run(options, log):
+    """
+    Run one update (or auto-registration) and return its exit status
+    """
+    try:
+        _main(options, log)
+    except SystemExit as se:
+        # Persistent worker has to exit, when it gets SIGTERM during update
+        if terminating:
+            raise
+        # sys.exit triggers an exception in older Python versions, which
+        # in this case  we can safely ignore as we do not want to log the
+        # stack trace. We need to check the code, since we want to signal
+        # exit with failure to the caller. Otherwise, we will exit with 0
+        if se.code:
+            return -1
+    except Exception as e:
+        log.error("Error while updating certificates using daemon")
+        print(_("Unable to update entitlement certificates and repositories"))
+        log.exception(e)
+        return -1
+    return 0
+
+
+def _get_rss():
+    """
+    :return: resident set size of this process in bytes or None, when it is not known
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+
+def _get_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class WorkerTask(object):
+    """
+    One periodic action of persistent worker (cert check, auto-attach or auto-registration)
+    """
+
+    def __init__(
+        self, name, interval, next_update_file, autoheal=False, auto_register=False, max_attempts=None
+    ):
+        self.name = name
+        self.interval = interval
+        self.next_update_file = next_update_file
+        self.autoheal = autoheal
+        self.auto_register = auto_register
+        self.max_attempts = max_attempts
+        self.attempts = 0
+        self.next_run = None
+
+    def options(self):
+        return argparse.Namespace(autoheal=self.autoheal, force=False, auto_register=self.auto_register)
+
+    def schedule(self, delay, now=None):
+        """
+        Schedule next run of the task and record its time to the file read by other tools
+        """
+        if now is None:
+            now = time.time()
+        self.next_run = now + delay
+        try:
+            with open(self.next_update_file, "w") as update_file:
+                update_file.write("%d" % self.next_run)
+        except (IOError, OSError) as err:
+            log.warning("Unable to write timestamp to %s: %s" % (self.next_update_file, err))
+
+    def scheduled_run(self):
+        """
+        :return: time of next run recorded in the file or None
+        """
+        try:
+            with open(self.next_update_file) as update_file:
+                return float(update_file.read().strip())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def finished(self, status):
+        """
+        Process result of the run.
+        :return: True, when the task should be run again
+        """
+        if status == 0:
+            log.info("(%s) Finished successfully." % self.name)
+        else:
+            log.warning("(%s) Failed (%d), retry will occur on next run." % (self.name, status))
+        if not self.auto_register:
+            return True
+        # Auto-registration is not needed anymore, when it succeeded
+        if status == 0:
+            return False
+        self.attempts += 1
+        if self.attempts >= self.max_attempts:
+            log.warning(
+                "(%s) The number of attempts reached the max limit: %d" % (self.name, self.max_attempts)
+            )
+            return False
+        return True
+
+
+class PersistentWorker(object):
+    """
+    Resident worker running periodic tasks of rhsmcertd in-process. Connections,
+    certificate directories and plugins are kept between runs. The worker
+    replaces itself with a fresh process, when it uses too much memory or
+    when configuration file was changed.
+    """
+
+    def __init__(self, tasks, splay=True, run_now=False, resume=False, memory_limit=None, argv=None):
+        self.tasks = tasks
+        self.splay = splay
+        self.run_now = run_now
+        self.resume = resume
+        self.memory_limit = memory_limit
+        self.argv = argv if argv is not None else list(sys.argv)
+        self._mtimes = {}
+        self.config_file = config.get_config_parser().config_file
+
+    def initial_schedule(self):
+        now = time.time()
+        for task in self.tasks:
+            if self.resume:
+                scheduled_run = task.scheduled_run()
+                if scheduled_run is not None:
+                    task.schedule(max(0, scheduled_run - now), now=now)
+                    continue
+            if self.run_now:
+                delay = 0
+            else:
+                offset = random.randint(0, task.interval) if self.splay else 0
+                delay = INITIAL_DELAY_SECONDS + offset
+                log.info(
+                    "Waiting %.1f minutes plus %d splay seconds [%d seconds total] "
+                    "before performing first %s."
+                    % (INITIAL_DELAY_SECONDS / 60.0, offset, delay, task.name.lower())
+                )
+            task.schedule(delay, now=now)
+        # Remember state of files, which are checked before every run
+        self._changed_paths()
+
+    @staticmethod
+    def _product_dir_paths():
+        prod_dir = inj.require(inj.PROD_DIR)
+        paths = [prod_dir.path]
+        default_prod_dir = getattr(prod_dir, "default_prod_dir", None)
+        if default_prod_dir is not None:
+            paths.append(default_prod_dir.path)
+        return paths
+
+    def _changed_paths(self):
+        """
+        :return: set of watched paths, which were changed since last call
+        """
+        paths = [self.config_file, ConsumerIdentity.certpath(), inj.require(inj.ENT_DIR).path]
+        paths.extend(self._product_dir_paths())
+        changed = set()
+        for path in paths:
+            mtime = _get_mtime(path)
+            if path in self._mtimes and self._mtimes[path] != mtime:
+                changed.add(path)
+            self._mtimes[path] = mtime
+        return changed
+
+    def refresh(self):
+        """
+        Drop cached data, which are not valid anymore, before next run.
+        """
+        changed = self._changed_paths()
+        if ConsumerIdentity.certpath() in changed:
+            log.debug("Consumer certificate changed, reloading identity")
+            inj.require(inj.IDENTITY).reload()
+            cp_provider = inj.require(inj.CP_PROVIDER)
+            cp_provider.close_all_connections()
+            cp_provider.clean()
+        ent_dir = inj.require(inj.ENT_DIR)
+        if ent_dir.path in changed:
+            ent_dir.refresh()
+        if changed.intersection(self._product_dir_paths()):
+            inj.require(inj.PROD_DIR).refresh()
+
+    def should_restart(self):
+        """
+        The worker is restarted, when it uses too much memory or when configuration
+        file was changed, because configuration is read only during start.
+        """
+        if self._mtimes.get(self.config_file) != _get_mtime(self.config_file):
+            log.info("Configuration file %s changed, restarting worker" % self.config_file)
+            return True
+        rss = _get_rss()
+        if self.memory_limit and rss is not None and rss > self.memory_limit:
+            log.info(
+                "Worker uses %d bytes of memory (limit %d), restarting worker" % (rss, self.memory_limit)
+            )
+            return True
+        return False
+
+    def restart(self):
+        """
+        Replace this process with a new worker. The new worker continues with the current schedule.
+        """
+        try:
+            inj.require(inj.CP_PROVIDER).close_all_connections()
+        except Exception as err:
+            log.debug("Unable to close connections: %s" % err)
+        argv = [arg for arg in self.argv if arg != "--resume"] + ["--resume"]
+        logging.shutdown()
+        os.execv(sys.executable, [sys.executable] + argv)
+
+    def run_task(self, task):
+        self.refresh()
+        log.info("(%s) Running in persistent worker" % task.name)
+        status = _run(task.options(), log)
+        if task.finished(status):
+            task.schedule(task.interval)
+        else:
+            self.tasks.remove(task)
+
+    def run(self):
+        self.initial_schedule()
+        while self.tasks:
+            task = min(self.tasks, key=lambda t: t.next_run)
+            delay = task.next_run - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self.run_task(task)
+            except Exception as e:
+                # Something went wrong outside of update itself; start again with clean state
+                log.exception(e)
+                task.schedule(task.interval)
+                self.restart()
+            if self.should_restart():
+                self.restart()
+        log.info("No task left to run, persistent worker is exiting")
+
+
+def _get_config_int(cfg, option):
+    """
+    Positive integer from rhsmcertd section of rhsm.conf or its default value
+    """
+    try:
+        value = cfg.get_int("rhsmcertd", option)
+    except ValueError:
+        value = None
+    if value is None or value <= 0:
+        value = int(config.RHSMCERTD_DEFAULTS[option])
+    return value
+
+
+def _get_interval(value, cfg, option):
+    """
+    Interval in seconds given on command line (by rhsmcertd) or from rhsm.conf (in minutes)
+    """
+    if value is not None and value > 0:
+        return value
+    return _get_config_int(cfg, option) * 60
+
+
+def _persistent_main(options):
+    # exit on SIGTERM, otherwise finally statements don't run
+    signal.signal(signal.SIGTERM, exit_on_signal)
+    cfg = config.get_config_parser()
+
+    tasks = [
+        WorkerTask(
+            "Cert Check",
+            _get_interval(options.cert_check_interval, cfg, "certcheckinterval"),
+            NEXT_CERT_UPDATE_FILE,
+        ),
+        WorkerTask(
+            "Auto-attach",
+            _get_interval(options.auto_attach_interval, cfg, "autoattachinterval"),
+            NEXT_AUTO_ATTACH_UPDATE_FILE,
+            autoheal=True,
+        ),
+    ]
+    if options.auto_register:
+        tasks.append(
+            WorkerTask(
+                "Auto-registration",
+                _get_interval(options.auto_register_interval, cfg, "auto_registration_interval"),
+                NEXT_AUTO_REGISTER_UPDATE_FILE,
+                auto_register=True,
+                max_attempts=MAX_AUTO_REGISTER_ATTEMPTS,
+            )
+        )
+
+    splay = not options.no_splay and cfg.get("rhsmcertd", "splay") != "0"
+    worker = PersistentWorker(
+        tasks,
+        splay=splay,
+        run_now=options.now,
+        resume=options.resume,
+        memory_limit=_get_config_int(cfg, "worker_memory_limit") * 1024 * 1024,
+    )
+    worker.run()
+
+
 def main():
     logutil.init_logger()
     log = logging.getLogger("rhsm-app." + __name__)
 
+    # Nobody waits for results of rhsmcertd-worker, so it can retry
+    # requests failed due to unreachable server
+    connection.RetryPolicy.retry_connection_errors = True
+
     parser = ArgumentParser(usage=USAGE)
     parser.add_argument(
         "--autoheal",
@@ -278,20 +612,31 @@ def main():
         help="perform auto-registration",
     )
 
+    parser.add_argument(
+        "--persistent",
+        dest="persistent",
+        action="store_true",
+        default=False,
+        help="keep running and perform periodic checks in-process",
+    )
+    parser.add_argument(
+        "--cert-check-interval", dest="cert_check_interval", type=int, default=None, help=SUPPRESS
+    )
+    parser.add_argument(
+        "--auto-attach-interval", dest="auto_attach_interval", type=int, default=None, help=SUPPRESS
+    )
+    parser.add_argument(
+        "--auto-register-interval", dest="auto_register_interval", type=int, default=None, help=SUPPRESS
+    )
+    parser.add_argument("--no-splay", dest="no_splay", action="store_true", default=False, help=SUPPRESS)
+    parser.add_argument("--now", dest="now", action="store_true", default=False, help=SUPPRESS)
+    parser.add_argument("--resume", dest="resume", action="store_true", default=False, help=SUPPRESS)
+
     (options, args) = parser.parse_known_args()
-    try:
-        _main(options, log)
-    except SystemExit as se:
-        # sys.exit triggers an exception in older Python versions, which
-        # in this case  we can safely ignore as we do not want to log the
-        # stack trace. We need to check the code, since we want to signal
-        # exit with failure to the caller. Otherwise, we will exit with 0
-        if se.code:
-            sys.exit(-1)
-    except Exception as e:
-        log.error("Error while updating certificates using daemon")
-        print(_("Unable to update entitlement certificates and repositories"))
-        log.exception(e)
+    if options.persistent:
+        _persistent_main(options)
+        return
+    if _run(options, log):
         sys.exit(-1)
 
 
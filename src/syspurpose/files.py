@@ -20,6 +20,7 @@ import logging
 import json
 import os
 import errno
+import hashlib
 import io
 
 from syspurpose.utils import create_dir, create_file, write_to_file_utf8
@@ -244,6 +245,10 @@ class SyncedStore(object):
     PATH = USER_SYSPURPOSE
     CACHE_PATH = CACHED_SYSPURPOSE
 
+    # Hash of local, cached and remote contents of the last sync, which did
+    # not change anything. Sync of the same contents is skipped.
+    _synced_hash = None
+
     def __init__(self, uep, on_changed=None, consumer_uuid=None, use_valid_fields=False):
         """
         Initialization of SyncedStore
@@ -300,16 +305,38 @@ class SyncedStore(object):
         local_contents = self.get_local_contents()
         cached_contents = self.get_cached_contents()
 
+        contents_hash = self._content_hash(
+            self.consumer_uuid, local_contents, cached_contents, remote_contents
+        )
+        if contents_hash == SyncedStore._synced_hash:
+            log.debug("System purpose was not changed since the last sync, skipping merge.")
+            self.changed = False
+            return SyncResult(cached_contents, True, False, False)
+
         result = self.merge(local=local_contents, remote=remote_contents, base=cached_contents)
 
         local_result = {key: result[key] for key in result if result[key]}
 
-        sync_result = SyncResult(
-            result,
-            (remote_contents == result) or self.update_remote(result),
-            self.update_local(local_result),
-            self.update_cache(result),
-        )
+        remote_changed = (remote_contents == result) or self.update_remote(result)
+
+        # Files are rewritten only, when their content was changed, because
+        # every write is reported by file monitor of rhsm.service
+        local_changed = self._content_hash(local_result) != self._content_hash(local_contents)
+        if local_changed:
+            self.update_local(local_result)
+        else:
+            self.local_contents = local_result
+
+        cached_changed = self._content_hash(result) != self._content_hash(cached_contents)
+        if cached_changed:
+            self.update_cache(result)
+        else:
+            self.cache_contents = result
+
+        if remote_contents == result and not local_changed and not cached_changed:
+            SyncedStore._synced_hash = contents_hash
+
+        sync_result = SyncResult(result, remote_changed, local_changed, cached_changed)
 
         log.debug("Successfully synced system purpose.")
 
@@ -318,9 +345,18 @@ class SyncedStore(object):
 
         return sync_result
 
+    @staticmethod
+    def _content_hash(*contents):
+        """
+        Compute hash of contents independent on order of keys in dictionaries
+        """
+        data = json.dumps(contents, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
     def _sync_local_only(self):
-        local_updated = self.update_local(self.get_local_contents())
-        return SyncResult(self.local_contents, False, local_updated, False)
+        # Local changes are written by methods modifying local content, thus the
+        # file does not have to be rewritten
+        return SyncResult(self.get_local_contents(), False, False, False)
 
     def merge(self, local=None, remote=None, base=None):
         """
@@ -1,3 +1,5 @@
+import os
+
 from subscription_manager import managercli
 from rhsm.certificate2 import CONTENT_ACCESS_CERT_TYPE
 
@@ -83,6 +85,8 @@ class TestStatusCommand(SubManFixture):
             self.cc._do_command()
         self.assertIn("Overall Status: Current", cap.out)
         self.assertIn("System Purpose Status: Matched", cap.out)
+        # explicit status check does not reuse status confirmed by local evaluation
+        self.mock_entitlement_instance.get_status.assert_called_once_with(None, use_local_compliance=False)
 
     def test_status_content_access_mode_changed(self):
         """
@@ -159,3 +163,37 @@ class TestStatusCommand(SubManFixture):
             self.cc._do_command()
         self.assertTrue("System Purpose Status: Mismatched" in cap.out)
         self.assertTrue("unsatisfied usage: Production" in cap.out)
+
+    def test_cached_status_with_ondate(self):
+        self.cc.options = Mock()
+        self.cc.options.on_date = "2030-01-01"
+        self.cc.options.cached = True
+        with self.assertRaises(SystemExit) as cm:
+            self.cc._do_command()
+        self.assertEqual(os.EX_USAGE, cm.exception.code)
+        self.mock_entitlement_instance.get_cached_status.assert_not_called()
+
+    def test_cached_status_does_not_contact_server(self):
+        self.mock_entitlement_instance.get_cached_status = Mock(return_value=MOCK_SERVICE_STATUS_ENTITLEMENT)
+        self.cc.consumerIdentity = StubConsumerIdentity
+        self.cc.cp = Mock()
+        self.cc.options = Mock()
+        self.cc.options.on_date = None
+        self.cc.options.cached = True
+        self.cc.entitlement_dir = Mock()
+        self.cc.entitlement_dir.list_with_content_access = Mock(return_value=[])
+        self.cc.entcertlib = Mock()
+        syspurpose_cache = Mock()
+        syspurpose_cache.get_overall_status = Mock(return_value="Matched")
+        syspurpose_cache.get_overall_status_code = Mock(return_value="valid")
+        syspurpose_cache.get_status_reasons = Mock(return_value=[])
+        with patch.object(self.cc, "_get_syspurpose_status", return_value=syspurpose_cache) as get_syspurpose:
+            with Capture() as cap:
+                self.cc._do_command()
+        self.assertIn("Overall Status: Current", cap.out)
+        self.assertIn("System Purpose Status: Matched", cap.out)
+        self.mock_entitlement_instance.get_status.assert_not_called()
+        self.mock_entitlement_instance.get_cached_status.assert_called_once_with(None, 14400)
+        get_syspurpose.assert_called_once_with(None, max_cache_age=14400)
+        self.cc.entcertlib.update.assert_not_called()
+        self.assertEqual(self.cc.cp.method_calls, [])
@@ -0,0 +1,241 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+import os
+import tempfile
+import time
+import unittest
+
+from mock import patch
+
+from cloud_what.fact_collector import MiniHostCollector
+from cloud_what.smbios import SmbiosTable
+from test import subman_marker_slow
+
+
+UUID_BYTES = bytes.fromhex("11111111222233334444555555555555")
+
+
+def smbios_structure(dmi_type, handle, formatted, strings=()):
+    """
+    Create SMBIOS structure with given formatted area (without header) and strings
+    """
+    header = bytes([dmi_type, len(formatted) + 4]) + handle.to_bytes(2, "little")
+    if strings:
+        strings_area = b"".join(s.encode("utf-8") + b"\0" for s in strings) + b"\0"
+    else:
+        strings_area = b"\0\0"
+    return header + formatted + strings_area
+
+
+def bios_information(handle=0x0000, vendor="LENOVO", version="N2VET38W (1.23 )"):
+    # Vendor, Version, BIOS Starting Address Segment, Release Date, ROM Size, ...
+    formatted = bytes([1, 2, 0x00, 0xE0, 3, 0xFF]) + bytes(12)
+    return smbios_structure(0, handle, formatted, [vendor, version, "02/10/2022"])
+
+
+def system_information(handle=0x0001, uuid=UUID_BYTES, serial_number=2):
+    # Manufacturer, Product Name, Version, Serial Number, UUID, Wake-up Type, SKU Number, Family
+    formatted = bytes([1, 2, 3, serial_number]) + uuid + bytes([6, 4, 5])
+    return smbios_structure(
+        1, handle, formatted, ["LENOVO", "PPPPPPPPPP", "ThinkPad P1 Gen 3", "SKU", "ThinkPad  "]
+    )
+
+
+def chassis_information(handle=0x0003):
+    # Manufacturer, Type, Version, Serial Number, Asset Tag, ...
+    formatted = bytes([1, 0x0A, 0, 2, 3]) + bytes(8)
+    return smbios_structure(3, handle, formatted, ["LENOVO", "SSSSSSSS", "No Asset\x01Information"])
+
+
+def memory_device(handle):
+    # Locator, Bank Locator, ..., Manufacturer, Serial Number, Asset Tag, Part Number
+    formatted = bytes(12) + bytes([1, 2]) + bytes(5) + bytes([3, 4, 5, 6])
+    return smbios_structure(
+        17, handle, formatted, ["DIMM %d" % handle, "BANK 0", "SK Hynix", "SN", "AT", "PN"]
+    )
+
+
+def end_of_table(handle=0xFFFE):
+    return smbios_structure(127, handle, b"")
+
+
+class TestSmbiosTable(unittest.TestCase):
+    def test_parse_strings(self):
+        table = SmbiosTable(
+            bios_information() + system_information() + chassis_information() + end_of_table()
+        )
+        self.assertEqual(
+            {"Vendor": "LENOVO", "Version": "N2VET38W (1.23 )", "Release Date": "02/10/2022"},
+            table.get_sections(0)[0],
+        )
+        self.assertEqual("PPPPPPPPPP", table.get_key(1, "Product Name"))
+        self.assertEqual("SKU", table.get_key(1, "SKU Number"))
+        # trailing spaces are removed like in the case of dmidecode parser
+        self.assertEqual("ThinkPad", table.get_key(1, "Family"))
+        self.assertEqual("SSSSSSSS", table.get_key(3, "Serial Number"))
+        # unprintable characters are replaced with dots like dmidecode does
+        self.assertEqual("No Asset.Information", table.get_key(3, "Asset Tag"))
+        # string number 0 means that the string is not specified
+        self.assertRaises(KeyError, table.get_key, 3, "Version")
+
+    def test_enum_dmi_type(self):
+        class DmiTypes(object):
+            value = 1
+
+        table = SmbiosTable(system_information())
+        self.assertEqual("LENOVO", table.get_key(DmiTypes(), "Manufacturer"))
+
+    def test_missing_dmi_type(self):
+        table = SmbiosTable(bios_information() + end_of_table())
+        self.assertRaises(KeyError, table.get_sections, 2)
+        self.assertRaises(KeyError, table.get_key, 1, "UUID")
+
+    def test_multiple_sections(self):
+        table = SmbiosTable(b"".join(memory_device(handle) for handle in range(0x10, 0x14)))
+        sections = table.get_sections(17)
+        self.assertEqual(4, len(sections))
+        self.assertEqual(["DIMM 16", "DIMM 17", "DIMM 18", "DIMM 19"], [s["Locator"] for s in sections])
+        self.assertEqual("PN", sections[0]["Part Number"])
+
+    def test_structures_after_end_of_table_are_ignored(self):
+        table = SmbiosTable(bios_information() + end_of_table() + system_information())
+        self.assertRaises(KeyError, table.get_sections, 1)
+
+    def test_truncated_table(self):
+        data = bios_information() + system_information()
+        table = SmbiosTable(data[:-10])
+        self.assertEqual("LENOVO", table.get_key(0, "Vendor"))
+        self.assertRaises(KeyError, table.get_sections, 1)
+
+    def test_non_ascii_string(self):
+        table = SmbiosTable(bios_information(vendor="Vend\u00f6r"))
+        # dmidecode replaces every byte of UTF-8 sequence with dot
+        self.assertEqual("Vend..r", table.get_key(0, "Vendor"))
+
+    def test_uuid_unknown_version(self):
+        table = SmbiosTable(system_information())
+        self.assertRaises(KeyError, table.get_key, 1, "UUID")
+        table = SmbiosTable(system_information(uuid=bytes(16)))
+        self.assertEqual("Not Present", table.get_key(1, "UUID"))
+
+    def test_uuid_old_version(self):
+        table = SmbiosTable(system_information(), version=0x0204)
+        self.assertEqual("11111111-2222-3333-4444-555555555555", table.get_key(1, "UUID"))
+
+    def test_uuid_little_endian(self):
+        uuid = bytes.fromhex("11111111222233334444555555555555")
+        uuid_le = uuid[3::-1] + uuid[5:3:-1] + uuid[7:5:-1] + uuid[8:]
+        table = SmbiosTable(system_information(uuid=uuid_le), version=0x0300)
+        self.assertEqual("11111111-2222-3333-4444-555555555555", table.get_key(1, "UUID"))
+
+    def test_uuid_not_present(self):
+        table = SmbiosTable(system_information(uuid=bytes(16)), version=0x0300)
+        self.assertEqual("Not Present", table.get_key(1, "UUID"))
+        table = SmbiosTable(system_information(uuid=b"\xff" * 16), version=0x0300)
+        self.assertEqual("Not Settable", table.get_key(1, "UUID"))
+
+    def test_parse_version(self):
+        self.assertEqual(0x0303, SmbiosTable.parse_version(b"_SM3_\x00\x18\x03\x03\x00"))
+        self.assertEqual(0x0208, SmbiosTable.parse_version(b"_SM_\x00\x1f\x02\x08\x00"))
+        self.assertEqual(0x0201, SmbiosTable.parse_version(b"_DMI_" + bytes(9) + b"\x21"))
+        self.assertEqual(0, SmbiosTable.parse_version(b"garbage"))
+
+    def test_digest(self):
+        data = bios_information() + end_of_table()
+        self.assertEqual(SmbiosTable(data).digest, SmbiosTable(data).digest)
+        self.assertNotEqual(SmbiosTable(data).digest, SmbiosTable(data, version=0x0300).digest)
+        self.assertNotEqual(SmbiosTable(data).digest, SmbiosTable(data + end_of_table()).digest)
+
+    def test_from_sysfs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            table_path = os.path.join(tmp_dir, "DMI")
+            entry_point_path = os.path.join(tmp_dir, "smbios_entry_point")
+            with open(table_path, "wb") as table_file:
+                table_file.write(system_information(uuid=bytes(16)) + end_of_table())
+            with open(entry_point_path, "wb") as entry_point_file:
+                entry_point_file.write(b"_SM3_\x00\x18\x03\x03\x00")
+            with patch.object(SmbiosTable, "DMI_TABLE_PATH", table_path), patch.object(
+                SmbiosTable, "ENTRY_POINT_PATH", entry_point_path
+            ):
+                table = SmbiosTable.from_sysfs()
+        self.assertEqual(0x0303, table.version)
+        self.assertEqual("LENOVO", table.get_key(1, "Manufacturer"))
+
+
+class TestMiniHostCollectorSmbios(unittest.TestCase):
+    @patch("cloud_what.fact_collector.read_smbios_table")
+    @patch("subprocess.check_output")
+    def test_dmi_strings_from_smbios_table(self, mock_check_output, mock_read_table):
+        mock_read_table.return_value = SmbiosTable(
+            bios_information() + system_information(serial_number=0) + end_of_table(), version=0x0204
+        )
+        facts = MiniHostCollector().get_dmidecode()
+        mock_check_output.assert_not_called()
+        self.assertEqual(facts["dmi.bios.vendor"], "LENOVO")
+        self.assertEqual(facts["dmi.system.uuid"], "11111111-2222-3333-4444-555555555555")
+        # values are the same like values printed by "dmidecode -s"
+        self.assertEqual(facts["dmi.system.serial_number"], "Not Specified")
+        self.assertEqual(facts["dmi.chassis.manufacturer"], "")
+        self.assertEqual(set(facts), set(MiniHostCollector.DMI_TAGS))
+
+    @patch("cloud_what.fact_collector.read_smbios_table")
+    @patch("shutil.which")
+    @patch("subprocess.check_output")
+    def test_uuid_of_unknown_version_from_dmidecode(self, mock_check_output, mock_which, mock_read_table):
+        mock_read_table.return_value = SmbiosTable(bios_information() + system_information() + end_of_table())
+        mock_which.return_value = MiniHostCollector.DMIDECODE_PATH
+        mock_check_output.return_value = "11111111-2222-3333-4444-555555555555\n"
+        facts = MiniHostCollector().get_dmidecode()
+        mock_check_output.assert_called_once()
+        self.assertEqual(
+            [MiniHostCollector.DMIDECODE_PATH, "-s", "system-uuid"], mock_check_output.call_args[0][0]
+        )
+        self.assertEqual(facts["dmi.system.uuid"], "11111111-2222-3333-4444-555555555555")
+        self.assertEqual(facts["dmi.bios.vendor"], "LENOVO")
+
+    @patch("cloud_what.fact_collector.read_smbios_table")
+    @patch("shutil.which")
+    @patch("subprocess.check_output")
+    def test_dmidecode_fallback(self, mock_check_output, mock_which, mock_read_table):
+        mock_read_table.return_value = None
+        mock_which.return_value = MiniHostCollector.DMIDECODE_PATH
+        mock_check_output.return_value = "value\n"
+        facts = MiniHostCollector().get_dmidecode()
+        self.assertEqual(len(MiniHostCollector.DMI_TAGS), mock_check_output.call_count)
+        self.assertEqual(facts["dmi.system.uuid"], "value")
+
+
+@subman_marker_slow
+class TestSmbiosTableBenchmark(unittest.TestCase):
+    """
+    Benchmark of parsing SMBIOS table of a large host with many memory devices
+    """
+
+    ROUNDS = 100
+
+    def test_parse_large_table(self):
+        data = (
+            bios_information()
+            + system_information()
+            + chassis_information()
+            + b"".join(memory_device(handle) for handle in range(0x100, 0x500))
+            + end_of_table()
+        )
+        start = time.perf_counter()
+        for _ in range(self.ROUNDS):
+            table = SmbiosTable(data)
+        duration = (time.perf_counter() - start) / self.ROUNDS
+        self.assertEqual(1024, len(table.get_sections(17)))
+        # Running dmidecode takes tens of milliseconds only because of fork/exec
+        self.assertLess(duration, 0.1, "parsing of %d bytes took %.3f ms" % (len(data), duration * 1000))
@@ -37,6 +37,10 @@ from rhsm.connection import (
     RateLimitExceededException,
     ContentConnection,
     NoValidEntitlement,
+    CircuitOpenException,
+    CircuitBreaker,
+    RetryPolicy,
+    parse_retry_after,
 )
 
 from subscription_manager.cache import ContentAccessCache
@@ -851,6 +855,376 @@ class RestlibValidateResponseTests(unittest.TestCase):
         self.assertRaises(NetworkException, self.vr, "599", "")
 
 
+class RetryPolicyTests(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, base_delay=1, max_delay=30)
+
+    def test_parse_retry_after_seconds(self):
+        self.assertEqual(parse_retry_after({"Retry-After": "120"}), 120.0)
+        self.assertEqual(parse_retry_after({"retry-after": "5"}), 5.0)
+
+    def test_parse_retry_after_http_date(self):
+        retry_after = parse_retry_after({"Retry-After": strftime("%a, %d %b %Y %H:%M:%S GMT", gmtime(0))})
+        self.assertEqual(retry_after, 0.0)
+
+    def test_parse_retry_after_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after({}))
+        self.assertIsNone(parse_retry_after({"Retry-After": "soon"}))
+
+    def test_rate_limit_retried_for_all_methods(self):
+        exc = RateLimitExceededException(429)
+        self.assertTrue(self.policy.is_retryable("GET", exc))
+        self.assertTrue(self.policy.is_retryable("POST", exc))
+
+    def test_server_error_retried_only_for_idempotent_methods(self):
+        exc = RemoteServerException(503)
+        self.assertTrue(self.policy.is_retryable("GET", exc))
+        self.assertTrue(self.policy.is_retryable("HEAD", exc))
+        self.assertFalse(self.policy.is_retryable("PUT", exc))
+
+    def test_connection_errors_not_retried_by_default(self):
+        self.assertFalse(self.policy.is_retryable("GET", ConnectionRefusedError()))
+        self.assertFalse(self.policy.is_retryable("GET", RemoteServerException(502)))
+        self.assertFalse(self.policy.is_retryable("GET", RemoteServerException(504)))
+        self.assertIsNone(self.policy.next_delay("GET", ConnectionRefusedError(), 0))
+
+    def test_connection_errors_retried_when_enabled(self):
+        policy = RetryPolicy(max_retries=3, retry_connection_errors=True)
+        self.assertTrue(policy.is_retryable("GET", ConnectionRefusedError()))
+        self.assertTrue(policy.is_retryable("GET", RemoteServerException(504)))
+        self.assertFalse(policy.is_retryable("DELETE", ConnectionRefusedError()))
+
+    def test_client_errors_not_retried(self):
+        self.assertFalse(self.policy.is_retryable("GET", RemoteServerException(404)))
+        self.assertFalse(self.policy.is_retryable("GET", RemoteServerException(500)))
+        self.assertFalse(self.policy.is_retryable("GET", UnauthorizedException(401)))
+        self.assertFalse(self.policy.is_retryable("GET", ValueError()))
+
+    def test_decorrelated_jitter(self):
+        exc = RemoteServerException(503)
+        delay = None
+        for attempt in range(3):
+            previous_delay = delay
+            delay = self.policy.next_delay("GET", exc, attempt, previous_delay)
+            self.assertGreaterEqual(delay, 1)
+            self.assertLessEqual(delay, min(30, (previous_delay or 1) * 3))
+        self.assertIsNone(self.policy.next_delay("GET", exc, 3, delay))
+
+    def test_delay_honors_retry_after(self):
+        exc = RateLimitExceededException(429, headers={"retry-after": "10"})
+        delay = self.policy.next_delay("POST", exc, 0)
+        self.assertGreaterEqual(delay, 10)
+        self.assertLessEqual(delay, 11)
+
+    def test_too_long_retry_after_is_not_retried(self):
+        exc = RemoteServerException(503, headers={"Retry-After": "3600"})
+        self.assertIsNone(self.policy.next_delay("GET", exc, 0))
+
+    def test_delay_adapts_to_response_time(self):
+        delay = self.policy.next_delay("GET", RemoteServerException(503), 0, response_time=5.0)
+        self.assertGreaterEqual(delay, 5)
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(threshold=2, timeout=60)
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.allow_request())
+        self.assertGreaterEqual(self.breaker.remaining(), 59)
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_one_request_allowed_after_timeout(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.open_until = 0.0
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_retry_after_extends_timeout(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure(retry_after=600)
+        self.assertGreaterEqual(self.breaker.remaining(), 599)
+
+    def test_zero_threshold_disables_breaker(self):
+        self.breaker.threshold = 0
+        for _ in range(10):
+            self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_breaker_is_shared_by_host(self):
+        self.addCleanup(connection._circuit_breakers.clear)
+        breaker = connection.get_circuit_breaker("somehost", 123)
+        self.assertIs(breaker, connection.get_circuit_breaker("somehost", 123, threshold=3))
+        self.assertEqual(breaker.threshold, 3)
+        self.assertIsNot(breaker, connection.get_circuit_breaker("otherhost", 123))
+
+
+@patch("rhsm.connection.time.sleep")
+class RestlibRetryTests(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(connection._circuit_breakers.clear)
+        self.restlib = Restlib(
+            "somehost", "123", "/handler", retry_policy=RetryPolicy(max_retries=2, base_delay=1, max_delay=5)
+        )
+        self.restlib.circuit_breaker.threshold = 3
+        self.ok = {"status": 200, "content": "{}", "headers": {}}
+
+    def test_idempotent_request_retried(self, sleep):
+        self.restlib._send_request = Mock(side_effect=[RemoteServerException(503), self.ok])
+        self.assertEqual(self.restlib.request_get("/status"), {})
+        self.assertEqual(self.restlib._send_request.call_count, 2)
+        sleep.assert_called_once()
+
+    def test_non_idempotent_request_not_retried(self, sleep):
+        self.restlib._send_request = Mock(side_effect=[RemoteServerException(503), self.ok])
+        self.assertRaises(RemoteServerException, self.restlib.request_post, "/consumers")
+        sleep.assert_not_called()
+
+    def test_rate_limited_request_retried_after(self, sleep):
+        exc = RateLimitExceededException(429, headers={"retry-after": "3"})
+        self.restlib._send_request = Mock(side_effect=[exc, self.ok])
+        self.restlib.request_post("/consumers")
+        self.assertGreaterEqual(sleep.call_args[0][0], 3)
+
+    def test_retries_exhausted(self, sleep):
+        self.restlib._send_request = Mock(side_effect=RemoteServerException(503))
+        self.assertRaises(RemoteServerException, self.restlib.request_get, "/status")
+        self.assertEqual(self.restlib._send_request.call_count, 3)
+
+    def test_connection_error_fails_without_delay(self, sleep):
+        self.restlib._send_request = Mock(side_effect=ConnectionRefusedError())
+        self.assertRaises(ConnectionRefusedError, self.restlib.request_get, "/status")
+        self.assertEqual(self.restlib._send_request.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_open_circuit_short_circuits(self, sleep):
+        self.restlib.retry_policy.retry_connection_errors = True
+        self.restlib._send_request = Mock(side_effect=ConnectionRefusedError())
+        self.assertRaises(ConnectionRefusedError, self.restlib.request_get, "/status")
+        self.assertRaises(CircuitOpenException, self.restlib.request_get, "/status")
+        self.assertEqual(self.restlib._send_request.call_count, 3)
+        # Circuit breaker is shared with other connections to the same server
+        other = Restlib("somehost", "123", "/handler")
+        self.assertIs(other.circuit_breaker, self.restlib.circuit_breaker)
+        other.circuit_breaker.threshold = 3
+        other._send_request = Mock()
+        self.assertRaises(CircuitOpenException, other.request_get, "/status")
+        other._send_request.assert_not_called()
+
+    def test_client_error_closes_circuit(self, sleep):
+        self.restlib.circuit_breaker.record_failure()
+        self.restlib._send_request = Mock(side_effect=UnauthorizedException(401))
+        self.assertRaises(UnauthorizedException, self.restlib.request_get, "/status")
+        self.assertEqual(self.restlib.circuit_breaker.failures, 0)
+
+
+class RestlibConnectionReuseTests(unittest.TestCase):
+    def setUp(self):
+        self.restlib = Restlib("somehost", "123", "/handler", insecure=True)
+        https_patcher = patch("rhsm.connection.httplib.HTTPSConnection")
+        self.https_connection = https_patcher.start()
+        self.addCleanup(https_patcher.stop)
+        self.https_connection.side_effect = lambda *args, **kwargs: Mock(last_request_time=0)
+
+    @patch("rhsm.connection.time.time", Mock(return_value=10))
+    def test_connection_reused_for_same_cert(self):
+        conn = self.restlib._create_connection("/cert.pem", "/key.pem")
+        self.assertIs(self.restlib._create_connection("/cert.pem", "/key.pem"), conn)
+        self.assertEqual(self.https_connection.call_count, 1)
+
+    @patch("rhsm.connection.time.time", Mock(return_value=10))
+    def test_new_connection_for_other_cert(self):
+        conn = self.restlib._create_connection("/cert.pem", "/key.pem")
+        other_conn = self.restlib._create_connection("/other.pem", "/other-key.pem")
+        self.assertIsNot(other_conn, conn)
+        conn.close.assert_called_once_with()
+        self.assertEqual(other_conn.cert_key_pair, ("/other.pem", "/other-key.pem"))
+
+
+class ServerFeaturesTests(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(connection._server_features.clear)
+        cache_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.cache_file = os.path.join(cache_dir, "server_features.json")
+        cache_file_patcher = patch("rhsm.connection.SERVER_FEATURES_CACHE_FILE", self.cache_file)
+        cache_file_patcher.start()
+        self.addCleanup(cache_file_patcher.stop)
+        self.resources = [{"rel": "consumers", "href": "/consumers"}]
+
+    def test_resources_shared_by_connections(self):
+        cp = UEPConnection(host="somehost", ssl_port=123, handler="/handler", insecure=True)
+        other = UEPConnection(
+            host="somehost", ssl_port=123, handler="/handler", username="admin", password="secret"
+        )
+        cp.conn.request_get = Mock(return_value=self.resources)
+        other.conn.request_get = Mock()
+        self.assertTrue(cp.supports_resource("consumers"))
+        self.assertTrue(other.supports_resource("consumers"))
+        self.assertFalse(other.supports_resource("owners"))
+        cp.conn.request_get.assert_called_once()
+        other.conn.request_get.assert_not_called()
+
+    def test_resources_not_shared_by_servers(self):
+        cp = UEPConnection(host="somehost", ssl_port=123, handler="/handler", insecure=True)
+        other = UEPConnection(host="otherhost", ssl_port=123, handler="/handler", insecure=True)
+        cp.conn.request_get = Mock(return_value=self.resources)
+        other.conn.request_get = Mock(return_value=[])
+        self.assertTrue(cp.supports_resource("consumers"))
+        self.assertFalse(other.supports_resource("consumers"))
+
+    def test_capabilities_expire(self):
+        cp = UEPConnection(host="somehost", ssl_port=123, handler="/handler", insecure=True)
+        cp.conn.request_get = Mock(return_value={"managerCapabilities": ["cores"]})
+        with patch("rhsm.connection.time.time", return_value=100.0) as time:
+            self.assertTrue(cp.has_capability("cores"))
+            self.assertTrue(cp.has_capability("cores"))
+            self.assertEqual(cp.conn.request_get.call_count, 1)
+            time.return_value = 100.0 + connection.ServerFeatures.TTL + 1
+            self.assertTrue(cp.has_capability("cores"))
+        self.assertEqual(cp.conn.request_get.call_count, 2)
+
+    def test_features_shared_by_processes(self):
+        cp = UEPConnection(host="somehost", ssl_port=123, handler="/handler", insecure=True)
+        cp.conn.request_get = Mock(return_value=self.resources)
+        self.assertTrue(cp.supports_resource("consumers"))
+        # Features are read from the cache file in new process
+        connection._server_features.clear()
+        other = UEPConnection(host="somehost", ssl_port=123, handler="/handler", insecure=True)
+        other.conn.request_get = Mock()
+        self.assertTrue(other.supports_resource("consumers"))
+        other.conn.request_get.assert_not_called()
+        with open(self.cache_file) as cache_file:
+            self.assertIn("https://somehost:123/handler", json.load(cache_file))
+
+    def test_corrupted_cache_file_is_ignored(self):
+        with open(self.cache_file, "w") as cache_file:
+            cache_file.write("[not json")
+        cp = UEPConnection(host="somehost", ssl_port=123, handler="/handler", insecure=True)
+        cp.conn.request_get = Mock(return_value=self.resources)
+        self.assertTrue(cp.supports_resource("consumers"))
+        cp.conn.request_get.assert_called_once()
+
+    def test_new_server_version_drops_features(self):
+        cp = UEPConnection(host="somehost", ssl_port=123, handler="/handler", insecure=True)
+        status = {"version": "4.4.1", "release": "1", "managerCapabilities": ["cores"]}
+        cp.conn.request_get = Mock(return_value=status)
+        self.assertTrue(cp.has_capability("cores"))
+        cp.resources = {"consumers": "/consumers"}
+        # The same version does not drop anything
+        cp.getStatus()
+        self.assertEqual(cp.resources, {"consumers": "/consumers"})
+        cp.conn.request_get.return_value = {"version": "4.4.2", "release": "1", "managerCapabilities": []}
+        cp.getStatus()
+        self.assertIsNone(cp.resources)
+        self.assertIsNone(cp.capabilities)
+        self.assertFalse(cp.has_capability("cores"))
+
+    def test_correlation_id_is_request_header(self):
+        cp = UEPConnection(host="somehost", ssl_port=123, handler="/handler", correlation_id="first")
+        cp.conn._send_request = Mock(return_value={"status": 200, "content": "{}", "headers": {}})
+        cp.conn.request_get("/status")
+        self.assertEqual(cp.conn._send_request.call_args[0][2]["X-Correlation-ID"], "first")
+        cp.set_request_context(correlation_id="second", dbus_sender=" dbus_sender=foo")
+        cp.conn.request_get("/status")
+        self.assertEqual(cp.conn._send_request.call_args[0][2]["X-Correlation-ID"], "second")
+        self.assertIn("dbus_sender=foo", cp.conn._send_request.call_args[0][2]["User-Agent"])
+        cp.set_request_context()
+        cp.conn.request_get("/status")
+        self.assertNotIn("X-Correlation-ID", cp.conn._send_request.call_args[0][2])
+
+
+class DocumentMemoTests(unittest.TestCase):
+    def setUp(self):
+        self.cp = UEPConnection(username="dummy", password="dummy", handler="/Test", insecure=True)
+        self.responses = {}
+        self.cp.conn._send_request = Mock(side_effect=self._send_request)
+
+    def _send_request(self, request_type, handler, headers, body, cert_key_pairs, description=None):
+        content = self.responses.get(handler, {"handler": handler})
+        return {"status": 200, "content": json.dumps(content), "headers": {}}
+
+    def requested(self, request_type, handler):
+        return [
+            call
+            for call in self.cp.conn._send_request.call_args_list
+            if call[0][0] == request_type and call[0][1] == handler
+        ]
+
+    def test_documents_fetched_once_in_scope(self):
+        with self.cp.request_scope() as memo:
+            self.cp.getConsumer("uuid")
+            consumer = self.cp.getConsumer("uuid")
+            self.cp.getOwner("uuid")
+            self.cp.getOwner("uuid")
+        self.assertEqual(consumer, {"handler": "/Test/consumers/uuid"})
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/uuid")), 1)
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/uuid/owner")), 1)
+        self.assertEqual((memo.hits, memo.misses), (2, 2))
+
+    def test_documents_not_memoized_without_scope(self):
+        with self.cp.request_scope():
+            self.cp.getConsumer("uuid")
+        self.cp.getConsumer("uuid")
+        self.cp.getConsumer("uuid")
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/uuid")), 3)
+
+    def test_nested_scopes_share_memo(self):
+        with self.cp.request_scope() as memo:
+            self.cp.getConsumer("uuid")
+            with self.cp.request_scope() as nested_memo:
+                self.cp.getConsumer("uuid")
+            self.assertIs(nested_memo, memo)
+            self.cp.getConsumer("uuid")
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/uuid")), 1)
+
+    def test_memoized_document_cannot_be_modified(self):
+        with self.cp.request_scope():
+            self.cp.getConsumer("uuid")["handler"] = "modified"
+            self.assertEqual(self.cp.getConsumer("uuid"), {"handler": "/Test/consumers/uuid"})
+
+    def test_write_invalidates_documents_of_consumer(self):
+        with self.cp.request_scope():
+            self.cp.getConsumer("uuid")
+            self.cp.getConsumer("other-uuid")
+            self.cp.updateConsumer("uuid", role="Server")
+            self.cp.getConsumer("uuid")
+            self.cp.getConsumer("other-uuid")
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/uuid")), 2)
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/other-uuid")), 1)
+
+    def test_write_to_owner_invalidates_owner_documents(self):
+        with self.cp.request_scope():
+            self.cp.getConsumer("uuid")
+            self.cp.getOwner("uuid")
+            self.cp.deleteOwner("owner")
+            self.cp.getConsumer("uuid")
+            self.cp.getOwner("uuid")
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/uuid")), 1)
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/uuid/owner")), 2)
+
+    def test_write_of_copy_invalidates_documents(self):
+        with self.cp.request_scope():
+            self.cp.getConsumer("uuid")
+            cp_copy = self.cp.copy()
+            cp_copy.conn._send_request = Mock(side_effect=self._send_request)
+            cp_copy.unbindBySerial("uuid", "123")
+            self.cp.getConsumer("uuid")
+        self.assertEqual(len(self.requested("GET", "/Test/consumers/uuid")), 2)
+
+
 class RestlibTests(unittest.TestCase):
     def test_json_uft8_encoding(self):
         # A unicode string containing JSON
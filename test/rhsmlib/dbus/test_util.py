@@ -0,0 +1,235 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+import threading
+import unittest
+
+import mock
+
+from rhsmlib.client_info import DBusSender
+from rhsmlib.dbus import util
+
+
+class StubObject(object):
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    @util.dbus_coalesce_calls
+    def GetStatus(self, on_date, locale, sender=None):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if on_date == "error":
+            raise ValueError("error #%d" % self.calls)
+        return "status of %s in %s (%d)" % (on_date, locale, self.calls)
+
+    @util.dbus_invalidate_coalesced_calls
+    def Attach(self, sender=None):
+        return "attached"
+
+
+class TestCoalesceCalls(unittest.TestCase):
+    def setUp(self):
+        self.obj = StubObject()
+
+    def test_calls_share_result(self):
+        first = self.obj.GetStatus("", "en_US", sender=":1.1")
+        second = self.obj.GetStatus("", "en_US", sender=":1.2")
+        self.assertEqual(first, second)
+        self.assertEqual(self.obj.calls, 1)
+
+    def test_different_arguments_are_not_shared(self):
+        self.obj.GetStatus("", "en_US")
+        self.obj.GetStatus("", "de_DE")
+        self.obj.GetStatus("2026-01-01", "en_US")
+        self.assertEqual(self.obj.calls, 3)
+
+    def test_objects_do_not_share_results(self):
+        self.obj.GetStatus("", "en_US")
+        other = StubObject()
+        other.GetStatus("", "en_US")
+        self.assertEqual(other.calls, 1)
+
+    def test_concurrent_calls_wait_for_one_computation(self):
+        self.obj.release.clear()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.obj.GetStatus("", "en_US"))) for _ in range(4)
+        ]
+        threads[0].start()
+        self.assertTrue(self.obj.started.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        self.obj.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.obj.calls, 1)
+
+    def test_arguments_are_not_logged(self):
+        with self.assertLogs("rhsmlib.dbus.util", level="DEBUG") as logs:
+            self.obj.GetStatus("secret-password", "en_US")
+            self.obj.GetStatus("secret-password", "en_US")
+        self.assertEqual(self.obj.calls, 1)
+        self.assertTrue(logs.output)
+        self.assertNotIn("secret-password", "".join(logs.output))
+
+    def test_result_expires(self):
+        with mock.patch("rhsmlib.dbus.util.time.monotonic", return_value=100.0) as monotonic:
+            self.obj.GetStatus("", "en_US")
+            monotonic.return_value = 100.0 + util.CallCoalescer.TTL + 0.5
+            self.obj.GetStatus("", "en_US")
+        self.assertEqual(self.obj.calls, 2)
+
+    def test_errors_are_not_shared_with_later_calls(self):
+        self.assertRaisesRegex(ValueError, "error #1", self.obj.GetStatus, "error", "en_US")
+        self.assertRaisesRegex(ValueError, "error #2", self.obj.GetStatus, "error", "en_US")
+
+    def test_invalidate(self):
+        self.obj.GetStatus("", "en_US")
+        util.invalidate_coalesced_calls()
+        self.obj.GetStatus("", "en_US")
+        self.assertEqual(self.obj.calls, 2)
+
+    def test_changing_method_invalidates_results(self):
+        self.obj.GetStatus("", "en_US")
+        self.assertEqual(self.obj.Attach(), "attached")
+        self.obj.GetStatus("", "en_US")
+        self.assertEqual(self.obj.calls, 2)
+
+
+class StubService(object):
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.running = threading.Event()
+
+    @util.dbus_service_async_method("com.redhat.RHSM1.Test", in_signature="s", out_signature="s")
+    @util.dbus_handle_sender
+    def Echo(self, value, sender=None):
+        self.running.set()
+        self.release.wait(5)
+        if value == "error":
+            raise ValueError("error")
+        return "%s from %s" % (value, DBusSender().cmd_line)
+
+    @util.dbus_service_async_method("com.redhat.RHSM1.Test", in_signature="", out_signature="")
+    def Nothing(self, sender=None):
+        return None
+
+
+class TestMethodExecutor(unittest.TestCase):
+    def setUp(self):
+        self.idle_calls = []
+        self.executor = util.MethodExecutor(
+            max_workers=2,
+            idle_add=lambda callback, *args: self.idle_calls.append((callback, args)),
+        )
+        self.addCleanup(self.executor.shutdown)
+        patcher = mock.patch("rhsmlib.dbus.util.method_executor", self.executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cmd_line_patcher = mock.patch(
+            "rhsmlib.client_info.DBusSender.get_cmd_line", side_effect=lambda sender, bus=None: sender
+        )
+        cmd_line_patcher.start()
+        self.addCleanup(cmd_line_patcher.stop)
+        self.service = StubService()
+        self.addCleanup(self.service.release.set)
+
+    def run_idle_callbacks(self):
+        for callback, args in self.idle_calls:
+            self.assertFalse(callback(*args))
+        self.idle_calls = []
+
+    def test_dbus_arguments(self):
+        self.assertEqual(StubService.Echo._dbus_args, ["value"])
+        self.assertEqual(StubService.Echo._dbus_sender_keyword, "sender")
+        self.assertEqual(StubService.Echo._dbus_async_callbacks, ("_reply_handler", "_error_handler"))
+
+    def test_direct_call_is_synchronous(self):
+        self.assertEqual(self.service.Echo("foo", sender="client"), "foo from client")
+        self.assertEqual(self.executor.stats, {})
+
+    def test_reply_is_sent_from_main_loop(self):
+        reply_handler = mock.Mock()
+        error_handler = mock.Mock()
+        self.service.Echo("foo", sender="client", _reply_handler=reply_handler, _error_handler=error_handler)
+        self.executor.shutdown()
+        reply_handler.assert_not_called()
+        self.run_idle_callbacks()
+        reply_handler.assert_called_once_with("foo from client")
+        error_handler.assert_not_called()
+        stats = self.executor.stats["Echo"]
+        self.assertEqual(stats.calls, 1)
+        self.assertEqual(stats.errors, 0)
+        self.assertEqual(stats.queue_depth, 0)
+        self.assertEqual(stats.max_queue_depth, 1)
+
+    def test_empty_out_signature(self):
+        reply_handler = mock.Mock()
+        self.service.Nothing(_reply_handler=reply_handler, _error_handler=mock.Mock())
+        self.executor.shutdown()
+        self.run_idle_callbacks()
+        reply_handler.assert_called_once_with()
+
+    def test_error_is_sent_to_error_handler(self):
+        reply_handler = mock.Mock()
+        error_handler = mock.Mock()
+        self.service.Echo("error", _reply_handler=reply_handler, _error_handler=error_handler)
+        self.executor.shutdown()
+        self.run_idle_callbacks()
+        reply_handler.assert_not_called()
+        self.assertIsInstance(error_handler.call_args[0][0], ValueError)
+        self.assertEqual(self.executor.stats["Echo"].errors, 1)
+
+    def test_exclusive_methods_are_queued(self):
+        self.service.release.clear()
+        reply_handler = mock.Mock()
+        for value in ("first", "second", "third"):
+            self.service.Echo(value, sender=value, _reply_handler=reply_handler, _error_handler=mock.Mock())
+            self.assertTrue(self.service.running.wait(5))
+        stats = self.executor.stats["Echo"]
+        # The first call is running and the others wait for it
+        self.assertEqual(stats.queue_depth, 2)
+        self.assertEqual(stats.max_queue_depth, 2)
+        self.service.release.set()
+        self.executor.shutdown()
+        self.run_idle_callbacks()
+        self.assertEqual(stats.queue_depth, 0)
+        self.assertEqual(stats.calls, 3)
+        # Every worker thread has own sender
+        self.assertEqual(
+            sorted(call[0][0] for call in reply_handler.call_args_list),
+            ["first from first", "second from second", "third from third"],
+        )
+
+    def test_non_exclusive_methods_run_concurrently(self):
+        started = threading.Barrier(2, timeout=5)
+        reply_handler = mock.Mock()
+        for _ in range(2):
+            self.executor.submit("Wait", started.wait, reply_handler, mock.Mock(), exclusive=False)
+        self.executor.shutdown()
+        self.run_idle_callbacks()
+        self.assertEqual(reply_handler.call_count, 2)
+        self.assertFalse(started.broken)
+
+    def test_failing_reply_is_logged(self):
+        reply_handler = mock.Mock(side_effect=Exception("Disconnected"))
+        self.executor.submit("Method", lambda: "result", reply_handler, mock.Mock())
+        self.executor.shutdown()
+        with self.assertLogs("rhsmlib.dbus.util", level="WARNING"):
+            self.run_idle_callbacks()
@@ -15,8 +15,11 @@ from rhsmlib.facts.dmiinfo import DmidecodeFactCollector
 
 import contextlib
 import os
+import tempfile
 import unittest
 
+from mock import Mock, patch
+
 
 FAKE_PART_NUMBER = "AAAAAAAAAAAAA-ZZ"
 FAKE_PRODUCT_NAME = "PPPPPPPPPP"
@@ -99,3 +102,47 @@ class TestDmidecodeFactCollector(DmidecodeTestDataMixin, unittest.TestCase):
                 with contextlib.suppress(KeyError):
                     # not all the systems have a serial number set
                     self.assertEqual(facts["dmi.system.serial_number"], FAKE_SERIAL_NUMBER)
+
+
+class TestDmidecodeFactCollectorCache(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        patcher = patch.object(
+            DmidecodeFactCollector, "DMI_FACTS_CACHE", os.path.join(tmp_dir.name, "dmi_facts.json")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.smbios_table = Mock(digest="digest")
+        patcher = patch("rhsmlib.facts.dmiinfo.read_smbios_table", return_value=self.smbios_table)
+        self.mock_read_table = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.facts = {"dmi.system.uuid": FAKE_UUID}
+
+    def test_dmidecode_run_only_once_for_unchanged_table(self):
+        with patch.object(
+            DmidecodeFactCollector, "_get_dmidecode_facts", return_value=self.facts
+        ) as mock_get:
+            self.assertEqual(self.facts, DmidecodeFactCollector().get_all())
+            self.assertEqual(self.facts, DmidecodeFactCollector().get_all())
+        mock_get.assert_called_once_with()
+        self.assertEqual(0o600, os.stat(DmidecodeFactCollector.DMI_FACTS_CACHE).st_mode & 0o777)
+
+    def test_dmidecode_run_for_changed_table(self):
+        with patch.object(
+            DmidecodeFactCollector, "_get_dmidecode_facts", return_value=self.facts
+        ) as mock_get:
+            DmidecodeFactCollector().get_all()
+            self.smbios_table.digest = "other digest"
+            DmidecodeFactCollector().get_all()
+        self.assertEqual(2, mock_get.call_count)
+
+    def test_no_cache_without_smbios_table(self):
+        self.mock_read_table.return_value = None
+        with patch.object(
+            DmidecodeFactCollector, "_get_dmidecode_facts", return_value=self.facts
+        ) as mock_get:
+            DmidecodeFactCollector().get_all()
+            DmidecodeFactCollector().get_all()
+        self.assertEqual(2, mock_get.call_count)
+        self.assertFalse(os.path.exists(DmidecodeFactCollector.DMI_FACTS_CACHE))
@@ -11,14 +11,27 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 
+import os
+import tempfile
 import unittest
 
 import mock
 
 from rhsmlib.facts import host_collector
+from rhsmlib.facts import hwprobe
 
 
 class HostCollectorTest(unittest.TestCase):
+    def setUp(self):
+        # Do not read or write cache of network info of the host running tests
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        network_info_cache_patcher = mock.patch.object(
+            hwprobe.HardwareCollector, "NETWORK_INFO_CACHE", os.path.join(tmp_dir.name, "network_info.json")
+        )
+        network_info_cache_patcher.start()
+        self.addCleanup(network_info_cache_patcher.stop)
+
     @mock.patch("locale.getdefaultlocale")
     def test_unknown_locale(self, mock_locale):
         collector = host_collector.HostCollector()
@@ -13,6 +13,13 @@
 import unittest
 
 import io
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
 
 from mock import patch
 from mock import Mock
@@ -302,6 +309,20 @@ class TestGatherEntries(unittest.TestCase):
         self.assertEqual(2, len(ent_list))
 
 
+class TestCountEntries(unittest.TestCase):
+    def test_single(self):
+        self.assertEqual(1, hwprobe.count_entries("1"))
+
+    def test_multiple(self):
+        self.assertEqual(4, hwprobe.count_entries("1,2,3,4"))
+
+    def test_range_2_ranges(self):
+        self.assertEqual(8, hwprobe.count_entries("1-4,9-12"))
+
+    def test_large_range(self):
+        self.assertEqual(1792, hwprobe.count_entries("0-895,1024-1919"))
+
+
 class GenericPlatformSpecificInfoProviderTest(test.fixture.SubManFixture):
     def test(self):
         hw_info = {}
@@ -317,6 +338,14 @@ class GenericPlatformSpecificInfoProviderTest(test.fixture.SubManFixture):
 
 class HardwareProbeTest(test.fixture.SubManFixture):
     def setUp(self):
+        # Do not read or write cache of network info of the host running tests
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        network_info_cache_patcher = patch.object(
+            hwprobe.HardwareCollector, "NETWORK_INFO_CACHE", os.path.join(tmp_dir.name, "network_info.json")
+        )
+        network_info_cache_patcher.start()
+        self.addCleanup(network_info_cache_patcher.stop)
         # Note this is patching an *instance* of HardwareCollector, not the class.
         self.hw_check_topo = hwprobe.HardwareCollector()
         self.hw_check_topo_patcher = patch.object(
@@ -736,6 +765,49 @@ VARIANT_ID=server
         # note we .upper the result
         self.assertEqual("52:54:00:07:03:BA", slave_hw)
 
+    @patch(OPEN_FUNCTION)
+    def test_get_slave_hwaddr_other_slave(self, MockOpen):
+        MockOpen.side_effect = lambda *args: io.StringIO(PROC_BONDING_RR)
+        hw = hwprobe.HardwareCollector()
+        self.assertEqual("52:54:00:66:20:F7", hw._get_permanent_hardware_address("bond0", "eth1"))
+        self.assertEqual("", hw._get_permanent_hardware_address("bond0", "eth2"))
+
+    @patch(OPEN_FUNCTION)
+    def test_bonding_file_parsed_once(self, MockOpen):
+        MockOpen.return_value = io.StringIO(PROC_BONDING_RR)
+        hw = hwprobe.HardwareCollector()
+        bonding_cache = {}
+        self.assertEqual(
+            "52:54:00:07:03:BA", hw._get_permanent_hardware_address("bond0", "eth0", bonding_cache)
+        )
+        self.assertEqual(
+            "52:54:00:66:20:F7", hw._get_permanent_hardware_address("bond0", "eth1", bonding_cache)
+        )
+        MockOpen.assert_called_once_with("/proc/net/bonding/bond0", "r")
+
+    @patch("os.readlink")
+    @patch.object(hwprobe, "ethtool")
+    def test_network_interfaces_excluded(self, mock_ethtool, mock_readlink):
+        mock_ethtool.get_devices.return_value = ["eth0", "veth1a2b", "veth3c4d", "tap0"]
+        mock_info = Mock(mac_address="00:00:00:00:00:01", device="eth0")
+        mock_info.get_ipv6_addresses.return_value = []
+        mock_info.get_ipv4_addresses.return_value = []
+        mock_ethtool.get_interfaces_info.return_value = [mock_info]
+        mock_readlink.side_effect = OSError
+        hw = hwprobe.HardwareCollector()
+        with patch.object(hw, "_get_excluded_interface_patterns", return_value=["veth*", "tap*"]):
+            net_int = hw.get_network_interfaces()
+        mock_ethtool.get_interfaces_info.assert_called_once_with(["eth0"])
+        self.assertEqual({"net.interface.eth0.mac_address": "00:00:00:00:00:01"}, net_int)
+
+    @patch("rhsmlib.facts.hwprobe.get_config_parser")
+    def test_excluded_interface_patterns(self, mock_config):
+        mock_config.return_value.get.return_value = "veth*, tap*,,"
+        hw = hwprobe.HardwareCollector()
+        self.assertEqual(["veth*", "tap*"], hw._get_excluded_interface_patterns())
+        mock_config.return_value.get.return_value = ""
+        self.assertEqual([], hw._get_excluded_interface_patterns())
+
     def test_parse_s390_sysinfo_empty(self):
         cpu_count = 0
         sysinfo_lines = []
@@ -979,23 +1051,145 @@ class TestLscpu(unittest.TestCase):
             value.encode("ascii")
 
     @patch("subprocess.check_output")
-    @patch.object(hwprobe.HardwareCollector, "_check_lscpu_json")
     @patch("os.access")
-    def test_mocked_human_output_parser(self, mock_access, mock_check_json, mock_check_output):
+    def test_mocked_human_output_parser(self, mock_access, mock_check_output):
         mock_access.return_value = True
-        mock_check_json.return_value = False
-        mock_check_output.return_value = LSCPU_HUMAN_READABLE_OUTPUT
+        # lscpu does not support --json
+        mock_check_output.side_effect = [
+            subprocess.CalledProcessError(1, ["lscpu", "--json"]),
+            LSCPU_HUMAN_READABLE_OUTPUT,
+        ]
         hw_check = hwprobe.HardwareCollector()
         facts = hw_check.get_ls_cpu_info()
         self.assertEqual(LSCPU_HUMAN_READABLE_EXPECTED, facts)
+        self.assertEqual(2, mock_check_output.call_count)
 
     @patch("subprocess.check_output")
-    @patch.object(hwprobe.HardwareCollector, "_check_lscpu_json")
     @patch("os.access")
-    def test_mocked_json_parser(self, mock_access, mock_check_json, mock_check_output):
+    def test_mocked_json_parser(self, mock_access, mock_check_output):
         mock_access.return_value = True
-        mock_check_json.return_value = True
         mock_check_output.return_value = LSCPU_JSON_OUTPUT
         hw_check = hwprobe.HardwareCollector()
         facts = hw_check.get_ls_cpu_info()
         self.assertEqual(LSCPU_JSON_EXPECTED, facts)
+        # lscpu is run only once
+        mock_check_output.assert_called_once()
+        self.assertEqual([hwprobe.HardwareCollector.LSCPU_CMD, "--json"], mock_check_output.call_args[0][0])
+
+
+class TestNetworkInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.hw = hwprobe.HardwareCollector()
+        self.hw.NETWORK_INFO_CACHE = os.path.join(self.tmp_dir.name, "network_info.json")
+        self.hw.DNS_LOOKUP_TIMEOUT = 0.2
+        self.hw._get_ipv4_addr_list = Mock(return_value=["192.168.1.2"])
+        self.hw._get_ipv6_addr_list = Mock(return_value=["::1"])
+        self.blocked = threading.Event()
+        self.addCleanup(self.blocked.set)
+
+    def getaddrinfo(self, hostname, port, family, *args):
+        if family == socket.AF_INET:
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 0))]
+        if family == socket.AF_INET6:
+            return [(socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("2001:db8::1", 0, 0, 0))]
+        return [(socket.AF_INET, socket.SOCK_DGRAM, 17, "host.example.com", ("10.0.0.1", 0))]
+
+    def blocking_getaddrinfo(self, hostname, port, family, *args):
+        if family == socket.AF_INET:
+            self.blocked.wait(5)
+        return self.getaddrinfo(hostname, port, family, *args)
+
+    @patch("socket.gethostname", Mock(return_value="host"))
+    def test_lookups_succeed(self):
+        with patch("socket.getaddrinfo", side_effect=self.getaddrinfo):
+            net_info = self.hw.get_network_info()
+        self.assertEqual(
+            {
+                "network.hostname": "host",
+                "network.fqdn": "host.example.com",
+                "network.ipv4_address": "10.0.0.1",
+                "network.ipv6_address": "2001:db8::1",
+            },
+            net_info,
+        )
+        with open(self.hw.NETWORK_INFO_CACHE) as cache_file:
+            self.assertEqual(net_info, json.load(cache_file))
+
+    @patch("socket.gethostname", Mock(return_value="host"))
+    def test_unchanged_cache_is_not_written(self):
+        with patch("socket.getaddrinfo", side_effect=self.getaddrinfo):
+            self.hw.get_network_info()
+            with patch.object(self.hw, "_write_network_info_cache") as write_cache:
+                self.hw.get_network_info()
+        write_cache.assert_not_called()
+
+    @patch("socket.gethostname", Mock(return_value="host"))
+    def test_lookup_errors_use_interface_addresses(self):
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror("boom")):
+            net_info = self.hw.get_network_info()
+        self.assertEqual("host", net_info["network.fqdn"])
+        self.assertEqual("192.168.1.2", net_info["network.ipv4_address"])
+        self.assertEqual("::1", net_info["network.ipv6_address"])
+        with open(self.hw.NETWORK_INFO_CACHE) as cache_file:
+            self.assertEqual(
+                {
+                    "network.hostname": "host",
+                    "network.fqdn": None,
+                    "network.ipv4_address": None,
+                    "network.ipv6_address": None,
+                },
+                json.load(cache_file),
+            )
+
+    @patch("socket.gethostname", Mock(return_value="host"))
+    def test_lookup_error_is_cached(self):
+        def getaddrinfo(hostname, port, family, *args):
+            if family == socket.AF_INET6:
+                raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+            return self.getaddrinfo(hostname, port, family, *args)
+
+        with patch("socket.getaddrinfo", side_effect=getaddrinfo):
+            self.hw.get_network_info()
+        with patch("socket.getaddrinfo", side_effect=self.blocking_getaddrinfo):
+            net_info = self.hw.get_network_info()
+        # Result of timed out lookup is read from cache
+        self.assertEqual("10.0.0.1", net_info["network.ipv4_address"])
+        self.assertEqual("2001:db8::1", net_info["network.ipv6_address"])
+        with open(self.hw.NETWORK_INFO_CACHE) as cache_file:
+            self.assertEqual("10.0.0.1", json.load(cache_file)["network.ipv4_address"])
+
+    @patch("socket.gethostname", Mock(return_value="host"))
+    def test_cached_lookup_error_uses_interface_addresses(self):
+        with open(self.hw.NETWORK_INFO_CACHE, "w") as cache_file:
+            json.dump({"network.hostname": "host", "network.ipv4_address": None}, cache_file)
+        with patch("socket.getaddrinfo", side_effect=self.blocking_getaddrinfo):
+            net_info = self.hw.get_network_info()
+        self.assertEqual("192.168.1.2", net_info["network.ipv4_address"])
+
+    @patch("socket.gethostname", Mock(return_value="host"))
+    def test_timeout_without_cache(self):
+        start = time.monotonic()
+        with patch("socket.getaddrinfo", side_effect=self.blocking_getaddrinfo):
+            net_info = self.hw.get_network_info()
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual("host.example.com", net_info["network.fqdn"])
+        self.assertEqual("192.168.1.2", net_info["network.ipv4_address"])
+        self.assertEqual("2001:db8::1", net_info["network.ipv6_address"])
+
+    @patch("socket.gethostname", Mock(return_value="host"))
+    def test_timeout_uses_last_good_result(self):
+        with open(self.hw.NETWORK_INFO_CACHE, "w") as cache_file:
+            json.dump({"network.hostname": "host", "network.ipv4_address": "10.0.0.9"}, cache_file)
+        with patch("socket.getaddrinfo", side_effect=self.blocking_getaddrinfo):
+            net_info = self.hw.get_network_info()
+        self.assertEqual("10.0.0.9", net_info["network.ipv4_address"])
+
+    @patch("socket.gethostname", Mock(return_value="other"))
+    def test_cache_of_other_hostname_not_used(self):
+        with open(self.hw.NETWORK_INFO_CACHE, "w") as cache_file:
+            json.dump({"network.hostname": "host", "network.ipv4_address": "10.0.0.9"}, cache_file)
+        with patch("socket.getaddrinfo", side_effect=self.blocking_getaddrinfo):
+            net_info = self.hw.get_network_info()
+        self.assertEqual("192.168.1.2", net_info["network.ipv4_address"])
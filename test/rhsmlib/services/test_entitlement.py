@@ -34,6 +34,8 @@ class TestEntitlementService(InjectionMockingTest):
         super(TestEntitlementService, self).setUp()
         self.mock_identity = mock.Mock(spec=Identity, name="Identity").return_value
         self.mock_cp = mock.Mock(spec=connection.UEPConnection, name="UEPConnection").return_value
+        # Copies of connection used by concurrent requests
+        self.mock_cp.copy.return_value = self.mock_cp
         self.mock_sorter_class = mock.Mock(spec=CertSorter, name="CertSorter")
         self.mock_ent_dir = mock.Mock(spec=EntitlementDirectory, name="EntitlementDirectory").return_value
         self.mock_cache_avail_ent = mock.Mock(
@@ -455,6 +457,47 @@ class TestEntitlementService(InjectionMockingTest):
         self.assertEqual(expected_removed_serials, removed_serial)
         self.assertEqual(expected_unremoved_serials, unremoved_serials)
 
+    def test_remove_many_pools_by_serial_concurrently(self):
+        """
+        Test that result of concurrent removal is in the order of serial numbers
+        """
+        ent_service = EntitlementService(self.mock_cp)
+        serials = [str(serial) for serial in range(20)]
+
+        def stub_unbind(uuid, serial):
+            if int(serial) % 3 == 0:
+                raise connection.RestlibException(400, "Error")
+
+        ent_service.cp.unbindBySerial = mock.Mock(side_effect=stub_unbind)
+        ent_service.entcertlib = mock.Mock()
+
+        removed_serials, unremoved_serials = ent_service.remove_entitlements_by_serials(serials)
+
+        self.assertEqual([serial for serial in serials if int(serial) % 3 != 0], removed_serials)
+        self.assertEqual([serial for serial in serials if int(serial) % 3 == 0], unremoved_serials)
+        self.assertEqual(ent_service.cp.unbindBySerial.call_count, 20)
+        # Connection copies are closed and certificates are updated only once
+        self.assertEqual(self.mock_cp.copy.call_count, EntitlementService.MAX_UNBIND_WORKERS - 1)
+        self.assertEqual(self.mock_cp.close.call_count, EntitlementService.MAX_UNBIND_WORKERS - 1)
+        ent_service.entcertlib.update.assert_called_once_with()
+
+    def test_remove_pools_by_id_consumer_gone(self):
+        """
+        Test that GoneException is raised and remaining pools are not removed
+        """
+        ent_service = EntitlementService(self.mock_cp)
+        ent_service.MAX_UNBIND_WORKERS = 1
+        ent_service.cp.unbindByPoolId = mock.Mock(
+            side_effect=[None, connection.GoneException(410, "Gone", "uuid"), None]
+        )
+        ent_service.entitlement_dir.list_serials_for_pool_ids = mock.Mock(return_value={})
+        ent_service.entcertlib = mock.Mock()
+
+        self.assertRaises(
+            connection.GoneException, ent_service.remove_entilements_by_pool_ids, ["pool1", "pool2", "pool3"]
+        )
+        self.assertEqual(ent_service.cp.unbindByPoolId.call_count, 2)
+
     def test_parse_valid_date(self):
         """
         Test parsing valid date
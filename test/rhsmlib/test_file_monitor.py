@@ -16,6 +16,9 @@ import configparser
 from mock import Mock, patch
 from test import fixture
 from threading import Thread
+import os
+import pyinotify
+import shutil
 import subprocess
 import tempfile
 
@@ -194,6 +197,148 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         self.fsw2.handle_event(mock_event)
         self.assertEqual(mock_notify.call_count, 0)
 
+    @patch("rhsmlib.file_monitor.is_inotify_available")
+    @patch("rhsmlib.file_monitor.is_inotify_config")
+    def test_create_fsw_quiet_period(self, mock_config, mock_avail):
+        mock_config.return_value = True
+        mock_avail.return_value = True
+        fsw = file_monitor.create_filesystem_watcher(self.dir_list, quiet_period=100)
+        self.assertEqual(fsw.quiet_period, 100)
+        with patch("rhsmlib.file_monitor.conf") as mock_conf:
+            mock_conf.__getitem__.return_value.get_int.return_value = 250
+            fsw = file_monitor.create_filesystem_watcher(self.dir_list)
+        self.assertEqual(fsw.quiet_period, 250)
+
+    @patch("rhsmlib.file_monitor.conf")
+    def test_quiet_period_config(self, mock_config):
+        mock_config.__getitem__.return_value.get_int.return_value = 1000
+        self.assertEqual(file_monitor.get_quiet_period_config(), 1000)
+        mock_config.__getitem__.return_value.get_int.return_value = None
+        self.assertEqual(file_monitor.get_quiet_period_config(), 500)
+        mock_config.__getitem__.return_value.get_int.return_value = -1
+        self.assertEqual(file_monitor.get_quiet_period_config(), 500)
+        mock_config.__getitem__.return_value.get_int.side_effect = ValueError("bees?")
+        self.assertEqual(file_monitor.get_quiet_period_config(), 500)
+
+
+class TestDebouncedNotifications(fixture.SubManFixture):
+    def setUp(self):
+        super(TestDebouncedNotifications, self).setUp()
+        self.reload = Mock(return_value=None)
+        self.changed = Mock(return_value=None)
+        self.testpath1 = self.write_tempfile("").name
+        self.testpath2 = self.write_tempfile("").name
+        self.dw1 = file_monitor.DirectoryWatch(self.testpath1, [self.reload, self.changed])
+        self.dw2 = file_monitor.DirectoryWatch(self.testpath2, [self.reload])
+        self.fsw = file_monitor.InotifyFilesystemWatcher({"DW1": self.dw1, "DW2": self.dw2}, quiet_period=200)
+        self.now = file_monitor.time.monotonic()
+
+    def _event(self, path):
+        event = Mock()
+        event.path = path
+        event.pathname = path
+        event.mask = self.dw1.IN_MODIFY
+        return event
+
+    def test_events_are_coalesced(self):
+        for i in range(10):
+            self.fsw.handle_event(self._event(self.testpath1))
+        self.reload.assert_not_called()
+        self.assertEqual(self.fsw.notify_pending(now=self.now), set())
+        self.assertEqual(self.fsw.notify_pending(now=self.now + 1.0), {self.dw1})
+        self.reload.assert_called_once_with()
+        self.changed.assert_called_once_with()
+        # Nothing is pending anymore
+        self.assertEqual(self.fsw.notify_pending(now=self.now + 2.0), set())
+        self.assertIsNone(self.fsw.time_to_notify())
+
+    def test_callback_called_once_for_more_watches(self):
+        self.fsw.handle_event(self._event(self.testpath1))
+        self.fsw.handle_event(self._event(self.testpath2))
+        self.assertEqual(self.fsw.notify_pending(now=self.now + 1.0), {self.dw1, self.dw2})
+        self.reload.assert_called_once_with()
+        self.changed.assert_called_once_with()
+
+    def test_new_change_postpones_notification(self):
+        with patch("rhsmlib.file_monitor.time.monotonic") as mock_monotonic:
+            mock_monotonic.return_value = 100.0
+            self.fsw.schedule_notify(self.dw1)
+            mock_monotonic.return_value = 100.15
+            self.fsw.schedule_notify(self.dw1)
+        self.assertEqual(self.fsw.notify_pending(now=100.25), set())
+        self.assertAlmostEqual(self.fsw.time_to_notify(now=100.25), 100.0)
+        self.assertEqual(self.fsw.notify_pending(now=100.4), {self.dw1})
+
+    def test_notification_is_not_postponed_forever(self):
+        with patch("rhsmlib.file_monitor.time.monotonic") as mock_monotonic:
+            for i in range(200):
+                mock_monotonic.return_value = 100.0 + i * 0.1
+                self.fsw.schedule_notify(self.dw1)
+        self.assertEqual(self.fsw.notify_pending(now=110.0), {self.dw1})
+        self.reload.assert_called_once_with()
+
+    def test_disabled_watch_drops_notification(self):
+        self.fsw.handle_event(self._event(self.testpath1))
+        self.dw1.temporary_disable()
+        self.assertEqual(self.fsw.notify_pending(now=self.now + 1.0), {self.dw1})
+        self.reload.assert_not_called()
+
+    def test_loop_timeout(self):
+        self.assertEqual(self.fsw._loop_timeout(), self.fsw.TIMEOUT)
+        self.fsw.schedule_notify(self.dw1)
+        self.assertTrue(self.fsw._loop_timeout() <= 200)
+
+    def test_polling_update_is_debounced(self):
+        fsw = file_monitor.FilesystemWatcher({"DW1": self.dw1}, quiet_period=200)
+        fsw.changed_dw_set()
+        subprocess.call("touch %s -m -d '+1 hour'" % self.testpath1, shell=True)
+        self.assertEqual(fsw.update(), {self.dw1})
+        self.reload.assert_not_called()
+        self.assertEqual(fsw.notify_pending(now=file_monitor.time.monotonic() + 1.0), {self.dw1})
+        self.reload.assert_called_once_with()
+
+
+class TestInotifyWatches(fixture.SubManFixture):
+    def setUp(self):
+        super(TestInotifyWatches, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.file_path = os.path.join(self.tmp_dir, "syspurpose.json")
+        with open(self.file_path, "w") as f:
+            f.write("{}")
+        self.callback = Mock(return_value=None)
+        self.file_watch = file_monitor.DirectoryWatch(self.file_path, [self.callback])
+        self.fsw = file_monitor.InotifyFilesystemWatcher({"FILE": self.file_watch})
+        self.fsw.watch_manager = pyinotify.WatchManager()
+        self.addCleanup(self.fsw.remove_watches)
+        self.fsw.add_watches()
+
+    def test_file_and_directory_watched(self):
+        self.assertEqual(sorted(self.fsw._watch_descriptors.keys()), sorted([self.tmp_dir, self.file_path]))
+        dir_watch = self.fsw.watch_manager.get_watch(self.fsw._watch_descriptors[self.tmp_dir])
+        # Modifications of other files in directory are not interesting
+        self.assertFalse(dir_watch.mask & self.file_watch.IN_MODIFY)
+        file_watch = self.fsw.watch_manager.get_watch(self.fsw._watch_descriptors[self.file_path])
+        self.assertTrue(file_watch.mask & self.file_watch.IN_MODIFY)
+
+    def test_replaced_file_is_watched_again(self):
+        old_wd = self.fsw._watch_descriptors[self.file_path]
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("{}")
+        os.rename(tmp_path, self.file_path)
+        event = Mock()
+        event.path = self.tmp_dir
+        event.pathname = self.file_path
+        event.mask = self.file_watch.IN_MOVED_TO
+        self.fsw.handle_event(event)
+        self.callback.assert_called_once_with()
+        self.assertNotEqual(old_wd, self.fsw._watch_descriptors[self.file_path])
+
+    def test_remove_watches(self):
+        self.fsw.remove_watches()
+        self.assertEqual(self.fsw._watch_descriptors, {})
+
 
 class TestDirectoryWatch(fixture.SubManFixture):
     def setUp(self):
@@ -12,6 +12,7 @@
 # in this software or its documentation.
 #
 
+import contextlib
 from collections import defaultdict
 from datetime import datetime, timedelta
 import io
@@ -23,6 +24,7 @@ from rhsm import config
 from subscription_manager.cert_sorter import CertSorter
 from subscription_manager.cache import (
     EntitlementStatusCache,
+    LocalComplianceCache,
     ProductStatusCache,
     OverrideStatusCache,
     ProfileManager,
@@ -582,6 +584,15 @@ class StubUEP(object):
     def unbindByPoolId(self, consumer_uuid, pool_id):
         self.called_unbind_pool_id.append(pool_id)
 
+    def copy(self):
+        return self
+
+    def close(self):
+        pass
+
+    def request_scope(self):
+        return contextlib.nullcontext()
+
     def getCertificateSerials(self, consumer):
         return []
 
@@ -634,6 +645,12 @@ class StubContentConnection(object):
     proxy_hostname = None
     proxy_port = None
 
+    def copy(self):
+        return self
+
+    def close(self):
+        pass
+
 
 class StubFacts(Facts):
     def __init__(self, fact_dict=None, facts_changed=True):
@@ -657,6 +674,9 @@ class StubFacts(Facts):
     def get_last_update(self):
         return None
 
+    def read_cache_only(self):
+        return self.facts
+
     def write_cache(self):
         pass
 
@@ -738,6 +758,9 @@ class StubCPProvider(object):
     def clean(self):
         pass
 
+    def close_all_connections(self):
+        pass
+
     def get_consumer_auth_cp(self):
         return self.consumer_auth_cp
 
@@ -759,6 +782,17 @@ class StubEntitlementStatusCache(EntitlementStatusCache):
         self.server_status = None
 
 
+class StubLocalComplianceCache(LocalComplianceCache):
+    def write_cache(self, debug=False):
+        pass
+
+    def _read_cache(self):
+        return self.data
+
+    def delete_cache(self):
+        self.data = None
+
+
 class StubPoolStatusCache(PoolStatusCache):
     def write_cache(self, debug=False):
         pass
@@ -525,6 +525,10 @@ class TestSyncedStore(unittest.TestCase):
         synced_store_cache_patch.start()
         self.addCleanup(synced_store_cache_patch.stop)
 
+        synced_hash_patch = mock.patch("syspurpose.files.SyncedStore._synced_hash", None)
+        synced_hash_patch.start()
+        self.addCleanup(synced_hash_patch.stop)
+
         self.uep = mock.Mock()
         self.uep.getConsumer.return_value = self.default_remote_values
 
@@ -932,6 +936,52 @@ class TestSyncedStore(unittest.TestCase):
         self.assertEqual(expected_cache, cache_result)
         self.assertEqual(expected_local, local_result)
 
+    def test_unchanged_files_not_written(self):
+        cache_contents = {"role": "initial_role", "usage": None, "service_level_agreement": "", "addons": []}
+        local_contents = {"role": "initial_role"}
+        remote_contents = {"role": "initial_role", "usage": None, "serviceLevel": "", "addOns": []}
+
+        self.uep.getConsumer.return_value = remote_contents
+        utils.write_to_file_utf8(io.open(self.cache_syspurpose_file, "w"), cache_contents)
+        utils.write_to_file_utf8(io.open(self.local_syspurpose_file, "w"), local_contents)
+
+        synced_store = SyncedStore(self.uep, consumer_uuid="something")
+        with mock.patch.object(synced_store, "_update_file") as update_file:
+            result = synced_store.sync()
+
+        update_file.assert_not_called()
+        self.uep.updateConsumer.assert_not_called()
+        self.assertFalse(result.local_changed)
+        self.assertFalse(result.cached_changed)
+
+    def test_sync_of_unchanged_contents_skips_merge(self):
+        self.uep.getConsumer.return_value = {"role": "initial_role", "serviceLevel": "", "addOns": []}
+        utils.write_to_file_utf8(io.open(self.local_syspurpose_file, "w"), {"role": "initial_role"})
+        utils.write_to_file_utf8(io.open(self.cache_syspurpose_file, "w"), {})
+
+        # The first sync updates the cache
+        result = SyncedStore(self.uep, consumer_uuid="something").sync()
+        self.assertTrue(result.cached_changed)
+
+        # The second sync does not change anything, but it has to merge contents
+        synced_store = SyncedStore(self.uep, consumer_uuid="something")
+        with mock.patch.object(synced_store, "merge", wraps=synced_store.merge) as merge:
+            synced_store.sync()
+        merge.assert_called_once()
+
+        # The contents are the same as during the previous sync
+        synced_store = SyncedStore(self.uep, consumer_uuid="something")
+        with mock.patch.object(synced_store, "merge") as merge:
+            result = synced_store.sync()
+        merge.assert_not_called()
+        self.assertEqual(result.result, json.load(io.open(self.cache_syspurpose_file, "r")))
+
+        # Change of remote contents is merged again
+        self.uep.getConsumer.return_value = {"role": "new_role", "serviceLevel": "", "addOns": []}
+        SyncedStore(self.uep, consumer_uuid="something").sync()
+        self.assertEqual({"role": "new_role"}, json.load(io.open(self.local_syspurpose_file, "r")))
+        self.uep.updateConsumer.assert_not_called()
+
     def test_server_does_not_support_syspurpose(self):
         # This is how we detect if we have syspurpose support
         self.uep.has_capability = mock.Mock(side_effect=lambda x: x in [])
@@ -45,6 +45,7 @@ from subscription_manager.cache import (
     AvailableEntitlementsCache,
     CurrentOwnerCache,
     ContentAccessModeCache,
+    ContentCertAffinityCache,
 )
 
 from rhsm.profile import Package, RPMProfile, EnabledReposProfile, ModulesProfile
@@ -875,6 +876,24 @@ class TestEntitlementStatusCache(SubManFixture):
         self.status_cache._cache_exists = Mock(return_value=False)
         self.assertEqual(None, self.status_cache.load_status(uep, "SOMEUUID"))
 
+    def test_max_cache_age_recent_cache(self):
+        uep = Mock()
+        dummy_status = {"a": "1"}
+        self.status_cache.max_cache_age = 60
+        self.status_cache._cache_mtime = Mock(return_value=time.time() - 10)
+        self.status_cache._read_cache = Mock(return_value=dummy_status)
+        self.assertEqual(dummy_status, self.status_cache.load_status(uep, "SOMEUUID"))
+        uep.getCompliance.assert_not_called()
+
+    def test_max_cache_age_old_cache(self):
+        uep = Mock()
+        self.status_cache.max_cache_age = 60
+        self.status_cache._cache_mtime = Mock(return_value=time.time() - 120)
+        self.status_cache._read_cache = Mock(return_value={"a": "1"})
+        self.assertEqual(None, self.status_cache.load_status(uep, "SOMEUUID"))
+        self.status_cache._read_cache.assert_not_called()
+        uep.getCompliance.assert_not_called()
+
     def test_write_cache(self):
         mock_server_status = {"fake server status": random.uniform(1, 2**32)}
         status_cache = EntitlementStatusCache()
@@ -1340,3 +1359,118 @@ class TestContentAccessModeCache(SubManFixture):
         data = self.cache.read_cache_only()
         self.assertTrue("7f85da06-5c35-44ba-931d-f11f6e581f89" in data)
         self.assertEqual(data["7f85da06-5c35-44ba-931d-f11f6e581f89"], "entitlement")
+
+
+class TestSqliteCacheBackend(SubManFixture):
+    def setUp(self):
+        super(TestSqliteCacheBackend, self).setUp()
+        temp_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_cache_dir)
+        self.store = cache.get_cache_store(os.path.join(temp_cache_dir, "cache.db"))
+        self.addCleanup(self.store.close)
+        cache_store_patcher = patch("subscription_manager.cache._cache_store", return_value=self.store)
+        cache_store_patcher.start()
+        self.addCleanup(cache_store_patcher.stop)
+        self.identity = Mock()
+        self.identity.uuid = "7f85da06-5c35-44ba-931d-f11f6e581f89"
+
+    def test_write_and_read_cache(self):
+        mode_cache = ContentAccessModeCache()
+        mode_cache.set_data("entitlement", self.identity)
+        mode_cache.write_cache()
+        self.assertFalse(os.path.exists(mode_cache.CACHE_FILE))
+        self.assertTrue(mode_cache.exists())
+        self.assertEqual(self.store.get(mode_cache.CACHE_FILE).ttl, ContentAccessModeCache.TIMEOUT)
+        data = ContentAccessModeCache().read_cache_only()
+        self.assertEqual(data, {self.identity.uuid: "entitlement"})
+
+    def test_delete_cache(self):
+        mode_cache = ContentAccessModeCache()
+        mode_cache.set_data("entitlement", self.identity)
+        mode_cache.write_cache()
+        ContentAccessModeCache.delete_cache()
+        self.assertFalse(mode_cache.exists())
+        self.assertIsNone(mode_cache.read_cache_only())
+
+    def test_corrupted_entry_is_ignored(self):
+        self.store.set(ContentAccessModeCache.CACHE_FILE, "{not json")
+        self.assertIsNone(ContentAccessModeCache().read_cache_only())
+
+    def test_read_data_uses_store_mtime(self):
+        mode_cache = ContentAccessModeCache()
+        mode_cache.set_data("entitlement", self.identity)
+        mode_cache.write_cache()
+        mock_uep = Mock()
+        mock_uep.conn.is_consumer_cert_key_valid = True
+        mock_uep.getOwner = Mock(return_value={"contentAccessMode": "org_environment"})
+        self.assertEqual(mode_cache.read_data(uep=mock_uep, identity=self.identity), "entitlement")
+        mock_uep.getOwner.assert_not_called()
+
+    def test_cache_snapshot(self):
+        mode_cache = ContentAccessModeCache()
+        mode_cache.set_data("entitlement", self.identity)
+        mode_cache.write_cache()
+        resources_cache = SupportedResourcesCache()
+        with cache.CacheManager.cache_snapshot([mode_cache, resources_cache]) as snapshot:
+            self.assertEqual(snapshot[mode_cache], {self.identity.uuid: "entitlement"})
+            self.assertIsNone(snapshot[resources_cache])
+            # Data written by other process are not seen inside the snapshot
+            self.store.set(mode_cache.CACHE_FILE, json.dumps({self.identity.uuid: "org_environment"}))
+            self.assertEqual(mode_cache.read_cache_only(), {self.identity.uuid: "entitlement"})
+            self.assertFalse(resources_cache.exists())
+        self.assertEqual(mode_cache.read_cache_only(), {self.identity.uuid: "org_environment"})
+
+    def test_read_data_expired_entry(self):
+        mode_cache = ContentAccessModeCache()
+        mode_cache.set_data("entitlement", self.identity)
+        mode_cache.write_cache()
+        mock_uep = Mock()
+        mock_uep.conn.is_consumer_cert_key_valid = True
+        mock_uep.getOwner = Mock(return_value={"contentAccessMode": "org_environment"})
+        expired_time = time.time() + ContentAccessModeCache.TIMEOUT + 1
+        with patch("subscription_manager.cache_store.time.time", return_value=expired_time):
+            self.assertEqual(mode_cache.read_data(uep=mock_uep, identity=self.identity), "org_environment")
+        mock_uep.getOwner.assert_called_once()
+
+
+class TestContentCertAffinityCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.pairs = []
+        for name in ("a", "b", "c"):
+            cert_path = os.path.join(self.temp_dir, "%s.pem" % name)
+            open(cert_path, "w").close()
+            self.pairs.append((cert_path, os.path.join(self.temp_dir, "%s-key.pem" % name)))
+        self.affinity_cache = ContentCertAffinityCache()
+
+    def test_no_affinity(self):
+        self.assertEqual(self.affinity_cache.sort_cert_key_pairs("/content/", set(self.pairs)), self.pairs)
+
+    def test_longest_prefix_is_preferred(self):
+        self.affinity_cache.remember("/content/dist/", self.pairs[1])
+        self.affinity_cache.remember("/content/dist/rhel/server/", self.pairs[2])
+        pairs = self.affinity_cache.sort_cert_key_pairs("/content/dist/rhel/server/7/", set(self.pairs))
+        self.assertEqual(pairs, [self.pairs[2], self.pairs[0], self.pairs[1]])
+        pairs = self.affinity_cache.sort_cert_key_pairs("/content/dist/rhel/client/7/", set(self.pairs))
+        self.assertEqual(pairs, [self.pairs[1], self.pairs[0], self.pairs[2]])
+
+    def test_unknown_pair_is_ignored(self):
+        self.affinity_cache.remember("/content/", ("/removed.pem", "/removed-key.pem"))
+        self.assertEqual(self.affinity_cache.sort_cert_key_pairs("/content/", set(self.pairs)), self.pairs)
+
+    def test_removed_certs_are_forgotten(self):
+        self.affinity_cache.remember("/content/dist/", self.pairs[0])
+        os.remove(self.pairs[0][0])
+        self.affinity_cache.remember("/content/beta/", self.pairs[1])
+        self.assertEqual(self.affinity_cache.to_dict(), {"/content/beta/": list(self.pairs[1])})
+
+    def test_written_only_when_changed(self):
+        with patch("subscription_manager.cache.CacheManager.write_cache") as write_cache:
+            self.affinity_cache.write_cache()
+            write_cache.assert_not_called()
+            self.affinity_cache.remember("/content/", self.pairs[0])
+            self.affinity_cache.write_cache()
+            self.affinity_cache.remember("/content/", self.pairs[0])
+            self.affinity_cache.write_cache()
+            write_cache.assert_called_once()
@@ -0,0 +1,85 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from subscription_manager import cache_store
+from subscription_manager.cache_store import CacheEntry, SqliteCacheStore
+
+
+class TestSqliteCacheStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, "cache", "cache.db")
+        self.store = SqliteCacheStore(self.path)
+        self.addCleanup(self.store.close)
+
+    def test_missing_key(self):
+        self.assertIsNone(self.store.get("/var/lib/rhsm/cache/foo.json"))
+        self.assertFalse(self.store.exists("/var/lib/rhsm/cache/foo.json"))
+        self.assertIsNone(self.store.mtime("/var/lib/rhsm/cache/foo.json"))
+
+    def test_directory_is_created(self):
+        self.store.set("foo", '{"a": 1}')
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_set_and_get(self):
+        before = time.time()
+        self.store.set("foo", '{"a": 1}', ttl=10)
+        entry = self.store.get("foo")
+        self.assertEqual(entry.data, '{"a": 1}')
+        self.assertEqual(entry.ttl, 10)
+        self.assertTrue(entry.mtime >= before)
+        self.assertTrue(self.store.exists("foo"))
+
+    def test_set_replaces_entry(self):
+        self.store.set("foo", '{"a": 1}', ttl=10)
+        self.store.set("foo", '{"a": 2}')
+        entry = self.store.get("foo")
+        self.assertEqual(entry.data, '{"a": 2}')
+        self.assertIsNone(entry.ttl)
+
+    def test_delete(self):
+        self.store.set("foo", "{}")
+        self.store.delete("foo")
+        self.assertFalse(self.store.exists("foo"))
+        # Deleting missing entry is not an error
+        self.store.delete("foo")
+
+    def test_snapshot(self):
+        self.store.set_many({"foo": '"foo"', "bar": '"bar"'})
+        snapshot = self.store.snapshot(["foo", "bar", "baz"])
+        self.assertEqual(sorted(snapshot.keys()), ["bar", "foo"])
+        self.assertEqual(snapshot["foo"].data, '"foo"')
+        self.assertEqual(snapshot["foo"].mtime, snapshot["bar"].mtime)
+        self.assertEqual(self.store.snapshot([]), {})
+
+    def test_data_is_shared_between_connections(self):
+        self.store.set("foo", '"foo"')
+        other_store = SqliteCacheStore(self.path)
+        self.addCleanup(other_store.close)
+        self.assertEqual(other_store.get("foo").data, '"foo"')
+
+    def test_entry_expired(self):
+        entry = CacheEntry("{}", 100.0, 10)
+        self.assertFalse(entry.expired(now=105.0))
+        self.assertTrue(entry.expired(now=111.0))
+        self.assertFalse(CacheEntry("{}", 100.0, None).expired(now=1e10))
+
+    def test_get_cache_store_is_shared(self):
+        store = cache_store.get_cache_store(self.path)
+        self.addCleanup(store.close)
+        self.assertIs(store, cache_store.get_cache_store(self.path))
@@ -13,6 +13,7 @@
 #
 
 import copy
+import time
 
 import subscription_manager.injection as inj
 
@@ -27,8 +28,19 @@ from .stubs import (
     StubCertSorter,
 )
 import subscription_manager.cert_sorter
-from subscription_manager.cert_sorter import CertSorter, UNKNOWN
-from subscription_manager.cache import EntitlementStatusCache
+from subscription_manager.cert_sorter import (
+    CertSorter,
+    LocalComplianceEvaluator,
+    GUEST_FACT,
+    RAM_FACT,
+    SOCKET_FACT,
+    INVALID,
+    PARTIAL,
+    UNKNOWN,
+    VALID,
+)
+from subscription_manager.cache import EntitlementStatusCache, LocalComplianceCache
+from rhsm.certificate import GMT
 from datetime import timedelta, datetime
 from mock import Mock, patch
 from rhsm import ourjson as json
@@ -751,3 +763,167 @@ SAMPLE_COMPLIANCE_JSON = json.loads(
 }
 """
 )
+
+
+class LocalComplianceEvaluatorTests(SubManFixture):
+    def setUp(self):
+        SubManFixture.setUp(self)
+        self.installed = {INST_PID_1: stub_prod_cert(INST_PID_1), INST_PID_4: stub_prod_cert(INST_PID_4)}
+        self.facts = {SOCKET_FACT: "4", RAM_FACT: "8000000"}
+
+    def test_all_products_covered(self):
+        end_date = datetime.now() + timedelta(days=30)
+        certs = [
+            StubEntitlementCertificate(PROD_1, sockets=4),
+            StubEntitlementCertificate(PROD_4, sockets=8, end_date=end_date),
+        ]
+        status, compliant_until = LocalComplianceEvaluator(self.installed, certs, self.facts).evaluate()
+        self.assertEqual(VALID, status)
+        self.assertEqual(end_date.date(), compliant_until.date())
+
+    def test_product_not_covered(self):
+        certs = [StubEntitlementCertificate(PROD_1, sockets=4)]
+        self.assertEqual(
+            (INVALID, None), LocalComplianceEvaluator(self.installed, certs, self.facts).evaluate()
+        )
+
+    def test_expired_entitlement(self):
+        certs = [
+            StubEntitlementCertificate(PROD_1, sockets=4),
+            StubEntitlementCertificate(
+                PROD_4,
+                sockets=4,
+                start_date=datetime.now() - timedelta(days=365),
+                end_date=datetime.now() - timedelta(days=1),
+            ),
+        ]
+        status, _ = LocalComplianceEvaluator(self.installed, certs, self.facts).evaluate()
+        self.assertEqual(INVALID, status)
+
+    def test_stacked_entitlements(self):
+        certs = [
+            StubEntitlementCertificate(PROD_1, sockets=4),
+            StubEntitlementCertificate(PROD_4, sockets=2, stacking_id=STACK_1),
+        ]
+        evaluator = LocalComplianceEvaluator(self.installed, certs, self.facts)
+        self.assertEqual((PARTIAL, None), evaluator.evaluate())
+        certs.append(StubEntitlementCertificate(PROD_4, sockets=1, quantity=2, stacking_id=STACK_1))
+        self.assertEqual(VALID, evaluator.evaluate()[0])
+
+    def test_ram_limit(self):
+        certs = [
+            StubEntitlementCertificate(PROD_1, sockets=4),
+            StubEntitlementCertificate(PROD_4, sockets=4, ram=4),
+        ]
+        self.assertEqual(PARTIAL, LocalComplianceEvaluator(self.installed, certs, self.facts).evaluate()[0])
+
+    def test_sockets_of_guest_are_not_counted(self):
+        self.facts[GUEST_FACT] = True
+        certs = [
+            StubEntitlementCertificate(PROD_1, sockets=1),
+            StubEntitlementCertificate(PROD_4, sockets=1),
+        ]
+        self.assertEqual(VALID, LocalComplianceEvaluator(self.installed, certs, self.facts).evaluate()[0])
+
+    def test_content_access(self):
+        evaluator = LocalComplianceEvaluator(self.installed, [], self.facts, content_access=True)
+        self.assertEqual((UNKNOWN, None), evaluator.evaluate())
+        self.assertIsNone(evaluator.get_verdict())
+
+    def test_verdict_contains_entitlements(self):
+        certs = [StubEntitlementCertificate(PROD_1, sockets=4)]
+        evaluator = LocalComplianceEvaluator(self.installed, certs, self.facts)
+        verdict = evaluator.get_verdict()
+        certs.append(StubEntitlementCertificate(StubProduct("not_installed_product")))
+        self.assertEqual(verdict["status"], evaluator.get_verdict()["status"])
+        self.assertNotEqual(verdict, evaluator.get_verdict())
+
+
+class LocalComplianceCacheTests(SubManFixture):
+    @patch("subscription_manager.cache.InstalledProductsManager.update_check")
+    def setUp(self, mock_update):
+        SubManFixture.setUp(self)
+        self.status = copy.deepcopy(SAMPLE_COMPLIANCE_JSON)
+        self.status["compliantUntil"] = (datetime.now(GMT()) + timedelta(days=30)).isoformat()
+        self.status["status"] = "valid"
+        self.prod_dir = StubProductDirectory(pids=[INST_PID_1])
+        self.ent_dir = StubEntitlementDirectory([StubEntitlementCertificate(PROD_1)])
+        inj.provide(inj.PROD_DIR, self.prod_dir)
+        inj.provide(inj.ENT_DIR, self.ent_dir)
+
+        self.status_mgr = EntitlementStatusCache()
+        self.status_mgr.load_status = Mock(side_effect=self._load_status)
+        self.status_mgr._cache_mtime = Mock(side_effect=time.time)
+        inj.provide(inj.ENTITLEMENT_STATUS_CACHE, self.status_mgr)
+        self.load_sorter()
+
+    def _load_status(self, uep, uuid, on_date=None):
+        self.status_mgr.server_status = self.status
+        self.status_mgr.last_error = False
+        return self.status
+
+    @patch("subscription_manager.cache.InstalledProductsManager.update_check")
+    def load_sorter(self, mock_update, on_date=None):
+        return CertSorter(on_date)
+
+    def test_status_is_reused(self):
+        self.assertEqual(1, self.status_mgr.load_status.call_count)
+        sorter = self.load_sorter()
+        self.assertEqual(1, self.status_mgr.load_status.call_count)
+        self.assertEqual(self.status["compliantUntil"], sorter.status["compliantUntil"])
+
+    def test_changed_entitlements(self):
+        self.ent_dir.certs.append(StubEntitlementCertificate(PROD_2))
+        self.load_sorter()
+        self.assertEqual(2, self.status_mgr.load_status.call_count)
+
+    def test_old_status(self):
+        self.status_mgr._cache_mtime = Mock(return_value=time.time() - 2 * 86400)
+        self.load_sorter()
+        self.assertEqual(2, self.status_mgr.load_status.call_count)
+
+    def test_status_for_other_date(self):
+        self.load_sorter(on_date=datetime.now(GMT()) + timedelta(days=1))
+        self.assertEqual(2, self.status_mgr.load_status.call_count)
+
+    def test_status_not_compliant_anymore(self):
+        self.status["compliantUntil"] = (datetime.now(GMT()) - timedelta(days=1)).isoformat()
+        inj.require(inj.LOCAL_COMPLIANCE_CACHE).set_verdict(
+            inj.require(inj.LOCAL_COMPLIANCE_CACHE).data["verdict"], self.status
+        )
+        self.load_sorter()
+        self.assertEqual(2, self.status_mgr.load_status.call_count)
+
+    def test_disabled(self):
+        with patch.object(LocalComplianceCache, "_get_max_age", return_value=0):
+            self.load_sorter()
+        self.assertEqual(2, self.status_mgr.load_status.call_count)
+
+    def test_autoheal_max_age(self):
+        self.assertEqual(2 * 1440 * 60, LocalComplianceCache.get_autoheal_max_age())
+        with patch.object(LocalComplianceCache, "_get_max_age", return_value=0):
+            self.assertEqual(0, LocalComplianceCache.get_autoheal_max_age())
+
+    def test_old_status_reused_with_longer_max_age(self):
+        self.status_mgr._cache_mtime = Mock(return_value=time.time() - 86400)
+        local_cache = inj.require(inj.LOCAL_COMPLIANCE_CACHE)
+        local_cache.max_age = LocalComplianceCache.get_autoheal_max_age()
+        self.load_sorter()
+        self.assertEqual(1, self.status_mgr.load_status.call_count)
+        local_cache.max_age = None
+        self.load_sorter()
+        self.assertEqual(2, self.status_mgr.load_status.call_count)
+
+    def test_status_not_valid(self):
+        for status in ("invalid", "partial", "disabled"):
+            self.status["status"] = status
+            self.load_sorter()
+            self.load_sorter()
+        self.assertEqual(7, self.status_mgr.load_status.call_count)
+
+    @patch("subscription_manager.cache.InstalledProductsManager.update_check")
+    def test_local_compliance_not_used(self, mock_update):
+        sorter = self.load_sorter()
+        sorter.use_local_compliance = False
+        sorter.load()
+        self.assertEqual(2, self.status_mgr.load_status.call_count)
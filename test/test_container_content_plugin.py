@@ -116,7 +116,11 @@ class TestContainerContentUpdateActionCommand(fixture.SubManFixture):
             container_content = imp.load_module("container_content", fp, pathname, description)
         finally:
             fp.close()
-        plugin_manager = PluginManager(search_path=plugin_path, plugin_conf_path=plugin_path)
+        plugin_manager = PluginManager(
+            search_path=plugin_path,
+            plugin_conf_path=plugin_path,
+            manifest_file=join(self.temp_dir, "plugin_manifest.json"),
+        )
         plugin_class = plugin_manager.get_plugins()["container_content.ContainerContentPlugin"]
         with mock.patch.object(plugin_class, "HOSTNAME_CERT_DIR", self.host_cert_dir):
             with mock.patch(
@@ -11,6 +11,8 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import os
+import tempfile
 import unittest
 
 from mock import patch
@@ -102,3 +104,64 @@ class CPProviderTests(unittest.TestCase):
         self.cp_provider.set_content_connection_info(cdn_hostname=None, cdn_port=None)
         connection = self.cp_provider.get_content_connection()
         self.assertTrue("subscription-manager/1.23.45" in connection.conn.user_agent)
+
+    def test_connection_reused_for_same_connection_info(self):
+        connection = self.cp_provider.get_no_auth_cp()
+        self.cp_provider.set_connection_info()
+        self.cp_provider.set_correlation_id("correlation-id")
+        self.assertIs(self.cp_provider.get_no_auth_cp(), connection)
+        self.assertEqual(connection.conn.correlation_id, "correlation-id")
+
+    def test_new_connection_for_other_connection_info(self):
+        connection = self.cp_provider.get_no_auth_cp()
+        self.cp_provider.set_connection_info(host="other.example.com")
+        other_connection = self.cp_provider.get_no_auth_cp()
+        self.assertIsNot(other_connection, connection)
+        self.assertEqual(other_connection.host, "other.example.com")
+        self.cp_provider.set_connection_info()
+        self.assertIs(self.cp_provider.get_no_auth_cp(), connection)
+
+    def test_new_connection_for_other_credentials(self):
+        self.cp_provider.set_user_pass(username="admin", password="admin")
+        connection = self.cp_provider.get_basic_auth_cp()
+        self.cp_provider.set_user_pass(username="admin", password="secret")
+        self.assertIsNot(self.cp_provider.get_basic_auth_cp(), connection)
+        self.cp_provider.set_user_pass(username="admin", password="admin")
+        self.assertIs(self.cp_provider.get_basic_auth_cp(), connection)
+
+    def test_proxy_password_is_not_kept_in_connection_key(self):
+        self.cp_provider.set_connection_info(proxy_user_arg="proxy", proxy_password_arg="proxy-secret")
+        connection = self.cp_provider.get_no_auth_cp()
+        self.assertNotIn("proxy-secret", repr(list(self.cp_provider._connections)))
+        self.cp_provider.set_connection_info(proxy_user_arg="proxy", proxy_password_arg="other-secret")
+        self.assertIsNot(self.cp_provider.get_no_auth_cp(), connection)
+
+    def test_new_connection_for_new_consumer_cert(self):
+        with tempfile.TemporaryDirectory() as cert_dir:
+            cert_file = os.path.join(cert_dir, "cert.pem")
+            key_file = os.path.join(cert_dir, "key.pem")
+            with patch("subscription_manager.cp_provider.ConsumerIdentity") as identity:
+                identity.certpath.return_value = cert_file
+                identity.keypath.return_value = key_file
+                self.cp_provider.set_connection_info()
+                connection = self.cp_provider.get_consumer_auth_cp()
+                self.cp_provider.set_connection_info()
+                self.assertIs(self.cp_provider.get_consumer_auth_cp(), connection)
+                for path in (cert_file, key_file):
+                    with open(path, "w"):
+                        pass
+                self.cp_provider.set_connection_info()
+                self.assertIsNot(self.cp_provider.get_consumer_auth_cp(), connection)
+
+    def test_clean_closes_cached_connections(self):
+        connection = self.cp_provider.get_no_auth_cp()
+        with patch.object(connection.conn, "close_connection") as close_connection:
+            self.cp_provider.clean()
+        close_connection.assert_called_once_with()
+        self.assertIsNot(self.cp_provider.get_no_auth_cp(), connection)
+
+    def test_number_of_cached_connections_is_limited(self):
+        for i in range(CPProvider.MAX_CACHED_CONNECTIONS + 2):
+            self.cp_provider.set_connection_info(host="server%d.example.com" % i)
+            self.cp_provider.get_no_auth_cp()
+        self.assertEqual(len(self.cp_provider._connections), CPProvider.MAX_CACHED_CONNECTIONS)
@@ -2,6 +2,7 @@ import imp
 import os
 import types
 
+import mock
 import pytest
 
 try:
@@ -11,6 +12,7 @@ except ImportError as e:
     pytest.skip(f"DNF dependency could not be imported: {e}", allow_module_level=True)
 
 
+from . import certdata
 from . import fixture
 
 
@@ -44,3 +46,102 @@ class TestDnfPluginModule(fixture.SubManFixture):
         self.assertTrue(isinstance(dnf_product_id, types.ModuleType))
         self.assertTrue(isinstance(dnf, types.ModuleType))
         self.assertTrue(isinstance(librepo, types.ModuleType))
+
+
+class TestDnfProductManager(fixture.SubManFixture):
+    def setUp(self):
+        super(TestDnfProductManager, self).setUp()
+        dnf_product_id.DnfProductManager._parsed_certs.clear()
+        self.pm = dnf_product_id.DnfProductManager(mock.Mock())
+        self.written_cache = []
+        self.pm.read_productid_cache = mock.Mock(return_value={"cached-repo": certdata.PRODUCT_CERT_V1_0})
+        self.pm.write_productid_cache = self.written_cache.append
+        self.pm._download_productid = self._download_productid
+        self.productids = {}
+
+    def _download_productid(self, repo, tmpdir):
+        if repo.id not in self.productids:
+            return None
+        if self.productids[repo.id] is None:
+            raise IOError("Unable to download productid")
+        filename = os.path.join(tmpdir, "productid")
+        with open(filename, "w") as f:
+            f.write(self.productids[repo.id])
+        return filename
+
+    def _repos(self, *repo_ids):
+        repos = []
+        for repo_id in repo_ids:
+            repo = mock.Mock()
+            repo.id = repo_id
+            repos.append(repo)
+        return repos
+
+    def test_certs_keep_order_of_repos(self):
+        self.productids = {
+            "repo-1": certdata.PRODUCT_CERT_V1_0,
+            "repo-2": certdata.PRODUCT_CERT_WITH_OS_NAME_V1_0,
+            "broken-repo": None,
+        }
+        repos = self._repos("repo-1", "unknown-repo", "cached-repo", "broken-repo", "repo-2")
+        certs = self.pm.get_certs_for_enabled_repos(repos)
+        self.assertEqual([repo_id for cert, repo_id in certs], ["repo-1", "cached-repo", "repo-2"])
+        self.assertEqual(self.pm.meta_data_errors, ["unknown-repo", "broken-repo"])
+        self.assertEqual(len(self.written_cache), 1)
+        self.assertEqual(sorted(self.written_cache[0]), ["cached-repo", "repo-1", "repo-2"])
+
+    def test_same_productid_is_parsed_once(self):
+        self.productids = {"repo-1": certdata.PRODUCT_CERT_V1_0, "repo-2": certdata.PRODUCT_CERT_V1_0}
+        with mock.patch.object(
+            dnf_product_id, "create_from_pem", wraps=dnf_product_id.create_from_pem
+        ) as parse:
+            certs = self.pm.get_certs_for_enabled_repos(self._repos("repo-1", "repo-2", "cached-repo"))
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(len(certs), 3)
+        self.assertEqual(certs[0][0].pem, certdata.PRODUCT_CERT_V1_0)
+
+    def test_unchanged_cache_is_not_written(self):
+        certs = self.pm.get_certs_for_enabled_repos(self._repos("cached-repo"))
+        self.assertEqual(len(certs), 1)
+        self.assertEqual(self.written_cache, [])
+
+
+class TestDnfProductManagerActive(fixture.SubManFixture):
+    def setUp(self):
+        super(TestDnfProductManagerActive, self).setUp()
+        self.base = mock.Mock()
+        self.pm = dnf_product_id.DnfProductManager(self.base)
+
+    @staticmethod
+    def _pkg(from_repo=None, reponame=None):
+        pkg = mock.Mock()
+        pkg._from_repo = from_repo
+        pkg.reponame = reponame
+        return pkg
+
+    def test_active_repos_from_transaction(self):
+        kept = self._pkg(from_repo="@repo-kept")
+        removed = self._pkg(from_repo="@repo-removed")
+        installed = self._pkg(reponame="repo-installed")
+        self.base.sack.query.return_value.installed.return_value = [kept, removed]
+        self.base.transaction.remove_set = {removed}
+        self.base.transaction.install_set = {installed}
+        with mock.patch.object(dnf_product_id.dnf.sack, "_rpmdb_sack", create=True) as rpmdb_sack:
+            active = self.pm.get_active()
+        self.assertEqual(active, {"repo-kept", "repo-installed"})
+        rpmdb_sack.assert_not_called()
+
+    def test_active_repos_from_rpmdb_without_sack(self):
+        self.base.sack = None
+        with mock.patch.object(dnf_product_id.dnf.sack, "_rpmdb_sack", create=True) as rpmdb_sack:
+            rpmdb_sack.return_value.query.return_value.installed.return_value = [self._pkg(from_repo="@repo")]
+            active = self.pm.get_active()
+        self.assertEqual(active, {"repo"})
+
+    def test_changed_repos_from_transaction(self):
+        self.base.transaction.remove_set = {self._pkg(from_repo="@repo-1"), self._pkg(from_repo="@repo-2")}
+        self.assertEqual(self.pm.get_changed_repos(), {"repo-1", "repo-2"})
+
+    def test_changed_repos_unknown(self):
+        del self.base.transaction.remove_set
+        self.assertIsNone(self.pm.get_changed_repos())
@@ -12,11 +12,15 @@
 # in this software or its documentation.
 #
 
+import datetime
+
 import mock
 
 from . import fixture
 
+from rhsm.certificate import GMT
 from subscription_manager import healinglib
+from subscription_manager import injection as inj
 
 
 class TestHealingActionInvoker(fixture.SubManFixture):
@@ -71,3 +75,41 @@ class TestHealingUpdateAction(fixture.SubManFixture):
 
         hl = healinglib.HealingUpdateAction()
         hl.perform()
+
+    def test_valid_tomorrow_does_not_contact_server(self):
+        mock_uep = mock.Mock()
+        self.set_consumer_auth_cp(mock_uep)
+        cert_sorter = mock.NonCallableMock()
+        cert_sorter.is_valid.return_value = True
+        cert_sorter.compliant_until = datetime.datetime.now(GMT()) + datetime.timedelta(days=2)
+        max_ages = []
+
+        def create_cert_sorter():
+            max_ages.append(inj.require(inj.LOCAL_COMPLIANCE_CACHE).max_age)
+            return cert_sorter
+
+        inj.provide(inj.CERT_SORTER, create_cert_sorter)
+
+        hl = healinglib.HealingUpdateAction()
+        with self.assertLogs("subscription_manager.healinglib", level="DEBUG") as logs:
+            hl.perform()
+        mock_uep.getConsumer.assert_not_called()
+        mock_uep.bind.assert_not_called()
+        self.assertIn("Entitlement auto healing was checked", "".join(logs.output))
+        # Longer max age of reused status is used only by auto-heal check
+        self.assertEqual([2 * 1440 * 60], max_ages)
+        self.assertIsNone(inj.require(inj.LOCAL_COMPLIANCE_CACHE).max_age)
+
+    def test_valid_today_only_is_healed(self):
+        mock_uep = mock.Mock()
+        mock_uep.getConsumer = mock.Mock(return_value={"autoheal": True})
+        self.set_consumer_auth_cp(mock_uep)
+        cert_sorter = mock.NonCallableMock()
+        cert_sorter.is_valid.return_value = True
+        cert_sorter.compliant_until = datetime.datetime.now(GMT()) + datetime.timedelta(hours=2)
+        inj.provide(inj.CERT_SORTER, cert_sorter)
+
+        hl = healinglib.HealingUpdateAction()
+        hl.perform()
+        mock_uep.getConsumer.assert_called_once()
+        mock_uep.bind.assert_called_once()
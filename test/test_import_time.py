@@ -0,0 +1,96 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Import time benchmark of subscription-manager CLI. The startup of the CLI
+is measured using "python -X importtime" and the tests fail, when modules
+of commands not used by given command line are imported.
+"""
+import os
+import subprocess
+import sys
+import unittest
+
+from test import rootdir, subman_marker_slow, subman_marker_slow_timeout
+
+STARTUP_SCRIPT = """
+import sys
+sys.argv = ["subscription-manager"] + sys.argv[1:]
+from subscription_manager.injectioninit import init_dep_injection
+init_dep_injection()
+from subscription_manager import managercli
+managercli.ManagerCLI()._find_best_match(sys.argv)
+# sys.modules lists every imported module regardless of the way it was
+# imported and of the Python version producing the -X importtime report
+print("\\n".join(sorted(sys.modules)))
+"""
+
+CLI_COMMAND_PACKAGE = "subscription_manager.cli_command."
+
+# Modules shared by all commands
+COMMON_CLI_COMMAND_MODULES = {
+    "subscription_manager.cli_command.cli",
+    "subscription_manager.cli_command.org",
+    "subscription_manager.cli_command.user_pass",
+}
+
+
+def import_times(*args):
+    """
+    Run startup of subscription-manager CLI with given arguments and return
+    tuple: dictionary {module name: cumulative import time in microseconds}
+    of modules imported using import statement and set of all imported modules
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(rootdir / "src"), env.get("PYTHONPATH", "")])
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT] + list(args),
+        env=env,
+        stderr=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            # Header of the output
+            continue
+        times[fields[2].strip()] = int(fields[1])
+    return times, set(proc.stdout.splitlines())
+
+
+@subman_marker_slow
+@subman_marker_slow_timeout
+class TestCLIImportTime(unittest.TestCase):
+    def assert_only_command_imported(self, command_module, *args):
+        times, modules = import_times(*args)
+        self.assertIn("subscription_manager.managercli", times)
+        imported = {
+            name
+            for name in modules
+            if name.startswith(CLI_COMMAND_PACKAGE) and name not in COMMON_CLI_COMMAND_MODULES
+        }
+        self.assertEqual(
+            imported,
+            {CLI_COMMAND_PACKAGE + command_module},
+            "startup took %d us" % sum(t for name, t in times.items() if "." not in name),
+        )
+
+    def test_status_imports_only_status_command(self):
+        self.assert_only_command_imported("status", "status")
+
+    def test_identity_imports_only_identity_command(self):
+        self.assert_only_command_imported("identity", "identity")
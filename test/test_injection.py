@@ -0,0 +1,50 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+import collections
+import unittest
+
+from subscription_manager import injection as inj
+
+
+class TestLazyProvider(unittest.TestCase):
+    def setUp(self):
+        self.broker = inj.FeatureBroker()
+
+    def _provide(self, feature, provider, singleton=False):
+        # Same as inj.provide(), but with private FeatureBroker
+        if isinstance(provider, inj.LazyProvider):
+            provider.singleton = singleton
+        elif not singleton and isinstance(provider, type):
+            provider = inj.nonSingleton(provider)
+        self.broker.provide(feature, provider)
+
+    def test_lazy_singleton(self):
+        self._provide("FEATURE", inj.LazyProvider("collections", "OrderedDict"), singleton=True)
+        first = self.broker.require("FEATURE")
+        self.assertIsInstance(first, collections.OrderedDict)
+        self.assertIs(first, self.broker.require("FEATURE"))
+
+    def test_lazy_non_singleton(self):
+        self._provide("FEATURE", inj.LazyProvider("collections", "OrderedDict"))
+        first = self.broker.require("FEATURE")
+        self.assertIsInstance(first, collections.OrderedDict)
+        self.assertIsNot(first, self.broker.require("FEATURE"))
+
+    def test_lazy_non_singleton_args(self):
+        self._provide("FEATURE", inj.LazyProvider("collections", "Counter"))
+        self.assertEqual(self.broker.require("FEATURE", "aab")["a"], 2)
+
+    def test_module_not_imported_by_provide(self):
+        self._provide("FEATURE", inj.LazyProvider("no_such_module_foo", "Foo"))
+        self.assertRaises(ImportError, self.broker.require, "FEATURE")
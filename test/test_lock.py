@@ -1,5 +1,6 @@
 import unittest
 
+import fcntl
 import os
 import subprocess
 import sys
@@ -8,6 +9,9 @@ import tempfile
 import threading
 import time
 
+import mock
+
+from subscription_manager import certlib
 from subscription_manager import lock
 
 import pytest
@@ -177,6 +181,145 @@ class TestLock(unittest.TestCase):
         self.assertTrue(res)
 
 
+class TestFlockLock(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp(suffix="-lock", prefix="subman-unit-tests-")
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        self.lock_path = os.path.join(tmp_dir, "cert.pid")
+
+    def _hold_lock(self, operation=fcntl.LOCK_EX):
+        # flock() locks belong to open file descriptions, so other open()
+        # of the same file behaves like other process
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, operation)
+        self.addCleanup(os.close, fd)
+        return fd
+
+    def test_acquire_release(self):
+        lf = lock.FlockLock(self.lock_path)
+        self.assertEqual(lf.acquire(), None)
+        self.assertTrue(lf.acquired())
+        with open(self.lock_path) as f:
+            self.assertEqual(str(os.getpid()), f.read())
+        lf.release()
+        self.assertFalse(lf.acquired())
+        # lock file is kept, but pid is removed
+        with open(self.lock_path) as f:
+            self.assertEqual("", f.read())
+
+    def test_reentrant(self):
+        lf = lock.FlockLock(self.lock_path)
+        self.assertTrue(lf.acquire(blocking=True))
+        self.assertTrue(lf.acquire(blocking=False))
+        self.assertEqual(lf.depth, 2)
+        lf.release()
+        self.assertTrue(lf.acquired())
+        lf.release()
+        self.assertFalse(lf.acquired())
+
+    def test_context_manager(self):
+        lf = lock.FlockLock(self.lock_path)
+        with lf:
+            self.assertTrue(lf.acquired())
+        self.assertFalse(lf.acquired())
+
+    def test_blocking_false(self):
+        self._hold_lock()
+        lf = lock.FlockLock(self.lock_path)
+        self.assertFalse(lf.acquire(blocking=False))
+        self.assertFalse(lf.acquired())
+        self.assertIsNone(lf.fd)
+
+    def test_timeout(self):
+        self._hold_lock()
+        lf = lock.FlockLock(self.lock_path)
+        self.assertFalse(lf.acquire(timeout=0.05))
+        self.assertFalse(lf.acquired())
+        self.assertEqual(lf.wait_count, 1)
+        self.assertTrue(lf.last_wait_time >= 0.05)
+
+    def test_waiter_wakes_up_after_release(self):
+        fd = self._hold_lock()
+        timer = threading.Timer(0.1, fcntl.flock, args=(fd, fcntl.LOCK_UN))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        lf = lock.FlockLock(self.lock_path)
+        self.assertTrue(lf.acquire(blocking=True))
+        self.assertEqual(lf.wait_count, 1)
+        self.assertTrue(lf.wait_time > 0)
+        lf.release()
+
+    def test_reentrant_with_other_object(self):
+        lf = lock.FlockLock(self.lock_path)
+        other = lock.FlockLock(self.lock_path)
+        self.assertTrue(lf.acquire(blocking=True))
+        # other object of the same lock file does not conflict with the first one
+        self.assertTrue(other.acquire(blocking=False))
+        self.assertEqual(lf.depth, 2)
+        other.release()
+        self.assertTrue(lf.acquired())
+        lf.release()
+        self.assertFalse(other.acquired())
+        self.assertIsNone(other.fd)
+
+    def test_nested_locker_run(self):
+        # ACTION_LOCK is not a singleton, so every Locker has own lock object
+        def run_nested():
+            with mock.patch("subscription_manager.certlib.inj.require", lambda feature: lock.FlockLock(path)):
+                results.append(certlib.Locker().run(lambda: certlib.Locker().run(lambda: 4)))
+
+        path = self.lock_path
+        results = []
+        thread = threading.Thread(target=run_nested, daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), "nested Locker.run() is blocked")
+        self.assertEqual(results, [4])
+        self.assertFalse(lock.FlockLock(path).acquired())
+
+    def test_waiting_does_not_block_other_locks(self):
+        self._hold_lock()
+        waiting = lock.FlockLock(self.lock_path)
+        thread = threading.Thread(target=waiting.acquire, kwargs={"timeout": 1.0}, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        time.sleep(0.05)
+        other = lock.FlockLock(self.lock_path + ".other")
+        start = time.monotonic()
+        self.assertTrue(other.acquire(blocking=False))
+        self.assertFalse(waiting.acquired())
+        other.release()
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_other_thread_waits_for_lock(self):
+        fd = self._hold_lock()
+        first = lock.FlockLock(self.lock_path)
+        thread = threading.Thread(target=first.acquire, daemon=True)
+        thread.start()
+        time.sleep(0.05)
+        second = lock.FlockLock(self.lock_path)
+        # the first thread is waiting in flock()
+        self.assertFalse(second.acquire(blocking=False))
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        thread.join(5)
+        self.assertTrue(second.acquire(timeout=1.0))
+        self.assertEqual(first.depth, 2)
+        second.release()
+        first.release()
+        self.assertFalse(first.acquired())
+
+    def test_lock_holders(self):
+        self._hold_lock(fcntl.LOCK_SH)
+        holders = lock.lock_holders(self.lock_path)
+        if not os.path.exists("/proc/locks"):
+            self.assertEqual(holders, [])
+        else:
+            self.assertIn((os.getpid(), lock.SHARED), holders)
+
+    def test_lock_holders_missing_file(self):
+        self.assertEqual(lock.lock_holders(self.lock_path), [])
+
+
 # always blocks, needs eventloop/threads
 #    def test_lock_drive_full_blocking(self):
 #        lock_path = "/dev/full"
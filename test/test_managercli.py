@@ -173,6 +173,27 @@ class TestCli(SubManFixture):
         best_match = cli._find_best_match(["subscription-manager", "--version"])
         self.assertEqual(best_match, None)
 
+    def test_cli_loads_only_matched_command(self):
+        cli = managercli.ManagerCLI()
+        self.assertEqual(len(cli.cli_commands), len(managercli.COMMANDS))
+        self.assertFalse(cli.cli_commands.is_loaded("status"))
+        best_match = cli._find_best_match(["subscription-manager", "status"])
+        self.assertEqual(best_match.name, "status")
+        self.assertTrue(cli.cli_commands.is_loaded("status"))
+        self.assertFalse(cli.cli_commands.is_loaded("register"))
+
+    def test_cli_lazy_command_names(self):
+        # Name of the LazyCommand has to be the same as the name of the command
+        cli = managercli.ManagerCLI()
+        for lazy_cmd in managercli.COMMANDS:
+            self.assertEqual(cli.cli_commands[lazy_cmd.name].name, lazy_cmd.name)
+
+    def test_command_classes_are_module_attributes(self):
+        from subscription_manager.cli_command.status import StatusCommand
+
+        self.assertIs(managercli.StatusCommand, StatusCommand)
+        self.assertRaises(AttributeError, getattr, managercli, "NoSuchCommand")
+
 
 class TestCliCommand(SubManFixture):
     command_class = cli.CliCommand
@@ -13,9 +13,13 @@
 #
 import unittest
 
+import io
+import json
 import os
+import shutil
+import stat
+import tempfile
 import mock
-import io
 
 from subscription_manager import plugins
 from subscription_manager import base_plugin
@@ -586,7 +590,11 @@ class TestBasePluginManagerAddPluginsFromModule(unittest.TestCase):
 class TestPluginManager(unittest.TestCase):
     def setUp(self):
         self.module_dir = os.path.join(os.path.dirname(__file__), "plugins")
-        self.manager = plugins.PluginManager(self.module_dir, self.module_dir)
+        manifest_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, manifest_dir)
+        self.manager = plugins.PluginManager(
+            self.module_dir, self.module_dir, manifest_file=os.path.join(manifest_dir, "plugin_manifest.json")
+        )
 
     def test_load_plugin_with_no_api_version(self):
         module = os.path.join(self.module_dir, "no_api_version.py")
@@ -672,6 +680,96 @@ class TestPluginManagerLoadPluginsFromModule(unittest.TestCase):
         self.assertRaises(plugins.SlotNameException, self.manager.run, "this_is_a_slot_that_doesnt_exist")
 
 
+class TestPluginManagerManifest(unittest.TestCase):
+    def setUp(self):
+        self.module_dir = os.path.join(os.path.dirname(__file__), "plugins")
+        self.manifest_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.manifest_dir)
+        self.manifest_file = os.path.join(self.manifest_dir, "plugin_manifest.json")
+
+    def _manager(self):
+        return plugins.PluginManager(self.module_dir, self.module_dir, manifest_file=self.manifest_file)
+
+    def _hook_keys(self, manager):
+        return dict(
+            (slot, [manager._get_hook_plugin_key(func) for func in manager.get_slot_hooks(slot)])
+            for slot in manager.get_slots()
+        )
+
+    def test_manifest_written(self):
+        manager = self._manager()
+        self.assertEqual(5, len(manager.modules))
+        with open(self.manifest_file) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(self.module_dir, manifest["search_path"])
+        dummy = manifest["modules"][os.path.join(self.module_dir, "dummy_plugin_3.py")]
+        self.assertEqual({"DummyPlugin3": ["post_product_id_install", "update_content"]}, dummy["classes"])
+        self.assertTrue("error" in manifest["modules"][os.path.join(self.module_dir, "no_api_version.py")])
+
+    def test_modules_not_imported_with_manifest(self):
+        self._manager()
+        manager = self._manager()
+        self.assertEqual([], manager.modules)
+        self.assertEqual(3, len(manager._slot_to_funcs["post_product_id_install"]))
+        for func in manager._slot_to_funcs["post_product_id_install"]:
+            self.assertTrue(isinstance(func, plugins.LazyPluginHook))
+
+    def test_modules_imported_when_slot_run(self):
+        self._manager()
+        manager = self._manager()
+        runners = list(manager.runiter("update_content", reports=mock.Mock(), ent_source=mock.Mock()))
+        self.assertEqual(1, len(runners))
+        self.assertEqual("dummy_plugin_3.DummyPlugin3", manager._get_hook_plugin_key(runners[0].func))
+        self.assertEqual(["dummy_plugin_3"], [module.__name__ for module in manager.modules])
+        # hooks of other modules are still waiting for import
+        self.assertTrue(
+            isinstance(manager._slot_to_funcs["post_product_id_install"][0], plugins.LazyPluginHook)
+        )
+
+    def test_same_hooks_as_without_manifest(self):
+        eager_manager = self._manager()
+        lazy_manager = self._manager()
+        self.assertEqual(self._hook_keys(eager_manager), self._hook_keys(lazy_manager))
+        self.assertEqual(sorted(eager_manager.get_plugins()), sorted(lazy_manager.get_plugins()))
+
+    def test_manifest_invalidated_by_mtime(self):
+        self._manager()
+        with open(self.manifest_file) as manifest_file:
+            manifest = json.load(manifest_file)
+        manifest["modules"][os.path.join(self.module_dir, "dummy_plugin.py")]["mtime"] = 0
+        with open(self.manifest_file, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        manager = self._manager()
+        self.assertEqual(5, len(manager.modules))
+
+    def test_manifest_invalidated_by_search_path(self):
+        self._manager()
+        manager = plugins.PluginManager(
+            self.module_dir + "/", self.module_dir, manifest_file=self.manifest_file
+        )
+        self.assertEqual(5, len(manager.modules))
+
+    def test_manifest_invalidated_by_new_slot(self):
+        self._manager()
+        with open(self.manifest_file) as manifest_file:
+            manifest = json.load(manifest_file)
+        manifest["slots"].remove("update_content")
+        with open(self.manifest_file, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        manager = self._manager()
+        self.assertEqual(5, len(manager.modules))
+
+    def test_manifest_readable_by_all(self):
+        self._manager()
+        self.assertEqual(0o644, stat.S_IMODE(os.stat(self.manifest_file).st_mode))
+
+    def test_corrupted_manifest(self):
+        with open(self.manifest_file, "w") as manifest_file:
+            manifest_file.write("{not json")
+        manager = self._manager()
+        self.assertEqual(5, len(manager.modules))
+
+
 # sub class for testing just for easier init
 class PluginConfigForTest(plugins.PluginConfig):
     def __init__(self, plugin_key, enabled):
@@ -4,6 +4,7 @@ import collections.abc
 import os
 import shutil
 import tempfile
+import time
 
 from . import stubs
 from subscription_manager import productid
@@ -274,6 +275,17 @@ class TestProductDatabase(unittest.TestCase):
         self.pdb.read()
         self.assertEqual(0, len(self.pdb.content))
 
+    def test_write_exception_keeps_database(self):
+        self.pdb.add("product", "repo")
+        self.pdb.write()
+        self.pdb.add("product2", "repo2")
+        with patch("subscription_manager.productid.json.dump", side_effect=IOError):
+            self.pdb.write()
+        self.assertEqual(["productid.js"], os.listdir(self.temp_dir))
+        self.pdb.content = productid.ProductIdRepoMap()
+        self.pdb.read()
+        self.assertEqual({"product": ["repo"]}, dict(self.pdb.content))
+
     def test_read(self):
         f = open(self.pdb.dir.abspath("productid.js"), "w")
         buf = """{"12345": "rhel-6"}\n"""
@@ -345,6 +357,39 @@ class TestProductDatabase(unittest.TestCase):
         no_repo = self.pdb.find_repos("product")
         self.assertEqual(None, no_repo)
 
+    def test_find_products(self):
+        self.pdb.add("product1", "repo1")
+        self.pdb.add("product1", "repo2")
+        self.pdb.add("product2", "repo2")
+        self.assertEqual({"product1"}, self.pdb.find_products("repo1"))
+        self.assertEqual({"product1", "product2"}, self.pdb.find_products("repo2"))
+        self.assertEqual(set(), self.pdb.find_products("repo3"))
+
+    def test_find_products_after_delete(self):
+        self.pdb.add("product1", "repo1")
+        self.pdb.add("product2", "repo1")
+        self.pdb.delete("product1")
+        self.assertEqual({"product2"}, self.pdb.find_products("repo1"))
+        self.pdb.delete("product2")
+        self.assertEqual(set(), self.pdb.find_products("repo1"))
+
+    def test_find_products_after_read(self):
+        with open(self.pdb.dir.abspath("productid.js"), "w") as f:
+            f.write("""{"12345": "rhel-6", "67890": ["rhel-6", "rhel-6-addon"]}\n""")
+        self.pdb.read()
+        self.assertEqual({"12345", "67890"}, self.pdb.find_products("rhel-6"))
+        self.assertEqual({"67890"}, self.pdb.find_products("rhel-6-addon"))
+
+    def test_check_state(self):
+        self.assertIsNone(self.pdb.last_full_check)
+        self.pdb.last_full_check = 1234.5
+        self.pdb.postponed = {"product1"}
+        self.pdb.write_check_state()
+        other = productid.ProductDatabase()
+        other.read()
+        self.assertEqual(1234.5, other.last_full_check)
+        self.assertEqual({"product1"}, other.postponed)
+
     def test_delete_non_existing(self):
         self.pdb.add("product", "repo")
         len_content = len(self.pdb.content)
@@ -358,6 +403,8 @@ class TestProductManager(SubManFixture):
         SubManFixture.setUp(self)
         self.prod_dir = stubs.StubProductDirectory([])
         self.prod_db_mock = Mock()
+        self.prod_db_mock.last_full_check = None
+        self.prod_db_mock.postponed = set()
         self.prod_mgr = productid.ProductManager(product_dir=self.prod_dir, product_db=self.prod_db_mock)
 
     def assert_nothing_happened(self):
@@ -929,6 +976,81 @@ class TestProductManager(SubManFixture):
         self.assertFalse(self.prod_db_mock.delete.called)
         self.assertFalse(self.prod_db_mock.write.called)
 
+    def test_update_removed_several_certs_at_once(self):
+        certs = [
+            self._create_cert("1234568", "Mediocre OS", "6", "medios-6"),
+            self._create_cert("1234569", "Mediocre OS Addon", "6", "medios-addon-6"),
+        ]
+        self.prod_dir.certs.extend(certs)
+        self.prod_mgr.pdir.refresh = Mock()
+        self.prod_repo_map = {"1234568": ["medios-6-server-rpms"], "1234569": ["medios-addon-6-server-rpms"]}
+        self.prod_db_mock.find_repos = Mock(side_effect=self.find_repos_side_effect)
+
+        self.prod_mgr.update_removed(set([]))
+        for cert in certs:
+            self.assertTrue(cert.delete.called)
+        self.assertEqual(2, self.prod_db_mock.delete.call_count)
+        self.assertEqual(1, self.prod_db_mock.write.call_count)
+        self.assertEqual(1, self.prod_mgr.pdir.refresh.call_count)
+
+    def test_update_removed_only_changed_repos(self):
+        certs = [
+            self._create_cert("1234568", "Mediocre OS", "6", "medios-6"),
+            self._create_cert("1234569", "Mediocre OS Addon", "6", "medios-addon-6"),
+        ]
+        self.prod_dir.certs.extend(certs)
+        self.prod_repo_map = {"1234568": ["medios-6-server-rpms"], "1234569": ["medios-addon-6-server-rpms"]}
+        self.prod_db_mock.find_repos = Mock(side_effect=self.find_repos_side_effect)
+        self.prod_db_mock.find_products = Mock(
+            side_effect=lambda repo: {p for p, repos in self.prod_repo_map.items() if repo in repos}
+        )
+        self.prod_db_mock.last_full_check = time.time()
+
+        self.prod_mgr.update_removed(set([]), changed_repos={"medios-addon-6-server-rpms"})
+        self.assertFalse(certs[0].delete.called)
+        self.assertTrue(certs[1].delete.called)
+        self.prod_db_mock.delete.assert_called_once_with("1234569")
+
+    def test_update_removed_no_changed_products(self):
+        cert = self._create_non_rhel_cert()
+        self.prod_dir.certs.append(cert)
+        self.prod_db_mock.find_products = Mock(return_value=set())
+        self.prod_db_mock.last_full_check = time.time()
+        self.prod_mgr.find_disabled_repos = Mock()
+
+        self.prod_mgr.update_removed(set([]), changed_repos=set())
+        self.assertFalse(cert.delete.called)
+        self.assertFalse(self.prod_mgr.find_disabled_repos.called)
+
+    def test_update_removed_changed_repos_without_recent_full_check(self):
+        cert = self._create_non_rhel_cert()
+        self.prod_dir.certs.append(cert)
+        self.prod_db_mock.find_products = Mock(return_value=set())
+        self.prod_db_mock.find_repos.return_value = ["some-other-repo"]
+        self.prod_db_mock.last_full_check = time.time() - productid.ProductManager.FULL_CHECK_INTERVAL - 1
+
+        self.prod_mgr.update_removed(set([]), changed_repos=set())
+        self.assertTrue(cert.delete.called)
+        self.assertGreater(self.prod_db_mock.last_full_check, time.time() - 60)
+        self.prod_db_mock.write_check_state.assert_called_once_with()
+
+    def test_update_removed_postponed_product(self):
+        cert = self._create_non_rhel_cert()
+        self.prod_dir.certs.append(cert)
+        self.prod_db_mock.find_repos.return_value = ["some-other-repo"]
+        self.prod_db_mock.find_products = Mock(return_value=set())
+        self.prod_db_mock.last_full_check = time.time()
+        self.prod_mgr.meta_data_errors = ["some-other-repo"]
+
+        self.prod_mgr.update_removed(set([]))
+        self.assertFalse(cert.delete.called)
+        self.assertEqual({cert.products[0].id}, self.prod_db_mock.postponed)
+
+        self.prod_mgr.meta_data_errors = []
+        self.prod_mgr.update_removed(set([]), changed_repos=set())
+        self.assertTrue(cert.delete.called)
+        self.assertEqual(set(), self.prod_db_mock.postponed)
+
     def test_update_removed_no_packages_no_repos_no_active(self):
         """we have a product cert, but it is not in active, so it
         should be deleted"""
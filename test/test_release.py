@@ -205,6 +205,74 @@ class TestCdnReleaseVerionProvider(fixture.SubManFixture):
             releases = cdn_rv_provider.get_releases()
             self.assertEqual([], releases)
 
+    def _multiple_listings_ent_dir(self):
+        stub_product = stubs.StubProduct("rhel-6")
+        self.ent_certs = []
+        for name in ("server", "workstation", "client"):
+            content = stubs.StubContent(
+                name,
+                required_tags="rhel-6",
+                url="/content/dist/rhel/%s/6/$releasever/$basearch/os" % name,
+                gpg=None,
+                enabled="1",
+            )
+            self.ent_certs.append(stubs.StubEntitlementCertificate(stub_product, content=[content]))
+        self.ent_dir = stubs.StubEntitlementDirectory(self.ent_certs)
+
+    def test_get_releases_multiple_listings(self):
+        self._multiple_listings_ent_dir()
+        cdn_rv_provider = self._get_cdn_rv_provider()
+        cdn_rv_provider.cert_affinity.write_cache = mock.Mock()
+        requested = {}
+
+        def get_versions(path, cert_key_pairs=None):
+            requested[path] = cert_key_pairs
+            return "6.%d\n" % len(path)
+
+        with mock.patch.object(cdn_rv_provider, "content_connection") as mock_cc:
+            mock_cc.copy.return_value = mock_cc
+            mock_cc.last_cert_key_pair = None
+            mock_cc.get_versions.side_effect = get_versions
+            releases = cdn_rv_provider.get_releases()
+
+        self.assertEqual(len(requested), 3)
+        self.assertEqual(releases, sorted(set("6.%d" % len(path) for path in requested)))
+        self.assertEqual(mock_cc.copy.call_count, 2)
+        self.assertEqual(mock_cc.close.call_count, 2)
+        # Only the entitlement providing the content is used for its listing
+        for ent_cert in self.ent_certs:
+            path = "/content/dist/rhel/%s/6//listing" % ent_cert.content[0].name
+            self.assertEqual(requested[path], [(ent_cert.path, ent_cert.key_path())])
+
+    def test_get_releases_uses_cert_affinity(self):
+        content = stubs.StubContent(
+            "c1", required_tags="rhel-6", url="/content/dist/rhel/server/6/$releasever/os", enabled="1"
+        )
+        self.ent_certs = [
+            stubs.StubEntitlementCertificate(stubs.StubProduct("rhel-6"), content=[content]) for _ in range(3)
+        ]
+        self.ent_dir = stubs.StubEntitlementDirectory(self.ent_certs)
+        cdn_rv_provider = self._get_cdn_rv_provider()
+        cdn_rv_provider.cert_affinity.read_cache_only = mock.Mock()
+        cdn_rv_provider.cert_affinity.write_cache = mock.Mock()
+        preferred = (self.ent_certs[1].path, self.ent_certs[1].key_path())
+        cdn_rv_provider.cert_affinity.affinity = {"/content/dist/rhel/": list(preferred)}
+
+        with mock.patch.object(cdn_rv_provider, "content_connection") as mock_cc:
+            mock_cc.get_versions.return_value = versions
+            mock_cc.last_cert_key_pair = (self.ent_certs[2].path, self.ent_certs[2].key_path())
+            cdn_rv_provider.get_releases()
+
+        cert_key_pairs = mock_cc.get_versions.call_args[1]["cert_key_pairs"]
+        self.assertEqual(cert_key_pairs[0], preferred)
+        self.assertEqual(len(cert_key_pairs), 3)
+        # The pair accepted by CDN is remembered for the content
+        self.assertEqual(
+            cdn_rv_provider.cert_affinity.affinity["/content/dist/rhel/server/6//"],
+            list(mock_cc.last_cert_key_pair),
+        )
+        cdn_rv_provider.cert_affinity.write_cache.assert_called_once_with()
+
 
 class TestReleaseIsCorrectRhel(fixture.SubManFixture):
     def setUp(self):
@@ -0,0 +1,220 @@
+# Copyright (c) 2026 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Module for testing persistent mode of rhsmcertd-worker
+"""
+import os
+import shutil
+import tempfile
+
+from mock import patch, Mock
+
+from subscription_manager import injection as inj
+from subscription_manager.scripts import rhsmcertd_worker
+from subscription_manager.scripts.rhsmcertd_worker import PersistentWorker, WorkerTask
+
+from .fixture import SubManFixture
+
+
+class StopLoop(Exception):
+    pass
+
+
+class TestWorkerTask(SubManFixture):
+    def setUp(self):
+        super(TestWorkerTask, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.update_file = os.path.join(self.tmp_dir, "next_cert_check_update")
+
+    def test_schedule(self):
+        task = WorkerTask("Cert Check", 240, self.update_file)
+        task.schedule(60, now=1000.0)
+        self.assertEqual(task.next_run, 1060.0)
+        self.assertEqual(task.scheduled_run(), 1060.0)
+
+    def test_schedule_without_update_file(self):
+        task = WorkerTask("Cert Check", 240, os.path.join(self.tmp_dir, "missing", "file"))
+        task.schedule(60, now=1000.0)
+        self.assertEqual(task.next_run, 1060.0)
+        self.assertIsNone(task.scheduled_run())
+
+    def test_options(self):
+        options = WorkerTask("Auto-attach", 240, self.update_file, autoheal=True).options()
+        self.assertTrue(options.autoheal)
+        self.assertFalse(options.auto_register)
+        self.assertFalse(options.force)
+
+    def test_cert_check_is_repeated(self):
+        task = WorkerTask("Cert Check", 240, self.update_file)
+        self.assertTrue(task.finished(0))
+        self.assertTrue(task.finished(-1))
+
+    def test_auto_registration_attempts(self):
+        task = WorkerTask("Auto-registration", 60, self.update_file, auto_register=True, max_attempts=2)
+        self.assertTrue(task.finished(-1))
+        self.assertFalse(task.finished(-1))
+
+    def test_auto_registration_success(self):
+        task = WorkerTask("Auto-registration", 60, self.update_file, auto_register=True, max_attempts=3)
+        self.assertFalse(task.finished(0))
+
+
+class TestRun(SubManFixture):
+    @patch("subscription_manager.scripts.rhsmcertd_worker._main")
+    def test_exit_codes(self, mock_main):
+        log = Mock()
+        self.assertEqual(rhsmcertd_worker._run(Mock(), log), 0)
+        mock_main.side_effect = SystemExit(0)
+        self.assertEqual(rhsmcertd_worker._run(Mock(), log), 0)
+        mock_main.side_effect = SystemExit(-1)
+        self.assertEqual(rhsmcertd_worker._run(Mock(), log), -1)
+        mock_main.side_effect = Exception("error")
+        self.assertEqual(rhsmcertd_worker._run(Mock(), log), -1)
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker.terminating", True)
+    @patch("subscription_manager.scripts.rhsmcertd_worker._main")
+    def test_terminating(self, mock_main):
+        mock_main.side_effect = SystemExit(0)
+        self.assertRaises(SystemExit, rhsmcertd_worker._run, Mock(), Mock())
+
+
+class TestPersistentWorker(SubManFixture):
+    def setUp(self):
+        super(TestPersistentWorker, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.config_file = os.path.join(self.tmp_dir, "rhsm.conf")
+        with open(self.config_file, "w") as f:
+            f.write("[rhsmcertd]\n")
+        self.consumer_cert = os.path.join(self.tmp_dir, "cert.pem")
+
+        certpath_patcher = patch(
+            "subscription_manager.scripts.rhsmcertd_worker.ConsumerIdentity.certpath",
+            return_value=self.consumer_cert,
+        )
+        certpath_patcher.start()
+        self.addCleanup(certpath_patcher.stop)
+        run_patcher = patch("subscription_manager.scripts.rhsmcertd_worker._run", return_value=0)
+        self.mock_run = run_patcher.start()
+        self.addCleanup(run_patcher.stop)
+
+        self.cert_check = WorkerTask("Cert Check", 240, os.path.join(self.tmp_dir, "cert_check"))
+        self.auto_attach = WorkerTask(
+            "Auto-attach", 1440, os.path.join(self.tmp_dir, "auto_attach"), autoheal=True
+        )
+
+    def _worker(self, tasks, **kwargs):
+        worker = PersistentWorker(tasks, argv=["/usr/libexec/rhsmcertd-worker", "--persistent"], **kwargs)
+        worker.config_file = self.config_file
+        return worker
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker.time.time", return_value=1000.0)
+    def test_initial_schedule_now(self, mock_time):
+        worker = self._worker([self.cert_check, self.auto_attach], run_now=True)
+        worker.initial_schedule()
+        self.assertEqual(self.cert_check.next_run, 1000.0)
+        self.assertEqual(self.auto_attach.next_run, 1000.0)
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker.time.time", return_value=1000.0)
+    def test_initial_schedule_no_splay(self, mock_time):
+        worker = self._worker([self.cert_check], splay=False)
+        worker.initial_schedule()
+        self.assertEqual(self.cert_check.next_run, 1000.0 + rhsmcertd_worker.INITIAL_DELAY_SECONDS)
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker.time.time", return_value=1000.0)
+    def test_initial_schedule_splay(self, mock_time):
+        worker = self._worker([self.cert_check], splay=True)
+        worker.initial_schedule()
+        delay = self.cert_check.next_run - 1000.0
+        self.assertTrue(rhsmcertd_worker.INITIAL_DELAY_SECONDS <= delay)
+        self.assertTrue(delay <= rhsmcertd_worker.INITIAL_DELAY_SECONDS + self.cert_check.interval)
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker.time.time", return_value=1000.0)
+    def test_initial_schedule_resume(self, mock_time):
+        self.cert_check.schedule(500, now=1000.0)
+        self.auto_attach.schedule(-500, now=1000.0)
+        worker = self._worker([self.cert_check, self.auto_attach], resume=True)
+        worker.initial_schedule()
+        self.assertEqual(self.cert_check.next_run, 1500.0)
+        # Missed run is performed immediately
+        self.assertEqual(self.auto_attach.next_run, 1000.0)
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker.time.sleep")
+    def test_run_tasks_in_order(self, mock_sleep):
+        mock_sleep.side_effect = [None, StopLoop()]
+        worker = self._worker([self.cert_check, self.auto_attach], run_now=True)
+        with patch.object(worker, "should_restart", return_value=False):
+            self.assertRaises(StopLoop, worker.run)
+        autoheal = [call[0][0].autoheal for call in self.mock_run.call_args_list]
+        # Both tasks run first, then the cert check with shorter interval runs again
+        self.assertEqual(sorted(autoheal[:2]), [False, True])
+        self.assertEqual(autoheal[2:], [False])
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker.time.sleep")
+    def test_run_ends_without_tasks(self, mock_sleep):
+        auto_register = WorkerTask(
+            "Auto-registration",
+            60,
+            os.path.join(self.tmp_dir, "auto_register"),
+            auto_register=True,
+            max_attempts=3,
+        )
+        worker = self._worker([auto_register], run_now=True)
+        with patch.object(worker, "should_restart", return_value=False):
+            worker.run()
+        self.assertEqual(self.mock_run.call_count, 1)
+        self.assertEqual(worker.tasks, [])
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker._get_rss")
+    def test_restart_when_memory_limit_exceeded(self, mock_rss):
+        worker = self._worker([self.cert_check], memory_limit=100 * 1024 * 1024)
+        worker.initial_schedule()
+        mock_rss.return_value = 50 * 1024 * 1024
+        self.assertFalse(worker.should_restart())
+        mock_rss.return_value = 150 * 1024 * 1024
+        self.assertTrue(worker.should_restart())
+
+    def test_restart_when_config_changed(self):
+        worker = self._worker([self.cert_check])
+        worker.initial_schedule()
+        self.assertFalse(worker.should_restart())
+        os.utime(self.config_file, (1, 1))
+        self.assertTrue(worker.should_restart())
+
+    @patch("subscription_manager.scripts.rhsmcertd_worker.os.execv")
+    def test_restart(self, mock_execv):
+        worker = self._worker([self.cert_check])
+        worker.restart()
+        worker.argv.append("--resume")
+        worker.restart()
+        for call in mock_execv.call_args_list:
+            argv = call[0][1]
+            self.assertEqual(argv[1:], ["/usr/libexec/rhsmcertd-worker", "--persistent", "--resume"])
+
+    def test_refresh_reloads_identity(self):
+        worker = self._worker([self.cert_check])
+        worker.initial_schedule()
+        identity = inj.require(inj.IDENTITY)
+        cp_provider = inj.require(inj.CP_PROVIDER)
+        with patch.object(identity, "reload") as mock_reload, patch.object(
+            cp_provider, "clean"
+        ) as mock_clean:
+            worker.refresh()
+            mock_reload.assert_not_called()
+            with open(self.consumer_cert, "w") as f:
+                f.write("cert")
+            worker.refresh()
+            mock_reload.assert_called_once_with()
+            mock_clean.assert_called_once_with()